@@ -154,6 +154,18 @@ if __name__ == '__main__':
         } for api in api_arr
     }
 
+    # several processes serve the mysql port, every one with its own predictors cache
+    mysql_workers = args.mysql_workers or config['api'].get('mysql', {}).get('server', {}).get('workers', 1)
+    mysql_connection_id_counter = None
+    if 'mysql' in apis and mysql_workers > 1:
+        mysql_connection_id_counter = ctx.Value('i', 0)
+        for i in range(1, mysql_workers):
+            apis[f'mysql_worker_{i}'] = {
+                'port': apis['mysql']['port'],
+                'process': None,
+                'started': False
+            }
+
     start_functions = {
         'http': start_http,
         'mysql': start_mysql,
@@ -167,6 +179,11 @@ if __name__ == '__main__':
         try:
             if api_name == 'http':
                 p = ctx.Process(target=start_functions[api_name], args=(args.verbose, args.no_studio))
+            elif api_name == 'mysql' or api_name.startswith('mysql_worker_'):
+                p = ctx.Process(
+                    target=start_mysql,
+                    args=(args.verbose, mysql_workers > 1, mysql_connection_id_counter)
+                )
             else:
                 p = ctx.Process(target=start_functions[api_name], args=(args.verbose,))
             p.start()
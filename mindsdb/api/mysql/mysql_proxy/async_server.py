@@ -0,0 +1,181 @@
+"""
+*******************************************************
+ * Copyright (C) 2017 MindsDB Inc. <copyright@mindsdb.com>
+ *
+ * This file is part of MindsDB Server.
+ *
+ * MindsDB Server can not be copied and/or distributed without the express
+ * permission of MindsDB Inc
+ *******************************************************
+"""
+
+import socket
+import struct
+import asyncio
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from mindsdb.api.mysql.mysql_proxy.utilities import log
+from mindsdb.api.mysql.mysql_proxy.libs.constants.mysql import ERR
+
+
+def make_err_packet(err_code, msg, seq=0):
+    ''' ErrPacket for the client which has no session yet '''
+    body = struct.pack('<BH', 0xff, err_code) + msg.encode()
+    return struct.pack('<i', len(body))[:3] + struct.pack('B', seq) + body
+
+
+class AsyncMysqlServer():
+    ''' MySQL protocol server based on asyncio event loop.
+
+        Event loop accepts connections and waits for commands of idle clients, so idle connections
+        do not take threads. Handshake and every command are run by handler (MysqlProxy) in a bounded
+        pool of threads, with the same packet classes and blocking socket calls as in the thread server.
+
+        Args:
+            server_address: tuple, (host, port)
+            handler_class: MysqlProxy class
+            max_connections: int, connections above the limit are rejected with 'Too many connections'
+            max_workers: int, number of commands executed at the same time
+            connect_timeout: float, seconds for the handshake
+            net_timeout: float, seconds to wait for the socket while a command is executed
+            idle_timeout: float, connection is closed if no command received in this time, None - never
+            backlog: int, size of the queue of not accepted connections
+            reuse_port: bool, bind with SO_REUSEPORT, so the port can be served by several processes
+    '''
+
+    def __init__(self, server_address, handler_class, max_connections=1000, max_workers=16,
+                 connect_timeout=10, net_timeout=60, idle_timeout=28800, backlog=128, reuse_port=False):
+        self.server_address = server_address
+        # handler runs whole connection in the constructor, here it is driven command by command
+        self.handler_class = type(handler_class.__name__, (handler_class,), {'handle': lambda self: None})
+        self.max_connections = max_connections
+        self.connect_timeout = connect_timeout
+        self.net_timeout = net_timeout
+        self.idle_timeout = idle_timeout or None
+        self.backlog = backlog
+        self.reuse_port = reuse_port
+
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='mysql_worker')
+        self.loop = None
+        self.socket = None
+        self.connections = set()
+
+        self._stats_lock = threading.Lock()
+        self.accepted = 0
+        self.rejected = 0
+        self.idle_closed = 0
+
+    def serve_forever(self):
+        # add_reader is not available in proactor loop, which is default on windows
+        self.loop = asyncio.SelectorEventLoop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._serve())
+        finally:
+            self.loop.close()
+
+    def server_close(self):
+        if self.socket is not None:
+            self.socket.close()
+        self.executor.shutdown(wait=False)
+
+    def get_stats(self):
+        with self._stats_lock:
+            return {
+                'connections': len(self.connections),
+                'accepted': self.accepted,
+                'rejected': self.rejected,
+                'idle_closed': self.idle_closed
+            }
+
+    async def _serve(self):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if self.reuse_port:
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        self.socket.bind(self.server_address)
+        self.socket.listen(self.backlog)
+        self.socket.setblocking(False)
+
+        while True:
+            client, address = await self.loop.sock_accept(self.socket)
+            if len(self.connections) >= self.max_connections:
+                log.warning(f'Connection from {address} rejected: too many connections')
+                with self._stats_lock:
+                    self.rejected += 1
+                self.loop.create_task(self._reject(client))
+                continue
+            with self._stats_lock:
+                self.accepted += 1
+            self.connections.add(client)
+            self.loop.create_task(self._handle_connection(client, address))
+
+    async def _reject(self, client):
+        try:
+            await self.loop.sock_sendall(
+                client,
+                make_err_packet(ERR.ER_CON_COUNT_ERROR, 'Too many connections')
+            )
+        except Exception:
+            pass
+        finally:
+            client.close()
+
+    def _connect(self, client, address):
+        client.settimeout(self.connect_timeout)
+        handler = self.handler_class(client, address, self)
+        self.hook_before_handle()
+        if handler.handle_connect() is False:
+            return None
+        # after handshake it may be ssl socket
+        handler.socket.settimeout(self.net_timeout)
+        return handler
+
+    async def _wait_command(self, sock):
+        ''' Waits until the client sends something
+            Returns:
+                bool: False if nothing was received in idle_timeout
+        '''
+        if hasattr(sock, 'pending') and sock.pending() > 0:
+            # already read from the socket and decrypted (or decompressed)
+            return True
+        fd = sock.fileno()
+        future = self.loop.create_future()
+        self.loop.add_reader(fd, lambda: future.done() or future.set_result(True))
+        try:
+            await asyncio.wait_for(future, self.idle_timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.loop.remove_reader(fd)
+
+    async def _handle_connection(self, client, address):
+        handler = None
+        try:
+            handler = await self.loop.run_in_executor(self.executor, self._connect, client, address)
+            if handler is None:
+                return
+            while True:
+                if await self._wait_command(handler.socket) is False:
+                    log.debug(f'Connection from {address} closed: idle timeout')
+                    with self._stats_lock:
+                        self.idle_closed += 1
+                    return
+                is_open = await self.loop.run_in_executor(self.executor, handler.handle_command)
+                if is_open is False:
+                    return
+        except Exception:
+            log.error(f'Connection from {address} closed on error')
+            log.error(traceback.format_exc())
+        finally:
+            self.connections.discard(client)
+            try:
+                if handler is not None:
+                    handler.close_session()
+                    handler.socket.close()
+                client.close()
+            except Exception:
+                pass
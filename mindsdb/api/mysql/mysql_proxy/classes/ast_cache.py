@@ -0,0 +1,219 @@
+"""
+*******************************************************
+ * Copyright (C) 2017 MindsDB Inc. <copyright@mindsdb.com>
+ *
+ * This file is part of MindsDB Server.
+ *
+ * MindsDB Server can not be copied and/or distributed without the express
+ * permission of MindsDB Inc
+ *******************************************************
+"""
+
+import re
+import copy
+import threading
+from collections import OrderedDict
+
+from mindsdb_sql import parse_sql
+from mindsdb_sql.parser.ast import Parameter, Constant, Identifier
+from mindsdb_sql.planner import utils as planner_utils
+
+from mindsdb.utilities.config import Config
+from mindsdb.api.mysql.mysql_proxy.utilities.sql import normalize_sql
+
+_literals_re = re.compile(
+    r"""(?P<string>'(?:[^'\\]|\\.|'')*')"""
+    r"""|(?P<quoted>"(?:[^"\\]|\\.|"")*"|`(?:[^`]|``)*`)"""
+    r"""|(?P<number>(?<![\w.$@])\d+(?:\.\d+)?(?![\w.]))"""
+)
+# numbers of 'limit' and 'offset' can not be parameters
+_not_parameter_re = re.compile(r'(\blimit|\boffset|\blimit\s+\d+\s*,)\s*$', flags=re.IGNORECASE)
+
+# template of query which can not be parsed with parameters
+_NOT_PARAMETRIZED = object()
+
+# set of keywords which is referenced by every identifier, it is much bigger than the tree
+_identifier_reserved = getattr(Identifier(parts=['x']), 'reserved', None)
+
+
+def copy_query(query):
+    ''' Deep copy of the parsed query, objects shared by all trees are not copied '''
+    memo = {}
+    if _identifier_reserved is not None:
+        memo[id(_identifier_reserved)] = _identifier_reserved
+    return copy.deepcopy(query, memo)
+
+
+def parametrize_sql(sql):
+    ''' Replaces literals of the query (strings in single quotes and numbers) with '?'
+        Args:
+            sql: str
+        Returns:
+            str: template of query, None if query can not be parametrized
+            list: values of literals
+    '''
+    if '?' in sql:
+        # it is prepared statement already
+        return None, None
+    parts = []
+    values = []
+    position = 0
+    for match in _literals_re.finditer(sql):
+        kind = match.lastgroup
+        if kind == 'quoted':
+            continue
+        text = match.group()
+        if kind == 'string':
+            value = text[1:-1]
+            if '\\' in value or "''" in value:
+                # escaped chars can be decoded differently than by the parser
+                return None, None
+        else:
+            if _not_parameter_re.search(sql, 0, match.start()) is not None:
+                continue
+            value = float(text) if '.' in text else int(text)
+        parts.append(sql[position:match.start()])
+        parts.append('?')
+        position = match.end()
+        values.append(value)
+    if len(values) == 0:
+        return None, None
+    parts.append(sql[position:])
+    return ''.join(parts), values
+
+
+def bind_parameters(query, values):
+    ''' Replaces Parameter nodes of the query with constants
+        Returns:
+            bool: False if number of parameters and values is different
+    '''
+    values = list(values)
+    is_matched = True
+
+    def params_replace(node, **kwargs):
+        nonlocal is_matched
+        if isinstance(node, Parameter):
+            if len(values) == 0:
+                is_matched = False
+                return
+            return Constant(values.pop(0))
+
+    planner_utils.query_traversal(query, params_replace)
+    return is_matched and len(values) == 0
+
+
+class AstCache():
+    ''' LRU cache of parsed queries, keyed by normalized text of query.
+
+        In 'parametrize_literals' mode literals are taken out of the query, so queries which differ
+        only by values of literals share one parsed template. First time template is checked against
+        the parsed query, and if they are different, the template is not used.
+        Every read returns a copy of the tree, so it can be changed by the caller.
+
+        Args:
+            max_size: int, number of parsed queries
+            parametrize_literals: bool
+    '''
+
+    def __init__(self, max_size=1024, parametrize_literals=True):
+        self.max_size = max_size
+        self.parametrize_literals = parametrize_literals
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.template_hits = 0
+        self.misses = 0
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _set(self, key, entry):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def parse(self, sql, dialect='mindsdb'):
+        ''' Same as mindsdb_sql.parse_sql, but the result may be taken from the cache '''
+        sql = normalize_sql(sql)
+
+        key = (dialect, sql)
+        entry = self._get(key)
+        if entry is not None:
+            self._count('hits')
+            return copy_query(entry)
+
+        template, values = (None, None)
+        if self.parametrize_literals:
+            template, values = parametrize_sql(sql)
+
+        if template is not None:
+            template_key = (dialect, template)
+            entry = self._get(template_key)
+            if entry is not None and entry is not _NOT_PARAMETRIZED:
+                query = copy_query(entry)
+                if bind_parameters(query, values):
+                    self._count('template_hits')
+                    return query
+
+        self._count('misses')
+        query = parse_sql(sql, dialect=dialect)
+
+        if template is not None and entry is None:
+            # check that template is parsed to the same tree
+            try:
+                entry = parse_sql(template, dialect=dialect)
+                bound_query = copy_query(entry)
+                if bind_parameters(bound_query, values) is False or bound_query != query:
+                    entry = _NOT_PARAMETRIZED
+            except Exception:
+                entry = _NOT_PARAMETRIZED
+            self._set(template_key, entry)
+            if entry is not _NOT_PARAMETRIZED:
+                return query
+
+        self._set(key, copy_query(query))
+        return query
+
+    def get_stats(self):
+        with self._lock:
+            total = self.hits + self.template_hits + self.misses
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'template_hits': self.template_hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits + self.template_hits) / total if total > 0 else 0.
+            }
+
+
+_ast_cache = None
+_ast_cache_init_lock = threading.Lock()
+
+
+def get_ast_cache():
+    ''' Cache of the process, it is configured by `api.mysql.ast_cache`: size and parametrize_literals '''
+    global _ast_cache
+    with _ast_cache_init_lock:
+        if _ast_cache is None:
+            cache_config = Config()['api']['mysql'].get('ast_cache', {})
+            _ast_cache = AstCache(
+                max_size=cache_config.get('size', 1024),
+                parametrize_literals=cache_config.get('parametrize_literals', True)
+            )
+        return _ast_cache
+
+
+def parse_sql_cached(sql, dialect='mindsdb'):
+    return get_ast_cache().parse(sql, dialect)
@@ -0,0 +1,160 @@
+"""
+*******************************************************
+ * Copyright (C) 2017 MindsDB Inc. <copyright@mindsdb.com>
+ *
+ * This file is part of MindsDB Server.
+ *
+ * MindsDB Server can not be copied and/or distributed without the express
+ * permission of MindsDB Inc
+ *******************************************************
+"""
+
+# https://dev.mysql.com/doc/internals/en/compressed-packet-header.html
+# https://dev.mysql.com/doc/dev/mysql-server/latest/page_protocol_basic_compression.html
+
+import zlib
+import struct
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from mindsdb.api.mysql.mysql_proxy.libs.constants.mysql import MAX_PACKET_SIZE
+
+# same as in mysql server, shorter payloads are sent not compressed
+MIN_COMPRESS_LENGTH = 50
+
+_pack_length = struct.Struct('<I').pack
+
+
+def is_zstd_available():
+    return zstandard is not None
+
+
+class ZlibCompressor():
+    name = 'zlib'
+
+    def __init__(self, level=None):
+        self.level = 6 if level is None else level
+
+    def compress(self, data):
+        return zlib.compress(data, self.level)
+
+    def decompress(self, data, length):
+        return zlib.decompress(data)
+
+
+class ZstdCompressor():
+    name = 'zstd'
+
+    def __init__(self, level=None):
+        if zstandard is None:
+            raise Exception("Package 'zstandard' is required for zstd compression")
+        self.level = 3 if level is None else level
+        self._compressor = zstandard.ZstdCompressor(level=self.level)
+        self._decompressor = zstandard.ZstdDecompressor()
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def decompress(self, data, length):
+        return self._decompressor.decompress(data, max_output_size=length)
+
+
+class CompressedSocket():
+    ''' Socket of the connection which uses compressed protocol.
+
+        Packets are written to and read from it as to plain socket, so Packet.send, Packet.get
+        and send_package_group work without changes: each sendall is framed into compressed packets,
+        and recv returns bytes of unpacked payloads. Other attributes are taken from the wrapped socket.
+
+        Args:
+            sock: socket (or ssl socket) of the connection
+            compressor: ZlibCompressor or ZstdCompressor
+            min_length: int, payloads shorter than this are sent not compressed
+    '''
+
+    def __init__(self, sock, compressor, min_length=MIN_COMPRESS_LENGTH):
+        self.socket = sock
+        self.compressor = compressor
+        self.min_length = min_length
+        # sequence of compressed packets, it is separate from the sequence of packets inside them
+        self.sequence_id = 0
+        self._buffer = bytearray()
+
+        self.bytes_sent = 0
+        self.bytes_sent_compressed = 0
+
+    def __getattr__(self, name):
+        return getattr(self.socket, name)
+
+    def _recv_exactly(self, length):
+        data = bytearray()
+        while len(data) < length:
+            chunk = self.socket.recv(length - len(data))
+            if len(chunk) == 0:
+                return None
+            data += chunk
+        return bytes(data)
+
+    def _read_packet(self):
+        ''' Reads one compressed packet and adds its payload to the buffer
+            Returns:
+                bool: False if the connection is closed
+        '''
+        header = self._recv_exactly(7)
+        if header is None:
+            return False
+        length = struct.unpack('<I', header[:3] + b'\x00')[0]
+        # new command of the client starts the sequence
+        self.sequence_id = (header[3] + 1) % 256
+        uncompressed_length = struct.unpack('<I', header[4:] + b'\x00')[0]
+        payload = self._recv_exactly(length)
+        if payload is None:
+            return False
+        if uncompressed_length > 0:
+            payload = self.compressor.decompress(payload, uncompressed_length)
+        self._buffer += payload
+        return True
+
+    def recv(self, length, *args):
+        while len(self._buffer) < length:
+            if self._read_packet() is False:
+                break
+        data = bytes(self._buffer[:length])
+        del self._buffer[:length]
+        return data
+
+    def pending(self):
+        ''' Number of bytes which are read from the socket, but not taken by recv yet '''
+        pending = len(self._buffer)
+        if hasattr(self.socket, 'pending'):
+            pending += self.socket.pending()
+        return pending
+
+    def sendall(self, data):
+        frames = []
+        for i in range(0, len(data), MAX_PACKET_SIZE):
+            chunk = bytes(data[i:i + MAX_PACKET_SIZE])
+            uncompressed_length = 0
+            payload = chunk
+            if len(chunk) >= self.min_length:
+                compressed = self.compressor.compress(chunk)
+                if len(compressed) < len(chunk):
+                    payload = compressed
+                    uncompressed_length = len(chunk)
+            frames.append(
+                _pack_length(len(payload))[:3]
+                + bytes([self.sequence_id])
+                + _pack_length(uncompressed_length)[:3]
+            )
+            frames.append(payload)
+            self.sequence_id = (self.sequence_id + 1) % 256
+            self.bytes_sent += len(chunk)
+            self.bytes_sent_compressed += len(payload) + 7
+        self.socket.sendall(b''.join(frames))
+
+    def send(self, data, *args):
+        self.sendall(data)
+        return len(data)
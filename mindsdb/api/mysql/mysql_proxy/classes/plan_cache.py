@@ -0,0 +1,95 @@
+"""
+*******************************************************
+ * Copyright (C) 2017 MindsDB Inc. <copyright@mindsdb.com>
+ *
+ * This file is part of MindsDB Server.
+ *
+ * MindsDB Server can not be copied and/or distributed without the express
+ * permission of MindsDB Inc
+ *******************************************************
+"""
+
+import threading
+from collections import OrderedDict
+
+from mindsdb.utilities.config import Config
+
+
+class PreparedPlan():
+    ''' Result of preparing of the statement, which does not depend on values of its parameters.
+        It is not changed after creation, so it is shared by all statements and sessions with the same query.
+    '''
+
+    def __init__(self, query, query_str, outer_query, tables, integrations_names, predictors,
+                 predictor_metadata, model_types, columns_list, parameters):
+        # query with Parameter nodes
+        self.query = query
+        self.query_str = query_str
+        self.outer_query = outer_query
+        self.tables = tables
+        self.integrations_names = integrations_names
+        # predictor name -> entry of PredictorCatalog, to check that predictors were not changed
+        self.predictors = predictors
+        self.predictor_metadata = predictor_metadata
+        self.model_types = model_types
+        self.columns_list = columns_list
+        self.parameters = parameters
+
+
+class PlanCache():
+    ''' LRU cache of prepared plans
+        Args:
+            max_size: int, number of plans
+    '''
+
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self._plans = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._plans.move_to_end(key)
+            return plan
+
+    def set(self, key, plan):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._plans[key] = plan
+            self._plans.move_to_end(key)
+            while len(self._plans) > self.max_size:
+                self._plans.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._plans.pop(key, None)
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'size': len(self._plans),
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+_plan_cache = None
+_plan_cache_init_lock = threading.Lock()
+
+
+def get_plan_cache():
+    ''' Plans cache shared by all sessions of the server, its size is `api.mysql.prepared_statements.plan_cache_size` '''
+    global _plan_cache
+    with _plan_cache_init_lock:
+        if _plan_cache is None:
+            stmt_config = Config()['api']['mysql'].get('prepared_statements', {})
+            _plan_cache = PlanCache(stmt_config.get('plan_cache_size', 1024))
+        return _plan_cache
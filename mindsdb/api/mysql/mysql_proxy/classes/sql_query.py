@@ -10,13 +10,14 @@
 """
 
 import re
+import copy
+import numpy as np
 import pandas as pd
 import datetime
-import time
+from decimal import Decimal, InvalidOperation
+from concurrent.futures import ThreadPoolExecutor
 
-import duckdb
 from lightwood.api import dtype
-from mindsdb_sql import parse_sql
 from mindsdb_sql.planner import plan_query
 from mindsdb_sql.parser.dialects.mindsdb.latest import Latest
 from mindsdb_sql.parser.ast import (
@@ -32,6 +33,8 @@ from mindsdb_sql.parser.ast import (
     Star,
     Insert,
     Delete,
+    Tuple,
+    Parameter,
 )
 from mindsdb_sql.planner.steps import (
     ApplyTimeseriesPredictorStep,
@@ -53,10 +56,13 @@ from mindsdb_sql.planner import query_planner, utils as planner_utils
 
 from mindsdb.api.mysql.mysql_proxy.classes.com_operators import operator_map
 from mindsdb.api.mysql.mysql_proxy.libs.constants.mysql import TYPES, ERR
+from mindsdb.api.mysql.mysql_proxy.data_types.resultset_row_encoder import get_column_type, is_type_compatible
 from mindsdb.api.mysql.mysql_proxy.utilities import log
 from mindsdb.interfaces.ai_table.ai_table import AITableStore
-import mindsdb.interfaces.storage.db as db
-from mindsdb.api.mysql.mysql_proxy.utilities.sql import query_df
+from mindsdb.interfaces.model.predictor_catalog import get_predictor_catalog
+from mindsdb.api.mysql.mysql_proxy.utilities.sql import query_df, normalize_sql
+from mindsdb.api.mysql.mysql_proxy.classes.plan_cache import PreparedPlan, get_plan_cache
+from mindsdb.api.mysql.mysql_proxy.classes.ast_cache import parse_sql_cached, copy_query
 from mindsdb.api.mysql.mysql_proxy.utilities.functions import get_column_in_case
 
 from mindsdb.api.mysql.mysql_proxy.utilities import (
@@ -75,6 +81,28 @@ from mindsdb.api.mysql.mysql_proxy.utilities import (
 
 superset_subquery = re.compile(r'from[\s\n]*(\(.*\))[\s\n]*as[\s\n]*virtual_table', flags=re.IGNORECASE | re.MULTILINE | re.S)
 
+# mysql types of columns of predictors in text protocol, other dtypes are sent as strings
+MODEL_TEXT_DTYPES_MAP = {
+    dtype.integer: TYPES.MYSQL_TYPE_LONG,
+    dtype.float: TYPES.MYSQL_TYPE_DOUBLE,
+    dtype.date: TYPES.MYSQL_TYPE_DATE,
+    dtype.datetime: TYPES.MYSQL_TYPE_DATETIME
+}
+
+# mysql types of columns of predictors in binary protocol (prepared statements)
+MODEL_DTYPES_MAP = {
+    dtype.integer: TYPES.MYSQL_TYPE_LONGLONG,
+    dtype.float: TYPES.MYSQL_TYPE_DOUBLE,
+    dtype.quantity: TYPES.MYSQL_TYPE_DOUBLE,
+    dtype.date: TYPES.MYSQL_TYPE_DATE,
+    dtype.datetime: TYPES.MYSQL_TYPE_DATETIME,
+    dtype.binary: TYPES.MYSQL_TYPE_VAR_STRING,
+    dtype.categorical: TYPES.MYSQL_TYPE_VAR_STRING,
+    dtype.tags: TYPES.MYSQL_TYPE_VAR_STRING,
+    dtype.short_text: TYPES.MYSQL_TYPE_VAR_STRING,
+    dtype.rich_text: TYPES.MYSQL_TYPE_VAR_STRING
+}
+
 
 def get_preditor_alias(step, mindsdb_database):
     predictor_name = '.'.join(step.predictor.parts)
@@ -97,6 +125,14 @@ def get_table_alias(table_obj, default_db_name):
     return name
 
 
+def get_integrations_names(datahub):
+    integrations_names = datahub.get_datasources_names()
+    integrations_names.append('information_schema')
+    integrations_names.append('files')
+    integrations_names.append('views')
+    return integrations_names
+
+
 def get_all_tables(stmt):
     if isinstance(stmt, Union):
         left = get_all_tables(stmt.left)
@@ -157,16 +193,273 @@ def replaceQueryVar(where, var_value, var_name):
             where.value = var_value
 
 
-def join_query_data(target, source):
-    target['values'].extend(source['values'])
-    target['tables'].extend(source['tables'])
-    target['tables'] = list(set(target['tables']))
-    for table_name in source['columns']:
-        if table_name not in target['columns']:
-            target['columns'][table_name] = source['columns'][table_name]
+def get_query_var_name(node):
+    if isinstance(node, Constant) and isinstance(node.value, str):
+        if node.value.startswith('$var[') and node.value.endswith(']'):
+            return node.value[len('$var['):-1]
+    return None
+
+
+def has_query_var(node):
+    if isinstance(node, Operation):
+        return any(has_query_var(arg) for arg in node.args)
+    return get_query_var_name(node) is not None
+
+
+def split_and_conditions(where):
+    if where is None:
+        return []
+    if isinstance(where, BinaryOperation) and where.op.lower() == 'and':
+        return split_and_conditions(where.args[0]) + split_and_conditions(where.args[1])
+    return [where]
+
+
+def join_and_conditions(conditions):
+    result = None
+    for condition in conditions:
+        result = condition if result is None else BinaryOperation('and', args=[result, condition])
+    return result
+
+
+def get_query_var_conditions(where):
+    ''' Splits `where` into conditions without variables and conditions like `column = $var[name]`.
+        Only conditions joined by AND can be split, so in this case query for many variables values
+        can be made by replacing of variables conditions with one condition for all values.
+        Returns:
+            (list of conditions, dict of variable name -> column Identifier), or (None, None) if
+            variables are used in other way
+    '''
+    conditions = []
+    var_columns = {}
+    for condition in split_and_conditions(where):
+        if isinstance(condition, BinaryOperation) and condition.op == '=':
+            column, var = condition.args
+            if isinstance(column, Constant):
+                column, var = var, column
+            var_name = get_query_var_name(var)
+            if isinstance(column, Identifier) and var_name is not None and var_name not in var_columns:
+                var_columns[var_name] = column
+                continue
+        if has_query_var(condition):
+            return None, None
+        conditions.append(condition)
+    return conditions, var_columns
+
+
+def make_var_groups_condition(var_columns, var_groups):
+    ''' Makes condition which selects rows of all variables groups:
+        `column in (...)` for single variable, and `(c1 = v1 and c2 = v2) or (...)` for many
+    '''
+    names = list(var_columns.keys())
+    if len(names) == 1:
+        name = names[0]
+        return BinaryOperation('in', args=[
+            var_columns[name],
+            Tuple([Constant(var_group[name]) for var_group in var_groups])
+        ])
+    condition = None
+    for var_group in var_groups:
+        group_condition = join_and_conditions([
+            BinaryOperation('=', args=[var_columns[name], Constant(var_group[name])])
+            for name in names
+        ])
+        condition = group_condition if condition is None else BinaryOperation('or', args=[condition, group_condition])
+    return condition
+
+
+def normalize_var_value(value):
+    ''' Value of variable column in the form which does not depend on its type, so value of variable
+        is equal to the value of the column returned by the database: 1, 1.0, Decimal('1.00') and '1'
+        are the same, as date(2020, 1, 1), datetime(2020, 1, 1) and '2020-01-01'.
+        Returns None for NULL.
+    '''
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, np.datetime64):
+        value = pd.Timestamp(value).to_pydatetime()
+    if isinstance(value, bool):
+        value = int(value)
+    if isinstance(value, bytes):
+        value = value.decode(errors='replace')
+    if isinstance(value, str):
+        text = value.strip()
+        try:
+            number = Decimal(text)
+            if number.is_finite():
+                value = number
+        except InvalidOperation:
+            try:
+                value = datetime.datetime.fromisoformat(text)
+            except ValueError:
+                return value
+    if isinstance(value, (int, float, Decimal)):
+        try:
+            number = Decimal(str(value)).normalize()
+        except InvalidOperation:
+            return str(value)
+        return ('number', format(number, 'f'))
+    if isinstance(value, datetime.datetime):
+        if value.time() == datetime.time(0) and value.tzinfo is None:
+            value = value.date()
         else:
-            target['columns'][table_name].extend(source['columns'][table_name])
-            target['columns'][table_name] = list(set(target['columns'][table_name]))
+            return ('datetime', value.isoformat(sep=' '))
+    if isinstance(value, datetime.date):
+        return ('datetime', value.isoformat())
+    return str(value)
+
+
+def normalize_var_key(key, lower=False):
+    ''' normalize_var_value for each value of the key, `lower` - strings are compared case-insensitive '''
+    key = tuple(normalize_var_value(value) for value in key)
+    if lower:
+        key = tuple(value.lower() if isinstance(value, str) else value for value in key)
+    return key
+
+
+# Result of each planner step is columnar:
+#   'values': pd.DataFrame, column `i` of the frame holds values of `keys[i]`
+#   'keys': list of (table_name, (column_name, column_alias))
+#   'columns': {table_name: [(column_name, column_alias)]}
+#   'tables': [table_name]
+# where table_name is (database, table, alias)
+
+
+def unique(items):
+    return list(dict.fromkeys(items))
+
+
+def make_frame(rows, column_names):
+    ''' Makes columnar frame from list of dicts, column `i` of the frame holds values of column_names[i].
+        Values are kept as is (object dtype): integers with NULLs are not turned into floats
+    '''
+    return pd.DataFrame(
+        {i: [row.get(name) for row in rows] for i, name in enumerate(column_names)},
+        index=range(len(rows)),
+        dtype=object
+    )
+
+
+def get_frame_values(frame):
+    ''' Replaces NaN with None, as NULL is expected in the result '''
+    frame = frame.astype(object)
+    return frame.where(pd.notnull(frame), None)
+
+
+def _to_join_column(column):
+    ''' Sets explicit type of object column: integers -> int64, integers with NULLs
+        and floats -> float64, other values (strings, dates, bools, decimals) stay object
+    '''
+    if column.dtype != object:
+        return column
+    values = column.tolist()
+    numbers = [
+        x for x in values
+        if x is not None and not (isinstance(x, float) and x != x)
+    ]
+    if len(numbers) == 0 or not all(
+        isinstance(x, (int, float, np.integer, np.floating)) and not isinstance(x, (bool, np.bool_))
+        for x in numbers
+    ):
+        return column
+    if len(numbers) == len(values) and all(isinstance(x, (int, np.integer)) for x in numbers):
+        try:
+            return pd.Series(values, index=column.index, dtype='int64')
+        except OverflowError:
+            pass
+    return pd.Series([np.nan if x is None else x for x in values], index=column.index, dtype='float64')
+
+
+def to_join_frame(frame, prefix):
+    ''' Frame of JoinStep data to register in duckdb, columns are named {prefix}{i}.
+        Types of columns are set explicitly, as they were inferred when joined data was made of rows
+    '''
+    return pd.DataFrame(
+        {f'{prefix}{i}': _to_join_column(frame[column]) for i, column in enumerate(frame.columns)},
+        index=frame.index
+    )
+
+
+def get_column_stats(column):
+    ''' Collects statistics of the result column which are needed to describe it to the client
+        Args:
+            column: pd.Series
+        Returns:
+            dict: rows_count, null_count, max_length - max length of values as strings,
+                value_types - set of python types of not NULL values
+    '''
+    is_null = column.isnull()
+    null_count = int(is_null.sum())
+    # NULL is counted as 'None', same as str(None)
+    max_length = 4 if null_count > 0 else 0
+    value_types = set()
+    if null_count < len(column):
+        not_null = column[~is_null]
+        max_length = max(max_length, int(not_null.astype(str).str.len().max()))
+        value_types = set(map(type, not_null.tolist()))
+    return {
+        'rows_count': len(column),
+        'null_count': null_count,
+        'max_length': max_length,
+        'value_types': value_types
+    }
+
+
+def make_query_data(table_name, frame, columns):
+    return {
+        'values': frame,
+        'keys': [(table_name, column) for column in columns],
+        'columns': {table_name: list(columns)},
+        'tables': [table_name]
+    }
+
+
+def empty_query_data(columns=None, tables=None):
+    return {
+        'values': pd.DataFrame(),
+        'keys': [],
+        'columns': columns or {},
+        'tables': tables or []
+    }
+
+
+def get_key_positions(data):
+    return {key: i for i, key in enumerate(data['keys'])}
+
+
+def concat_query_data(parts):
+    ''' Makes union of rows of all parts, columns missing in a part are filled with NULL '''
+    if len(parts) == 0:
+        return empty_query_data()
+    if len(parts) == 1:
+        return parts[0]
+
+    keys = unique(key for part in parts for key in part['keys'])
+    positions = {key: i for i, key in enumerate(keys)}
+    frames = []
+    for part in parts:
+        frame = part['values'].copy(deep=False)
+        frame.columns = [positions[key] for key in part['keys']]
+        for i in set(range(len(keys))) - set(frame.columns):
+            frame[i] = None
+        frames.append(frame[list(range(len(keys)))])
+
+    columns = {}
+    for part in parts:
+        for table_name, table_columns in part['columns'].items():
+            columns[table_name] = unique(columns.get(table_name, []) + list(table_columns))
+
+    return {
+        'values': pd.concat(frames, ignore_index=True),
+        'keys': keys,
+        'columns': columns,
+        'tables': unique(table_name for part in parts for table_name in part['tables'])
+    }
+
+
+def join_query_data(target, source):
+    target.update(concat_query_data([target, source]))
 
 
 def is_empty_prediction_row(predictor_value):
@@ -196,7 +489,7 @@ class Column:
         return f'{self.__class__.__name__}({self.__dict__})'
 
 class SQLQuery():
-    def __init__(self, sql, session, execute=True):
+    def __init__(self, sql, session, execute=True, plan=None):
         self.session = session
         self.integration = session.integration
         self.database = None if session.database == '' else session.database.lower()
@@ -204,37 +497,128 @@ class SQLQuery():
         self.ai_table = None
         self.outer_query = None
         self.row_id = 0
+        self.join_counter = 0
         self.columns_list = None
+        self.columns_stats = None
 
         self.mindsdb_database_name = 'mindsdb'
 
-        if isinstance(sql, str):
-        # +++ workaround for subqueries in superset
-            if 'as virtual_table' in sql.lower():
-                subquery = re.findall(superset_subquery, sql)
-                if isinstance(subquery, list) and len(subquery) == 1:
-                    subquery = subquery[0]
-                    self.outer_query = sql.replace(subquery, 'dataframe')
-                    sql = subquery.strip('()')
-            # ---
-            self.query = parse_sql(sql, dialect='mindsdb')
-            self.query_str = sql
-        else:
-            self.query = sql
-            renderer = SqlalchemyRender('mysql')
-            self.query_str = renderer.get_string(self.query, with_failback=True)
-
         # self.raw = sql
         # self.query = None
         self.planner = None
+        self.plan = None
         self.parameters = []
         self.fetched_data = None
         self.model_types = {}
-        self._process_query(sql)
+
+        if plan is not None:
+            self._load_plan(plan)
+        else:
+            if isinstance(sql, str):
+            # +++ workaround for subqueries in superset
+                if 'as virtual_table' in sql.lower():
+                    subquery = re.findall(superset_subquery, sql)
+                    if isinstance(subquery, list) and len(subquery) == 1:
+                        subquery = subquery[0]
+                        self.outer_query = sql.replace(subquery, 'dataframe')
+                        sql = subquery.strip('()')
+                # ---
+                self.query = parse_sql_cached(sql, dialect='mindsdb')
+                self.query_str = sql
+            else:
+                self.query = sql
+                renderer = SqlalchemyRender('mysql')
+                self.query_str = renderer.get_string(self.query, with_failback=True)
+
+            self._process_query(sql)
         if execute:
             self.prepare_query(prepare=False)
             self.execute_query()
 
+    @classmethod
+    def prepare_statement(cls, sql, session):
+        ''' Makes SQLQuery of the prepared statement. Plan of the statement is taken from the cache
+            of the session or of the server, if the same query was prepared before and predictors
+            and integrations used by it were not changed since.
+            Args:
+                sql: str
+                session: SessionController
+            Returns:
+                SQLQuery: with 'plan' of the statement, not executed
+        '''
+        key = (session.company_id, session.database, session.integration, normalize_sql(sql))
+        server_cache = get_plan_cache()
+        for cache in (session.plan_cache, server_cache):
+            plan = cache.get(key)
+            if plan is None:
+                continue
+            if cls.is_plan_actual(plan, session):
+                session.plan_cache.set(key, plan)
+                return cls(None, session=session, execute=False, plan=plan)
+            cache.delete(key)
+
+        sqlquery = cls(sql, session=session, execute=False)
+        sqlquery.prepare_query()
+        plan = sqlquery.get_plan()
+        session.plan_cache.set(key, plan)
+        server_cache.set(key, plan)
+        return sqlquery
+
+    @staticmethod
+    def is_plan_actual(plan, session):
+        if get_integrations_names(session.datahub) != plan.integrations_names:
+            return False
+        predictors = get_predictor_catalog().get(session.company_id, plan.tables)
+        if predictors.keys() != plan.predictors.keys():
+            return False
+        # entries of the catalog are replaced if predictor is changed
+        return all(predictors[name] is entry for name, entry in plan.predictors.items())
+
+    def get_plan(self):
+        if self.plan is None:
+            self.plan = PreparedPlan(
+                query=copy_query(self.query),
+                query_str=self.query_str,
+                outer_query=self.outer_query,
+                tables=self.tables,
+                integrations_names=self.integrations_names,
+                predictors=self.predictors,
+                predictor_metadata=self.planner.predictor_metadata,
+                model_types=self.model_types,
+                columns_list=self.columns_list,
+                parameters=self.parameters
+            )
+        return self.plan
+
+    def _load_plan(self, plan):
+        self.plan = plan
+        self.query = copy_query(plan.query)
+        self.query_str = plan.query_str
+        self.outer_query = plan.outer_query
+        self.tables = plan.tables
+        self.integrations_names = plan.integrations_names
+        self.predictors = plan.predictors
+        self.model_types = dict(plan.model_types)
+        self.columns_list = None if plan.columns_list is None else list(plan.columns_list)
+        self.parameters = plan.parameters
+        self._make_planner(plan.predictor_metadata)
+
+    def _bind_parameters(self, params):
+        ''' Puts values of parameters into the query of the prepared statement.
+            Query with values is planned by new planner, the same way as not prepared query.
+        '''
+        params = list(params)
+
+        def params_replace(node, **kwargs):
+            if isinstance(node, Parameter):
+                if len(params) == 0:
+                    raise SqlApiException("Count of execution parameters don't match prepared statement")
+                return Constant(params.pop(0))
+
+        planner_utils.query_traversal(self.query, params_replace)
+        if len(params) > 0:
+            raise SqlApiException("Count of execution parameters don't match prepared statement")
+        self._make_planner(self.planner.predictor_metadata)
 
     def fetch(self, datahub, view='list'):
         data = self.fetched_data
@@ -251,107 +635,285 @@ class SQLQuery():
             'result': self.result
         }
 
-    def _fetch_dataframe_step(self, step):
-        dn = self.datahub.get(step.integration)
-        query = step.query
-
-        table_alias = get_table_alias(step.query.from_table, self.database)
-        # TODO for information_schema we have 'database' = 'mindsdb'
-
+    def _fetch_frame(self, integration, query):
+        dn = self.datahub.get(integration)
         data, column_names = dn.select(
             query=query
         )
+        return make_frame(data, column_names), column_names
+
+    def _make_fetched_data(self, table_alias, frame, column_names):
+        frame = frame.reset_index(drop=True)
+        frame[len(column_names)] = range(self.row_id, self.row_id + len(frame))
+        self.row_id = self.row_id + len(frame)
 
         columns = [(column_name, column_name) for column_name in column_names]
         columns.append(('__mindsdb_row_id', '__mindsdb_row_id'))
 
-        for i, row in enumerate(data):
-            row['__mindsdb_row_id'] = self.row_id + i
-        self.row_id = self.row_id + len(data)
+        return make_query_data(table_alias, frame, columns)
 
-        data = [{(key, key): value for key, value in row.items()} for row in data]
-        data = [{table_alias: x} for x in data]
+    def _fetch_dataframe_step(self, step):
+        table_alias = get_table_alias(step.query.from_table, self.database)
+        # TODO for information_schema we have 'database' = 'mindsdb'
 
-        data = {
-            'values': data,
-            'columns': {table_alias: columns},
-            'tables': [table_alias]
-        }
-        return data
+        frame, column_names = self._fetch_frame(step.integration, step.query)
+        return self._make_fetched_data(table_alias, frame, column_names)
 
     def _multiple_steps(self, step):
-        data = {
-            'values': [],
-            'columns': {},
-            'tables': []
-        }
-        for substep in step.steps:
-            sub_data = self._fetch_dataframe_step(substep)
-            join_query_data(data, sub_data)
-        return data
+        return concat_query_data([
+            self._fetch_dataframe_step(substep)
+            for substep in step.steps
+        ])
+
+    def _get_map_reduce_config(self):
+        config = self.session.config['api']['mysql'].get('map_reduce', {})
+        return config.get('batch_size', 100), config.get('max_workers', 8)
+
+    def _fetch_var_groups(self, step, vars):
+        ''' Fetches data of FetchDataframeStep for every group of variables
+            Returns:
+                list of (frame, column_names), one for each group of `vars`
+        '''
+        if len(vars) == 0:
+            return []
+        query = step.query
+        conditions, var_columns = get_query_var_conditions(query.where)
+        is_mergeable = (
+            conditions is not None
+            and len(var_columns) > 0
+            and all(set(var_group) >= set(var_columns) for var_group in vars)
+            and query.limit is None
+            and query.offset is None
+            and query.group_by is None
+            and query.having is None
+            and query.distinct is False
+            and all(isinstance(target, (Star, Identifier)) for target in query.targets)
+        )
+        if is_mergeable:
+            result = self._fetch_var_groups_merged(step, vars, conditions, var_columns)
+            if result is not None:
+                return result
+        return self._fetch_var_groups_parallel(step, vars)
+
+    def _fetch_var_groups_merged(self, step, vars, conditions, var_columns):
+        ''' Fetches data for groups of variables by chunks: one query with condition for all groups of
+            the chunk, rows of the result are split back to groups by values of variables columns.
+            Values are compared in normalized form (see normalize_var_value), because the database may
+            return them in other type than type of variables. If some groups got no rows while the query
+            returned rows, rows of those groups may be not recognised, so they are fetched by separate queries.
+            Returns None if variables columns are not in the result.
+        '''
+        batch_size, _ = self._get_map_reduce_config()
+        var_names = list(var_columns.keys())
+        result = []
+        for chunk_start in range(0, len(vars), batch_size):
+            chunk = vars[chunk_start:chunk_start + batch_size]
+            # key of the group -> positions of groups in the chunk
+            groups = {}
+            for i, var_group in enumerate(chunk):
+                key = tuple(var_group[name] for name in var_names)
+                groups.setdefault(key, []).append(i)
+            # NULL is not equal to anything, so such groups are always empty
+            keys = [key for key in groups if not any(normalize_var_value(value) is None for value in key)]
+
+            rows_by_group = [[] for _ in chunk]
+            frame, column_names = None, None
+            if len(keys) > 0:
+                query = copy.deepcopy(step.query)
+                query.where = join_and_conditions(conditions + [
+                    make_var_groups_condition(var_columns, [dict(zip(var_names, key)) for key in keys])
+                ])
+                frame, column_names = self._fetch_frame(step.integration, query)
+
+                key_positions = []
+                for name in var_names:
+                    column_name = get_column_in_case(column_names, var_columns[name].parts[-1])
+                    if column_name is None:
+                        return None
+                    key_positions.append(column_names.index(column_name))
+
+                groups_normalized = {}
+                # the database may compare strings case-insensitive
+                groups_lower = {}
+                for key in keys:
+                    groups_normalized.setdefault(normalize_var_key(key), []).extend(groups[key])
+                    groups_lower.setdefault(normalize_var_key(key, lower=True), []).extend(groups[key])
+
+                key_values = zip(*[frame[i].tolist() for i in key_positions])
+                for row_num, key in enumerate(key_values):
+                    positions = groups_normalized.get(normalize_var_key(key))
+                    if positions is None:
+                        positions = groups_lower.get(normalize_var_key(key, lower=True), [])
+                    for i in positions:
+                        rows_by_group[i].append(row_num)
+
+            chunk_result = []
+            for rows in rows_by_group:
+                if frame is None:
+                    chunk_result.append((make_frame([], []), []))
+                else:
+                    chunk_result.append((frame.iloc[rows], column_names))
+
+            if frame is not None and len(frame) > 0:
+                missed = [key for key in keys if len(rows_by_group[groups[key][0]]) == 0]
+                if len(missed) > 0:
+                    fetched = self._fetch_var_groups_parallel(step, [chunk[groups[key][0]] for key in missed])
+                    for key, group_result in zip(missed, fetched):
+                        for i in groups[key]:
+                            chunk_result[i] = group_result
+            result.extend(chunk_result)
+        return result
+
+    def _fetch_var_groups_parallel(self, step, vars):
+        ''' Fetches data for each group of variables by separate query, queries are executed in parallel '''
+        _, max_workers = self._get_map_reduce_config()
+
+        def fetch(var_group):
+            query = copy.deepcopy(step.query)
+            markQueryVar(query.where)
+            for name, value in var_group.items():
+                replaceQueryVar(query.where, value, name)
+            return self._fetch_frame(step.integration, query)
+
+        if len(vars) == 1 or max_workers <= 1:
+            return [fetch(var_group) for var_group in vars]
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(vars))) as executor:
+            return list(executor.map(fetch, vars))
 
     def _multiple_steps_reduce(self, step, vars):
         if step.reduce != 'union':
             raise SqlApiException(f'Unknown MultipleSteps type: {step.reduce}')
 
-        data = {
-            'values': [],
-            'columns': {},
-            'tables': []
-        }
-
         for substep in step.steps:
             if isinstance(substep, FetchDataframeStep) is False:
                 raise Exception(f'Wrong step type for MultipleSteps: {step}')
-            markQueryVar(substep.query.where)
 
-        for name, value in vars.items():
-            for substep in step.steps:
-                replaceQueryVar(substep.query.where, value, name)
-            sub_data = self._multiple_steps(step)
-            join_query_data(data, sub_data)
+        substeps_data = [self._fetch_var_groups(substep, vars) for substep in step.steps]
+
+        parts = []
+        for i in range(len(vars)):
+            for substep, substep_data in zip(step.steps, substeps_data):
+                table_alias = get_table_alias(substep.query.from_table, self.database)
+                frame, column_names = substep_data[i]
+                parts.append(self._make_fetched_data(table_alias, frame, column_names))
+
+        return concat_query_data(parts)
+
+    def _resolve_join_column(self, identifier, sides):
+        ''' Finds frame column referenced by identifier of join condition
+            Args:
+                identifier: Identifier
+                sides: list of (frame alias, step data)
+            Returns:
+                Identifier: reference to the column of the registered frame
+        '''
+        column_name = identifier.parts[-1]
+        table_ref = '.'.join(identifier.parts[:-1]).lower()
+        found = []
+        for frame_alias, data in sides:
+            for i, (table_name, column) in enumerate(data['keys']):
+                if column[0] == '__mindsdb_row_id' or (column[1] or column[0]).lower() != column_name.lower():
+                    continue
+                if table_ref != '' and table_ref not in (
+                    str(table_name[2]).lower(),
+                    str(table_name[1]).lower(),
+                    f'{table_name[0]}.{table_name[1]}'.lower()
+                ):
+                    continue
+                found.append(Identifier(parts=[frame_alias, f'{frame_alias}{i}']))
+        if len(found) == 0:
+            raise Exception(f'Can not find column for join condition: {identifier}')
+        if len(found) > 1:
+            raise Exception(f'Column of join condition is ambiguous: {identifier}')
+        return found[0]
+
+    def _make_join_condition(self, condition, sides):
+        if isinstance(condition, Identifier):
+            return self._resolve_join_column(condition, sides)
+        if isinstance(condition, (BinaryOperation, UnaryOperation, Operation)):
+            condition = copy.copy(condition)
+            condition.args = [self._make_join_condition(arg, sides) for arg in condition.args]
+        return condition
+
+    def _join_step(self, step, left_data, right_data):
+        ''' Joins data of two steps in the duckdb connection of the session.
+            Frames are registered in duckdb as is, and the result stays columnar.
+            If there is no join condition, rows are joined by __mindsdb_row_id: it is the case
+            of joining table with predictor, where n-th row of predictor result belongs to n-th row of the table.
+        '''
+        join_type = step.query.join_type.upper()
+        condition = step.query.condition
+        if len(set(left_data['tables']) & set(right_data['tables'])) > 0:
+            raise Exception('At this moment supported only JOIN of different tables')
+
+        if condition is None:
+            if join_type not in ('LEFT JOIN', 'JOIN'):
+                raise Exception('At this moment supported only JOIN and LEFT JOIN')
+            if len(left_data['tables']) != 1 or len(right_data['tables']) != 1:
+                raise Exception('At this moment supported only JOIN of two different tables')
+            left_row_id = left_data['keys'].index(
+                (left_data['tables'][0], ('__mindsdb_row_id', '__mindsdb_row_id'))
+            )
+            right_row_id = right_data['keys'].index(
+                (right_data['tables'][0], ('__mindsdb_row_id', '__mindsdb_row_id'))
+            )
+            join_sql = f'FULL JOIN {{b_name}} AS tb ON ta.ta{left_row_id} = tb.tb{right_row_id}'
+        else:
+            if join_type not in ('JOIN', 'INNER JOIN', 'LEFT JOIN', 'RIGHT JOIN', 'FULL JOIN'):
+                raise Exception(f'Join type is not supported: {join_type}')
+            condition = self._make_join_condition(condition, [('ta', left_data), ('tb', right_data)])
+            join_sql = f'{join_type} {{b_name}} AS tb ON {condition.to_string()}'
+
+        df_a = to_join_frame(left_data['values'], 'ta')
+        df_b = to_join_frame(right_data['values'], 'tb')
+
+        self.join_counter += 1
+        a_name = f'join_{id(self)}_{self.join_counter}_a'
+        b_name = f'join_{id(self)}_{self.join_counter}_b'
+        con = self.session.get_duckdb_connection()
+        con.register(a_name, df_a)
+        con.register(b_name, df_b)
+        try:
+            resp_df = con.execute(
+                f'SELECT * FROM {a_name} AS ta ' + join_sql.format(b_name=b_name)
+            ).fetchdf()
+        finally:
+            con.unregister(a_name)
+            con.unregister(b_name)
 
-        return data
+        resp_df = get_frame_values(resp_df)
+        resp_df.columns = range(len(resp_df.columns))
+
+        columns = {}
+        for data_part in [left_data, right_data]:
+            for table_name, table_columns in data_part['columns'].items():
+                columns[table_name] = unique(columns.get(table_name, []) + list(table_columns))
+
+        return {
+            'values': resp_df,
+            'keys': left_data['keys'] + right_data['keys'],
+            'columns': columns,
+            'tables': unique(left_data['tables'] + right_data['tables'])
+        }
 
     def _process_query(self, sql):
         # self.query = parse_sql(sql, dialect='mindsdb')
 
-        integrations_names = self.datahub.get_datasources_names()
-        integrations_names.append('information_schema')
-        integrations_names.append('files')
-        integrations_names.append('views')
-
-        all_tables = get_all_tables(self.query)
+        self.integrations_names = get_integrations_names(self.datahub)
+        self.tables = get_all_tables(self.query)
 
         predictor_metadata = {}
-        predictors = db.session.query(db.Predictor).filter_by(company_id=self.session.company_id)
-        for model_name in set(all_tables):
-            for p in predictors:
-                if p.name == model_name:
-                    if isinstance(p.data, dict) and 'error' not in p.data:
-                        ts_settings = p.learn_args.get('timeseries_settings', {})
-                        if ts_settings.get('is_timeseries') is True:
-                            window = ts_settings.get('window')
-                            order_by = ts_settings.get('order_by')[0]
-                            group_by = ts_settings.get('group_by')
-                            if isinstance(group_by, list) is False and group_by is not None:
-                                group_by = [group_by]
-                            predictor_metadata[model_name] = {
-                                'timeseries': True,
-                                'window': window,
-                                'horizon': ts_settings.get('horizon'),
-                                'order_by_column': order_by,
-                                'group_by_columns': group_by
-                            }
-                        else:
-                            predictor_metadata[model_name] = {
-                                'timeseries': False
-                            }
-                        self.model_types.update(p.data.get('dtypes', {}))
+        self.predictors = get_predictor_catalog().get(self.session.company_id, self.tables)
+        for model_name, predictor in self.predictors.items():
+            predictor_metadata[model_name] = predictor['metadata']
+            self.model_types.update(predictor['dtypes'])
 
+        self._make_planner(predictor_metadata)
+
+    def _make_planner(self, predictor_metadata):
         self.planner = query_planner.QueryPlanner(
             self.query,
-            integrations=integrations_names,
+            integrations=self.integrations_names,
             predictor_namespace=self.mindsdb_database_name,
             predictor_metadata=predictor_metadata,
             default_namespace=self.database
@@ -373,14 +935,6 @@ class SQLQuery():
                 dn = self.datahub.get(self.mindsdb_database_name)
                 data, columns = dn.get_predictors(mindsdb_sql_struct)
                 table_name = ('mindsdb', 'predictors', 'predictors')
-                data = [
-                    {
-                        (key, key): value
-                        for key, value in row.items()
-                    }
-                    for row in data
-                ]
-                data = [{table_name: x} for x in data]
                 self.columns_list = [
                     Column(database='mindsdb',
                            table_name='predictors',
@@ -388,13 +942,11 @@ class SQLQuery():
                     for column_name in columns
                 ]
 
-                columns = [(column_name, column_name) for column_name in columns]
-
-                self.fetched_data = {
-                    'values': data,
-                    'columns': {table_name: columns},
-                    'tables': [table_name]
-                }
+                self.fetched_data = make_query_data(
+                    table_name,
+                    make_frame(data, columns),
+                    [(column_name, column_name) for column_name in columns]
+                )
                 return
 
             # is it query to 'commands'?
@@ -406,11 +958,11 @@ class SQLQuery():
                     or mindsdb_sql_struct.from_table.parts[0].lower() == 'mindsdb'
                 )
             ):
-                self.fetched_data = {
-                    'values': [],
-                    'columns': {('mindsdb', 'commands', 'commands'): [('command', 'command')]},
-                    'tables': [('mindsdb', 'commands', 'commands')]
-                }
+                self.fetched_data = make_query_data(
+                    ('mindsdb', 'commands', 'commands'),
+                    make_frame([], ['command']),
+                    [('command', 'command')]
+                )
                 self.columns_list = [Column(database='mindsdb', table_name='commands', name='command')]
                 return
 
@@ -426,16 +978,6 @@ class SQLQuery():
                 dn = self.datahub.get(self.mindsdb_database_name)
                 data, columns = dn.get_datasources(mindsdb_sql_struct)
                 table_name = ('mindsdb', 'datasources', 'datasources')
-                data = [
-                    {
-                        (key, key): value
-                        for key, value in row.items()
-                    }
-                    for row in data
-                ]
-
-                data = [{table_name: x} for x in data]
-
                 self.columns_list = [
                     Column(database='mindsdb',
                            table_name='datasources',
@@ -443,13 +985,11 @@ class SQLQuery():
                     for column_name in columns
                 ]
 
-                columns = [(column_name, column_name) for column_name in columns]
-
-                self.fetched_data = {
-                    'values': data,
-                    'columns': {table_name: columns},
-                    'tables': [table_name]
-                }
+                self.fetched_data = make_query_data(
+                    table_name,
+                    make_frame(data, columns),
+                    [(column_name, column_name) for column_name in columns]
+                )
                 return
 
         if prepare:
@@ -489,8 +1029,11 @@ class SQLQuery():
             # no need to execute
             return
 
+        if params is not None:
+            self._bind_parameters(params)
+
         steps_data = []
-        for step in self.planner.execute_steps(params):
+        for step in self.planner.execute_steps():
             data = self.execute_step(step, steps_data)
             step.set_result(data)
             steps_data.append(data)
@@ -504,70 +1047,32 @@ class SQLQuery():
 
         try:
             if self.outer_query is not None:
-                data = []
-                # +++
-                # ???
-                result = []
-                for row in steps_data[-1]:
-                    data_row = {}
-                    for column_record in self.columns_list:
-                        table_name = (column_record.database, column_record.table_name, column_record.table_alias)
-                        column_name = column_record.name
-                        data_row[column_record.alias or column_record.name] = row[table_name][column_name]
-                    result.append(data_row)
-                # ---
-                data = self._make_list_result_view(result)
-                df = pd.DataFrame(data)
+                df = self._make_frame_result_view(steps_data[-1])
                 result = query_df(df, self.outer_query)
+                if isinstance(result, pd.Series):
+                    result = result.to_frame()
 
-                try:
-                    self.columns_list = [
-                        Column(database='',
-                               table_name='',
-                               name=x)
-                        for x in result.columns
-                    ]
-                except Exception:
-                    self.columns_list = [
-                        Column(database='',
-                               table_name='',
-                               name=result.name)
-                    ]
-
-                # +++ make list result view
-                new_result = []
-                for row in result.to_dict(orient='records'):
-                    data_row = []
-                    for column_record in self.columns_list:
-                        column_name = column_record.alias or column_record.name
-                        data_row.append(row.get(column_name))
-                    new_result.append(data_row)
-                result = new_result
-                # ---
+                columns = list(result.columns)
+                self.columns_list = [
+                    Column(database='',
+                           table_name='',
+                           name=x)
+                    for x in columns
+                ]
 
-                self.fetched_data = result
+                frame = get_frame_values(result)
+                frame.columns = range(len(columns))
+                self.fetched_data = make_query_data(
+                    ('', '', ''),
+                    frame,
+                    [(x, x) for x in columns]
+                )
             else:
                 self.fetched_data = steps_data[-1]
         except Exception as e:
             raise SqlApiException("error in preparing result quiery step") from e
 
         try:
-            if hasattr(self, 'columns_list') is False:
-                self.columns_list = []
-                keys = []
-                for row in self.fetched_data:
-                    for table_key in row:
-                        for column_name in row[table_key]:
-                            key = (table_key + (column_name, column_name))
-                            if key not in keys:
-                                keys.append(key)
-                                self.columns_list.append(
-                                    Column(database=table_key[0],
-                                           table_name=table_key[1],
-                                           table_alias=table_key[2],
-                                           name=column_name)
-                                )
-
             # if there was no 'ProjectStep', then get columns list from last step:
             if self.columns_list is None:
                 self.columns_list = []
@@ -593,13 +1098,12 @@ class SQLQuery():
             columns = [
                 (column_name, column_name) for column_name in columns
             ]
-            data = {
-                'values': [],
-                'columns': {
+            data = empty_query_data(
+                columns={
                     (self.mindsdb_database_name, predictor_name, predictor_name): columns
                 },
-                'tables': [(self.mindsdb_database_name, predictor_name, predictor_name)]
-            }
+                tables=[(self.mindsdb_database_name, predictor_name, predictor_name)]
+            )
         elif type(step) == GetTableColumns:
             table = step.table
             dn = self.datahub.get(step.namespace)
@@ -615,13 +1119,12 @@ class SQLQuery():
 
             table_alias = (self.database, table, table)
 
-            data = {
-                'values': [],
-                'columns': {
+            data = empty_query_data(
+                columns={
                     table_alias: cols
                 },
-                'tables': [table_alias]
-            }
+                tables=[table_alias]
+            )
         elif type(step) == FetchDataframeStep:
             data = self._fetch_dataframe_step(step)
         elif type(step) == UnionStep:
@@ -636,35 +1139,21 @@ class SQLQuery():
                     raise Exception(f'Unknown MapReduceStep type: {step.reduce}')
 
                 step_data = steps_data[step.values.step_num]
-                vars = []
-                step_data_values = step_data['values']
-                for row in step_data_values:
-                    var_group = {}
-                    vars.append(var_group)
-                    for row_data in row.values():
-                        for name, value in row_data.items():
-                            if name[0] != '__mindsdb_row_id':
-                                var_group[name[1] or name[0]] = value
+                var_names = []
+                var_columns = []
+                for i, (_, column) in enumerate(step_data['keys']):
+                    if column[0] != '__mindsdb_row_id':
+                        var_names.append(column[1] or column[0])
+                        var_columns.append(step_data['values'][i].tolist())
+                vars = [dict(zip(var_names, row)) for row in zip(*var_columns)]
 
-                data = {
-                    'values': [],
-                    'columns': {},
-                    'tables': []
-                }
                 substep = step.step
                 if type(substep) == FetchDataframeStep:
-                    query = substep.query
-                    for var_group in vars:
-                        markQueryVar(query.where)
-                        for name, value in var_group.items():
-                            replaceQueryVar(query.where, value, name)
-                        sub_data = self._fetch_dataframe_step(substep)
-                        if len(data['columns']) == 0:
-                            data['columns'] = sub_data['columns']
-                        if len(data['tables']) == 0:
-                            data['tables'] = sub_data['tables']
-                        data['values'].extend(sub_data['values'])
-                        unmarkQueryVar(query.where)
+                    table_alias = get_table_alias(substep.query.from_table, self.database)
+                    data = concat_query_data([
+                        self._make_fetched_data(table_alias, frame, column_names)
+                        for frame, column_names in self._fetch_var_groups(substep, vars)
+                    ])
                 elif type(substep) == MultipleSteps:
                     data = self._multiple_steps_reduce(substep, vars)
                 else:
@@ -674,13 +1163,10 @@ class SQLQuery():
         elif type(step) == MultipleSteps:
             if step.reduce != 'union':
                 raise Exception(f"Only MultipleSteps with type = 'union' is supported. Got '{step.type}'")
-            data = None
-            for substep in step.steps:
-                subdata = self.execute_step(substep, steps_data)
-                if data is None:
-                    data = subdata
-                else:
-                    data['values'].extend(subdata['values'])
+            data = concat_query_data([
+                self.execute_step(substep, steps_data)
+                for substep in step.steps
+            ])
         elif type(step) == ApplyPredictorRowStep:
             try:
                 predictor = '.'.join(step.predictor.parts)
@@ -695,40 +1181,37 @@ class SQLQuery():
                     integration_type=self.session.integration_type
                 )
 
-                data = [{(key, key): value for key, value in row.items()} for row in data]
-
                 table_name = get_preditor_alias(step, self.database)
-                values = [{table_name: x} for x in data]
-                columns = {table_name: []}
-                if len(data) > 0:
-                    row = data[0]
-                    columns[table_name] = list(row.keys())
+                column_names = list(data[0].keys()) if len(data) > 0 else []
                 # TODO else
 
-                data = {
-                    'values': values,
-                    'columns': columns,
-                    'tables': [table_name]
-                }
+                data = make_query_data(
+                    table_name,
+                    make_frame(data, column_names),
+                    [(column_name, column_name) for column_name in column_names]
+                )
             except Exception as e:
                 raise SqlApiException(f'error in apply predictor row step: {e}') from e
         elif type(step) in (ApplyPredictorStep, ApplyTimeseriesPredictorStep):
             try:
                 dn = self.datahub.get(self.mindsdb_database_name)
                 predictor = '.'.join(step.predictor.parts)
-                where_data = []
-                for row in steps_data[step.dataframe.step_num]['values']:
-                    new_row = {}
-                    for table_name in row:
-                        keys_intersection = set(new_row) & set(row[table_name])
-                        if len(keys_intersection) > 0:
-                            raise Exception(
-                                f'The predictor got two identical keys from different datasources: {keys_intersection}'
-                            )
-                        new_row.update(row[table_name])
-                    where_data.append(new_row)
+                step_data = steps_data[step.dataframe.step_num]
+                columns = [column for _, column in step_data['keys']]
+                if len(set(columns)) != len(columns):
+                    keys_intersection = set(x for x in columns if columns.count(x) > 1)
+                    raise Exception(
+                        f'The predictor got two identical keys from different datasources: {keys_intersection}'
+                    )
 
-                where_data = [{key[1]: value for key, value in row.items()} for row in where_data]
+                # predictor takes rows, so it is the only place where rows are made of the frame
+                values = []
+                for i in range(len(columns)):
+                    values.append([
+                        str(value) if isinstance(value, datetime.date) else value
+                        for value in step_data['values'][i].tolist()
+                    ])
+                where_data = [dict(zip([x[1] for x in columns], row)) for row in zip(*values)]
 
                 is_timeseries = self.planner.predictor_metadata[predictor]['timeseries']
                 _mdb_make_predictions = None
@@ -741,11 +1224,6 @@ class SQLQuery():
                         if '__mdb_make_predictions' not in row:
                             row['__mdb_make_predictions'] = _mdb_make_predictions
 
-                for row in where_data:
-                    for key in row:
-                        if isinstance(row[key], datetime.date):
-                            row[key] = str(row[key])
-
                 data = dn.select(
                     table=predictor,
                     columns=None,
@@ -791,21 +1269,15 @@ class SQLQuery():
                 #             data = data[window_size:]
                 #             if len(data) > horizon and horizon > 1:
                 #                 data = data[:-horizon + 1]
-                data = [{(key, key): value for key, value in row.items()} for row in data]
-
                 table_name = get_preditor_alias(step, self.database)
-                values = [{table_name: x} for x in data]
-                columns = {table_name: []}
-                if len(data) > 0:
-                    row = data[0]
-                    columns[table_name] = list(row.keys())
+                column_names = list(data[0].keys()) if len(data) > 0 else []
                 # TODO else
 
-                data = {
-                    'values': values,
-                    'columns': columns,
-                    'tables': [table_name]
-                }
+                data = make_query_data(
+                    table_name,
+                    make_frame(data, column_names),
+                    [(column_name, column_name) for column_name in column_names]
+                )
             except Exception as e:
                 raise SqlApiException(f'error in apply predictor step: {e}') from e
         elif type(step) == JoinStep:
@@ -820,83 +1292,7 @@ class SQLQuery():
                 #     left_data = steps_data[step.right.step_num]
                 #     is_timeseries = True
 
-                if step.query.condition is not None:
-                    raise Exception('At this moment supported only JOIN without condition')
-                if step.query.join_type.upper() not in ('LEFT JOIN', 'JOIN'):
-                    raise Exception('At this moment supported only JOIN and LEFT JOIN')
-                if (
-                        len(left_data['tables']) != 1 or len(right_data['tables']) != 1
-                        or left_data['tables'][0] == right_data['tables'][0]
-                ):
-                    raise Exception('At this moment supported only JOIN of two different tables')
-
-                data = {
-                    'values': [],
-                    'columns': {},
-                    'tables': list(set(left_data['tables'] + right_data['tables']))
-                }
-
-                for data_part in [left_data, right_data]:
-                    for table_name in data_part['columns']:
-                        if table_name not in data['columns']:
-                            data['columns'][table_name] = data_part['columns'][table_name]
-                        else:
-                            data['columns'][table_name].extend(data_part['columns'][table_name])
-                for table_name in data['columns']:
-                    data['columns'][table_name] = list(set(data['columns'][table_name]))
-
-                left_key = left_data['tables'][0]
-                right_key = right_data['tables'][0]
-
-                left_columns_map = {}
-                left_columns_map_reverse = {}
-                for i, column_name in enumerate(left_data['columns'][left_key]):
-                    left_columns_map[f'a{i}'] = column_name
-                    left_columns_map_reverse[column_name] = f'a{i}'
-
-                right_columns_map = {}
-                right_columns_map_reverse = {}
-                for i, column_name in enumerate(right_data['columns'][right_key]):
-                    right_columns_map[f'b{i}'] = column_name
-                    right_columns_map_reverse[column_name] = f'b{i}'
-
-                left_df_data = []
-                for row in left_data['values']:
-                    row = row[left_key]
-                    left_df_data.append({left_columns_map_reverse[key]: value for key, value in row.items()})
-
-                right_df_data = []
-                for row in right_data['values']:
-                    row = row[right_key]
-                    right_df_data.append({right_columns_map_reverse[key]: value for key, value in row.items()})
-
-                df_a = pd.DataFrame(left_df_data)
-                df_b = pd.DataFrame(right_df_data)
-
-                a_name = f'a{round(time.time() * 1000)}'
-                b_name = f'b{round(time.time() * 1000)}'
-                con = duckdb.connect(database=':memory:')
-                con.register(a_name, df_a)
-                con.register(b_name, df_b)
-                resp_df = con.execute(f"""
-                    SELECT * FROM {a_name} as ta full join {b_name} as tb
-                    ON ta.{left_columns_map_reverse[('__mindsdb_row_id', '__mindsdb_row_id')]}
-                     = tb.{right_columns_map_reverse[('__mindsdb_row_id', '__mindsdb_row_id')]}
-                """).fetchdf()
-                con.unregister(a_name)
-                con.unregister(b_name)
-                con.close()
-                resp_df = resp_df.where(pd.notnull(resp_df), None)
-                resp_dict = resp_df.to_dict(orient='records')
-
-                for row in resp_dict:
-                    new_row = {left_key: {}, right_key: {}}
-                    for key, value in row.items():
-                        if key.startswith('a'):
-                            new_row[left_key][left_columns_map[key]] = value
-                        else:
-                            new_row[right_key][right_columns_map[key]] = value
-                    data['values'].append(new_row)
+                data = self._join_step(step, left_data, right_data)
 
                 # remove all records with empty data from predictor from join result
                 # otherwise there are emtpy records in the final result:
@@ -934,15 +1330,17 @@ class SQLQuery():
         elif type(step) == LimitOffsetStep:
             try:
                 step_data = steps_data[step.dataframe.step_num]
+                frame = step_data['values']
+                if isinstance(step.offset, Constant) and isinstance(step.offset.value, int):
+                    frame = frame.iloc[step.offset.value:]
+                if isinstance(step.limit, Constant) and isinstance(step.limit.value, int):
+                    frame = frame.iloc[:step.limit.value]
                 data = {
-                    'values': step_data['values'].copy(),
+                    'values': frame.reset_index(drop=True),
+                    'keys': step_data['keys'].copy(),
                     'columns': step_data['columns'].copy(),
                     'tables': step_data['tables'].copy()
                 }
-                if isinstance(step.offset, Constant) and isinstance(step.offset.value, int):
-                    data['values'] = data['values'][step.offset.value:]
-                if isinstance(step.limit, Constant) and isinstance(step.limit.value, int):
-                    data['values'] = data['values'][:step.limit.value]
             except Exception as e:
                 raise SqlApiException(f'error in limit offset step: {e}') from e
         elif type(step) == ProjectStep:
@@ -1037,9 +1435,11 @@ class SQLQuery():
                                 raise Exception(
                                     f'Can not find approproate column in data: {(column_name, column_alias)}')
 
-                            for row in step_data['values']:
-                                row[appropriate_table][(column_name, column_alias)] = row[appropriate_table][
-                                    columns_to_copy]
+                            positions = get_key_positions(step_data)
+                            if (appropriate_table, (column_name, column_alias)) not in positions:
+                                step_data['values'][len(step_data['keys'])] = step_data['values'][
+                                    positions[(appropriate_table, columns_to_copy)]]
+                                step_data['keys'].append((appropriate_table, (column_name, column_alias)))
 
                             columns_list.append(
                                 Column(database=appropriate_table[0],
@@ -1077,53 +1477,100 @@ class SQLQuery():
         result = op_fn(*args)
         return result
 
-    def _make_list_result_view(self, data):
-        if self.outer_query is not None:
-            return data['values']
+    def _get_result_columns(self, data):
+        positions = get_key_positions(data)
         result = []
-        for row in data['values']:
-            data_row = []
-            for column_record in self.columns_list:
-                table_name = (column_record.database, column_record.table_name, column_record.table_alias)
-                column_name = (column_record.name, column_record.alias)
-                if not table_name in row:
-                    # try without alias
-                    table_name = (table_name[0], table_name[1], None)
-
-                data_row.append(row[table_name][column_name])
-            result.append(data_row)
+        for column_record in self.columns_list:
+            table_name = (column_record.database, column_record.table_name, column_record.table_alias)
+            column_name = (column_record.name, column_record.alias)
+            if (table_name, column_name) not in positions:
+                # try without alias
+                table_name = (table_name[0], table_name[1], None)
+            result.append(data['values'][positions[(table_name, column_name)]])
         return result
 
+    def _make_list_result_view(self, data):
+        columns = self._get_result_columns(data)
+        self.columns_stats = [get_column_stats(column) for column in columns]
+        columns = [column.tolist() for column in columns]
+        if len(columns) == 0:
+            return [[] for _ in range(len(data['values']))]
+        return [list(row) for row in zip(*columns)]
+
+    def get_result_rows_count(self):
+        if self.fetched_data is None:
+            return 0
+        return len(self.fetched_data['values'])
+
+    def iter_result_rows(self, block_size=1000):
+        ''' Yields rows of the result in 'list' view. Rows are made from columns by blocks when
+            they are requested, so only the read part of the result is converted
+        '''
+        rows_count = self.get_result_rows_count()
+        if rows_count == 0:
+            return
+        columns = self._get_result_columns(self.fetched_data)
+        for start in range(0, rows_count, block_size):
+            if len(columns) == 0:
+                for _ in range(min(block_size, rows_count - start)):
+                    yield []
+                continue
+            block = [column.iloc[start:start + block_size].tolist() for column in columns]
+            for row in zip(*block):
+                yield list(row)
+
+    def _make_frame_result_view(self, data):
+        columns = self._get_result_columns(data)
+        return pd.DataFrame({
+            column_record.alias or column_record.name: column.values
+            for column_record, column in zip(self.columns_list, columns)
+        })
+
     def _make_dict_result_view(self, data):
-        result = []
-        for row in data['values']:
-            data_row = {}
-            for table_name in row:
-                data_row.update(row[table_name])
-            result.append(data_row)
-        return result
+        names = [column for _, column in data['keys']]
+        columns = [data['values'][i].tolist() for i in range(len(names))]
+        return [dict(zip(names, row)) for row in zip(*columns)]
+
+    def collect_columns_stats(self):
+        ''' Stats of the result columns, if they were not collected when the result view was made '''
+        if self.columns_stats is None and self.fetched_data is not None:
+            columns = self._get_result_columns(self.fetched_data)
+            self.columns_stats = [get_column_stats(column) for column in columns]
+        return self.columns_stats
 
     @property
     def columns(self):
-        return self.to_mysql_columns(self.columns_list)
+        return self.to_mysql_columns(self.columns_list, self.columns_stats)
 
-    def to_mysql_columns(self, columns_list):
+    @property
+    def binary_columns(self):
+        return self.to_mysql_columns(self.columns_list, self.columns_stats, binary=True)
+
+    def to_mysql_columns(self, columns_list, columns_stats=None, binary=False):
+        ''' Descriptions of columns for the client. Type of the column is taken from dtype of the predictor.
+            In binary protocol (binary=True), if stats of the result are collected, the type is checked by
+            types of values (or found by them, for columns which are not predictor's), so the values
+            can be encoded by the type.
+        '''
         result = []
-        for column_record in columns_list:
+        for i, column_record in enumerate(columns_list):
             try:
                 field_type = self.model_types.get(column_record.name)
             except Exception:
                 field_type = column_record.type
 
-            column_type = TYPES.MYSQL_TYPE_VAR_STRING
-            if field_type == dtype.date:
-                column_type = TYPES.MYSQL_TYPE_DATE
-            elif field_type == dtype.datetime:
-                column_type = TYPES.MYSQL_TYPE_DATETIME
-            elif field_type == dtype.float:
-                column_type = TYPES.MYSQL_TYPE_DOUBLE
-            elif field_type == dtype.integer:
-                column_type = TYPES.MYSQL_TYPE_LONG
+            stats = columns_stats[i] if columns_stats is not None else None
+            if binary:
+                column_type = MODEL_DTYPES_MAP.get(field_type)
+                if stats is not None:
+                    if column_type is None:
+                        column_type = get_column_type(stats['value_types'])
+                    elif is_type_compatible(column_type, stats['value_types']) is False:
+                        column_type = get_column_type(stats['value_types'])
+            else:
+                column_type = MODEL_TEXT_DTYPES_MAP.get(field_type)
+            if column_type is None:
+                column_type = TYPES.MYSQL_TYPE_VAR_STRING
 
             result.append({
                 'database': column_record.database or self.database,
@@ -1131,8 +1578,8 @@ class SQLQuery():
                 'table_name': column_record.table_name,
                 'name': column_record.name,
                 'alias': column_record.alias or column_record.name,
-                # NOTE all work with text-type, but if/when wanted change types to real,
-                # it will need to check all types casts in BinaryResultsetRowPacket
                 'type': column_type
             })
+            if stats is not None:
+                result[-1]['stats'] = stats
         return result
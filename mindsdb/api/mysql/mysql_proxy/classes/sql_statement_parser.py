@@ -1,4 +1,5 @@
 import re
+from functools import lru_cache
 
 from pyparsing import (
     CaselessKeyword,
@@ -38,6 +39,7 @@ class SqlStatementParser():
         return self._struct
 
     @staticmethod
+    @lru_cache(maxsize=1024)
     def clear_sql(sql: str) -> str:
         ''' remove comments from sql
             TODO current implementation is not remove /**/ from mid of string:
@@ -9,9 +9,14 @@
  *******************************************************
 """
 
+from collections import OrderedDict
+
+import duckdb
+
 from mindsdb.interfaces.ai_table.ai_table import AITableStore
 from mindsdb.api.mysql.mysql_proxy.datahub import init_datahub
-from mindsdb.api.mysql.mysql_proxy.utilities import log
+from mindsdb.api.mysql.mysql_proxy.classes.plan_cache import PlanCache
+from mindsdb.api.mysql.mysql_proxy.utilities import log, ErUnknownStmtHandler
 from mindsdb.utilities.config import Config
 from mindsdb.utilities.with_kwargs_wrapper import WithKWArgsWrapper
 
@@ -60,25 +65,59 @@ class SessionController():
 
         self.datahub = init_datahub(self)
 
-        self.prepared_stmts = {}
+        stmt_config = self.config['api']['mysql'].get('prepared_statements', {})
+        # least recently used statement is closed if there are too many of them
+        self.max_prepared_stmts = stmt_config.get('max_per_session', 1024)
+        self.prepared_stmts = OrderedDict()
+        self._next_stmt_id = 1
+        self.plan_cache = PlanCache(stmt_config.get('session_plan_cache_size', 128))
         self.packet_sequence_number = 0
+        self._duckdb_connection = None
+
+    def get_duckdb_connection(self):
+        ''' In-memory duckdb connection used to join data of queries of the session.
+            It is created on first use and reused by all following queries.
+        '''
+        if self._duckdb_connection is None:
+            self._duckdb_connection = duckdb.connect(database=':memory:')
+        return self._duckdb_connection
+
+    def close(self):
+        ''' Frees resources of the session when its connection is closed '''
+        if self._duckdb_connection is not None:
+            self._duckdb_connection.close()
+            self._duckdb_connection = None
 
     def inc_packet_sequence_number(self):
         self.packet_sequence_number = (self.packet_sequence_number + 1) % 256
 
     def register_stmt(self, statement):
-        i = 1
-        while i in self.prepared_stmts and i < 100:
-            i = i + 1
-        if i == 100:
-            raise Exception('Too many unclosed queries')
+        if len(self.prepared_stmts) >= self.max_prepared_stmts:
+            stmt_id, _ = self.prepared_stmts.popitem(last=False)
+            log.warning(f'Too many prepared statements, statement {stmt_id} is closed')
 
-        self.prepared_stmts[i] = dict(
+        # ids are int<4>, id of still open statement is not reused
+        while self._next_stmt_id in self.prepared_stmts:
+            self._next_stmt_id = self._next_stmt_id % 0xffffffff + 1
+        stmt_id = self._next_stmt_id
+        self._next_stmt_id = self._next_stmt_id % 0xffffffff + 1
+
+        self.prepared_stmts[stmt_id] = dict(
             type=None,
             statement=statement,
+            plan=statement.get_plan(),
+            cursor=None,
+            rows_count=0,
             fetched=0
         )
-        return i
+        return stmt_id
+
+    def get_stmt(self, stmt_id):
+        prepared_stmt = self.prepared_stmts.get(stmt_id)
+        if prepared_stmt is None:
+            raise ErUnknownStmtHandler(f'Unknown prepared statement handler ({stmt_id}) given')
+        self.prepared_stmts.move_to_end(stmt_id)
+        return prepared_stmt
 
     def unregister_stmt(self, stmt_id):
-        del self.prepared_stmts[stmt_id]
+        self.prepared_stmts.pop(stmt_id, None)
@@ -115,9 +115,12 @@ class CommandPacket(Packet):
 
             self.parameters = []
 
-            prepared_stmt = self.session.prepared_stmts[self.stmt_id.value]
+            prepared_stmt = self.session.prepared_stmts.get(self.stmt_id.value)
 
-            if prepared_stmt['type'] == 'select':
+            if prepared_stmt is None:
+                # error about unknown statement is sent when the command is answered
+                pass
+            elif prepared_stmt['type'] == 'select':
                 num_params = len(prepared_stmt['statement'].parameters)
 
                 self.read_params(buffer, num_params)
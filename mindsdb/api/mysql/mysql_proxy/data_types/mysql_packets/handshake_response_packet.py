@@ -47,6 +47,7 @@ class HandshakeResponsePacket(Packet):
         self.charset = Datum('int<1>')
 
         self.client_auth_plugin = Datum('string<NUL>')
+        self.zstd_compression_level = Datum('int<1>')
 
         buffer = body
 
@@ -83,10 +84,23 @@ class HandshakeResponsePacket(Packet):
             if capabilities.PLUGIN_AUTH:
                 buffer = self.client_auth_plugin.setFromBuff(buffer)
 
-            # at the end is CLIENT_CONNECT_ATTRS, but we dont use it and dont parse
+            # CLIENT_CONNECT_ATTRS are not used, but they are before the compression level
+            if capabilities.CONNECT_ATTRS and len(buffer) > 0:
+                attrs_length, buffer = self._read_lenenc_int(buffer)
+                buffer = buffer[attrs_length:]
+            if capabilities.ZSTD_COMPRESSION_ALGORITHM and len(buffer) > 0:
+                buffer = self.zstd_compression_level.setFromBuff(buffer)
 
         self.session.username = self.username.value
 
+    @staticmethod
+    def _read_lenenc_int(buffer):
+        first = buffer[0]
+        if first < 0xfb:
+            return first, buffer[1:]
+        size = {0xfc: 2, 0xfd: 3, 0xfe: 8}[first]
+        return int.from_bytes(buffer[1:1 + size], 'little'), buffer[1 + size:]
+
     def __str__(self):
         return str({
             'header': {'length': self.length, 'seq': self.seq},
@@ -0,0 +1,356 @@
+"""
+*******************************************************
+ * Copyright (C) 2017 MindsDB Inc. <copyright@mindsdb.com>
+ *
+ * This file is part of MindsDB Server.
+ *
+ * MindsDB Server can not be copied and/or distributed without the express
+ * permission of MindsDB Inc
+ *******************************************************
+"""
+
+import struct
+import decimal
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from mindsdb.api.mysql.mysql_proxy.data_types.mysql_datum import Datum
+from mindsdb.api.mysql.mysql_proxy.libs.constants.mysql import NULL_VALUE, TYPES
+
+# single byte values, used as sequence numbers and as length prefix of strings shorter than 251 bytes
+_BYTES = [bytes([i]) for i in range(256)]
+
+
+def _encode_str(value):
+    return value.encode('utf-8')
+
+
+def _encode_ascii(value):
+    # str() of numbers contains only ascii chars
+    return str(value).encode('ascii')
+
+
+def _encode_any(value):
+    return str(value).encode('utf-8')
+
+
+_CONVERTERS = {
+    str: _encode_str,
+    int: _encode_ascii,
+    float: _encode_ascii
+}
+
+
+def get_converter(values):
+    ''' Returns function which converts values of the column to bytes, same as str(value) does.
+        It is chosen by type of the first not NULL value, and checked for each value.
+    '''
+    for value in values:
+        if value is not None:
+            converter = _CONVERTERS.get(type(value))
+            if converter is None:
+                return _encode_any
+            value_type = type(value)
+            return lambda x: converter(x) if type(x) is value_type else _encode_any(x)
+    return _encode_any
+
+
+def encode_text_column(values):
+    ''' Encodes values of the column as 'string<lenenc>' datums, NULL as NULL_VALUE
+        Args:
+            values: list
+        Returns:
+            list of bytes
+    '''
+    converter = get_converter(values)
+    prefix = _BYTES
+    result = []
+    for value in values:
+        if value is None:
+            result.append(NULL_VALUE)
+            continue
+        value = converter(value)
+        length = len(value)
+        if length < 251:
+            result.append(prefix[length] + value)
+        else:
+            # long values are rare, so exactly the same encoding as Datum does is used
+            result.append(Datum('string<lenenc>', value.decode('utf-8')).toStringPacket())
+    return result
+
+
+def encode_text_rows(columns, sequence_id):
+    ''' Encodes block of rows as ResultsetRowPacket packets, in one pass.
+        Output is byte-identical to the sequence of ResultsetRowPacket.accum() for each row.
+        Args:
+            columns: list of lists, values of each column of the block
+            sequence_id: int, sequence number of the first packet
+        Returns:
+            bytes: packets of all rows
+            int: sequence number of the packet after the last row
+    '''
+    if len(columns) == 0:
+        return b'', sequence_id
+    encoded = [encode_text_column(values) for values in columns]
+    packets = []
+    pack_length = struct.Struct('<i').pack
+    for row in zip(*encoded):
+        body = b''.join(row)
+        packets.append(pack_length(len(body))[:3] + _BYTES[sequence_id] + body)
+        sequence_id = (sequence_id + 1) % 256
+    return b''.join(packets), sequence_id
+
+
+def _encode_lenenc(value):
+    if isinstance(value, bytes) is False:
+        value = str(value).encode('utf-8')
+    length = len(value)
+    if length < 251:
+        return _BYTES[length] + value
+    return Datum('string<lenenc>', value.decode('utf-8', errors='replace')).toStringPacket()
+
+
+_pack_date = struct.Struct('<BHBB').pack
+_pack_datetime = struct.Struct('<BHBBBBB').pack
+_pack_datetime_micro = struct.Struct('<BHBBBBBI').pack
+_pack_time = struct.Struct('<BBIBBB').pack
+_pack_time_micro = struct.Struct('<BBIBBBI').pack
+
+
+def _to_date(value):
+    if isinstance(value, datetime.date):
+        return value
+    # dates of datasources often are strings
+    try:
+        value = pd.Timestamp(value)
+    except Exception:
+        return None
+    return None if value is pd.NaT else value
+
+
+def _encode_date(value):
+    value = _to_date(value)
+    if value is None:
+        # value is not a date, it is sent as NULL
+        return None
+    return _pack_date(4, value.year, value.month, value.day)
+
+
+def _encode_datetime(value):
+    value = _to_date(value)
+    if value is None:
+        return None
+    if isinstance(value, datetime.datetime) is False:
+        return _pack_date(4, value.year, value.month, value.day)
+    if value.microsecond > 0:
+        return _pack_datetime_micro(
+            11, value.year, value.month, value.day,
+            value.hour, value.minute, value.second, value.microsecond
+        )
+    if value.hour == 0 and value.minute == 0 and value.second == 0:
+        return _pack_date(4, value.year, value.month, value.day)
+    return _pack_datetime(7, value.year, value.month, value.day, value.hour, value.minute, value.second)
+
+
+def _encode_time(value):
+    if isinstance(value, datetime.timedelta):
+        is_negative = 1 if value < datetime.timedelta(0) else 0
+        value = abs(value)
+        days = value.days
+        hours, seconds = divmod(value.seconds, 3600)
+        minutes, seconds = divmod(seconds, 60)
+        microseconds = value.microseconds
+    else:
+        is_negative = 0
+        days = 0
+        hours, minutes, seconds, microseconds = value.hour, value.minute, value.second, value.microsecond
+    if microseconds > 0:
+        return _pack_time_micro(12, is_negative, days, hours, minutes, seconds, microseconds)
+    if days == 0 and hours == 0 and minutes == 0 and seconds == 0:
+        return _BYTES[0]
+    return _pack_time(8, is_negative, days, hours, minutes, seconds)
+
+
+_BINARY_ENCODERS = {
+    TYPES.MYSQL_TYPE_TINY: struct.Struct('<b').pack,
+    TYPES.MYSQL_TYPE_SHORT: struct.Struct('<h').pack,
+    TYPES.MYSQL_TYPE_YEAR: struct.Struct('<h').pack,
+    TYPES.MYSQL_TYPE_LONG: struct.Struct('<i').pack,
+    TYPES.MYSQL_TYPE_INT24: struct.Struct('<i').pack,
+    TYPES.MYSQL_TYPE_LONGLONG: struct.Struct('<q').pack,
+    TYPES.MYSQL_TYPE_FLOAT: struct.Struct('<f').pack,
+    TYPES.MYSQL_TYPE_DOUBLE: struct.Struct('<d').pack,
+    TYPES.MYSQL_TYPE_DATE: _encode_date,
+    TYPES.MYSQL_TYPE_DATETIME: _encode_datetime,
+    TYPES.MYSQL_TYPE_TIMESTAMP: _encode_datetime,
+    TYPES.MYSQL_TYPE_TIME: _encode_time
+}
+
+# python types of values which can be sent in the column of mysql type,
+# both as str(value) in text protocol and by the encoder in binary protocol
+_integer_types = (int, np.integer)
+_number_types = (int, float, np.integer, np.floating)
+_date_types = (datetime.date, str)
+_COMPATIBLE_TYPES = {
+    TYPES.MYSQL_TYPE_LONG: _integer_types,
+    TYPES.MYSQL_TYPE_LONGLONG: _integer_types,
+    TYPES.MYSQL_TYPE_DOUBLE: _number_types,
+    TYPES.MYSQL_TYPE_FLOAT: _number_types,
+    TYPES.MYSQL_TYPE_NEWDECIMAL: _number_types + (decimal.Decimal,),
+    TYPES.MYSQL_TYPE_DATE: _date_types,
+    TYPES.MYSQL_TYPE_DATETIME: _date_types,
+    TYPES.MYSQL_TYPE_TIMESTAMP: _date_types,
+    # str(timedelta) is not valid mysql time
+    TYPES.MYSQL_TYPE_TIME: (datetime.time,)
+}
+
+
+def get_binary_encoder(column_type):
+    ''' Returns function which encodes not NULL value of the column for binary resultset row.
+        Other types (strings, blobs, decimals) are sent as 'string<lenenc>'.
+        Encoder of dates returns None if value can not be sent as date, such value is sent as NULL.
+    '''
+    return _BINARY_ENCODERS.get(column_type, _encode_lenenc)
+
+
+def is_type_compatible(column_type, value_types):
+    ''' Checks that values of python types can be sent in the column of mysql type
+        Args:
+            column_type: int
+            value_types: set of types of not NULL values
+        Returns:
+            bool
+    '''
+    compatible_types = _COMPATIBLE_TYPES.get(column_type)
+    if compatible_types is None:
+        return True
+    for value_type in value_types:
+        # str(True) is not a number
+        if issubclass(value_type, (bool, np.bool_)) or not issubclass(value_type, compatible_types):
+            return False
+    return True
+
+
+def get_column_type(value_types):
+    ''' Mysql type of the column by python types of its not NULL values '''
+    if len(value_types) == 0:
+        return TYPES.MYSQL_TYPE_VAR_STRING
+    if all(issubclass(x, datetime.datetime) for x in value_types):
+        return TYPES.MYSQL_TYPE_DATETIME
+    if all(issubclass(x, datetime.date) and not issubclass(x, datetime.datetime) for x in value_types):
+        return TYPES.MYSQL_TYPE_DATE
+    for column_type in (
+        TYPES.MYSQL_TYPE_LONGLONG,
+        TYPES.MYSQL_TYPE_DOUBLE,
+        TYPES.MYSQL_TYPE_NEWDECIMAL,
+        TYPES.MYSQL_TYPE_TIME
+    ):
+        if is_type_compatible(column_type, value_types):
+            return column_type
+    return TYPES.MYSQL_TYPE_VAR_STRING
+
+
+def get_null_masks(columns):
+    ''' NULL flags of values of each column, NaN and NaT are NULL too '''
+    return [pd.isnull(np.array(values, dtype=object)) for values in columns]
+
+
+def make_null_bitmaps(null_masks, rows_count, offset=2):
+    ''' Builds NULL-bitmaps for all rows of the block at once
+        Args:
+            null_masks: list of arrays of bool, NULL flags of values of each column
+            rows_count: int
+            offset: int, 2 for binary resultset row, 0 for COM_STMT_EXECUTE parameters
+        Returns:
+            list of bytes, bitmap of each row
+    '''
+    width = (len(null_masks) + offset + 7) // 8
+    bits = np.zeros((rows_count, width * 8), dtype=bool)
+    for i, mask in enumerate(null_masks):
+        bits[:, offset + i] = mask
+    data = np.packbits(bits, axis=1, bitorder='little').tobytes()
+    return [data[i:i + width] for i in range(0, rows_count * width, width)]
+
+
+def encode_binary_column(column_type, values, null_mask):
+    ''' Encodes values of the column for binary resultset rows, NULL values are not sent.
+        Values which can not be encoded as the type of the column are marked in `null_mask` as NULL.
+    '''
+    encoder = get_binary_encoder(column_type)
+    result = []
+    for i, (value, is_null) in enumerate(zip(values, null_mask.tolist())):
+        if is_null is False:
+            value = encoder(value)
+            if value is not None:
+                result.append(value)
+                continue
+            null_mask[i] = True
+        result.append(b'')
+    return result
+
+
+def encode_binary_rows(columns, column_types, sequence_id):
+    ''' Encodes block of rows as BinaryResultsetRowPacket packets, in one pass.
+        Args:
+            columns: list of lists, values of each column of the block
+            column_types: list of int, mysql types of the columns
+            sequence_id: int, sequence number of the first packet
+        Returns:
+            bytes: packets of all rows
+            int: sequence number of the packet after the last row
+    '''
+    if len(columns) == 0:
+        return b'', sequence_id
+    null_masks = get_null_masks(columns)
+    encoded = [
+        encode_binary_column(column_type, values, null_mask)
+        for column_type, values, null_mask in zip(column_types, columns, null_masks)
+    ]
+    bitmaps = make_null_bitmaps(null_masks, len(columns[0]))
+    packets = []
+    pack_length = struct.Struct('<i').pack
+    header = _BYTES[0]
+    for bitmap, row in zip(bitmaps, zip(*encoded)):
+        body = header + bitmap + b''.join(row)
+        packets.append(pack_length(len(body))[:3] + _BYTES[sequence_id] + body)
+        sequence_id = (sequence_id + 1) % 256
+    return b''.join(packets), sequence_id
+
+
+def benchmark(rows_count=100000):
+    ''' Compares speed of encoding with ResultsetRowPacket, run: python -m <this module> '''
+    import time
+    import types
+    import datetime
+    from mindsdb.api.mysql.mysql_proxy.data_types.mysql_packets.resultset_row_package import ResultsetRowPacket
+
+    log = types.SimpleNamespace(debug=lambda *args: None)
+    session = types.SimpleNamespace(logging=log, packet_sequence_number=0)
+    rows = [
+        [i, i * 0.5, f'name {i}', None if i % 3 == 0 else 'text' * (i % 100), datetime.date(2020, 1, 1)]
+        for i in range(rows_count)
+    ]
+
+    start = time.time()
+    old = []
+    for i, row in enumerate(rows):
+        session.packet_sequence_number = i % 256
+        old.append(ResultsetRowPacket(session=session, data=row).accum())
+    old = b''.join(old)
+    old_time = time.time() - start
+
+    start = time.time()
+    new, _ = encode_text_rows([list(x) for x in zip(*rows)], 0)
+    new_time = time.time() - start
+
+    assert old == new, 'encoded rows are different'
+    print(f'rows: {rows_count}')
+    print(f'ResultsetRowPacket: {old_time:.3f}s')
+    print(f'encode_text_rows: {new_time:.3f}s ({old_time / new_time:.1f}x)')
+
+
+# only run the benchmark if this file is called directly
+if __name__ == "__main__":
+    benchmark()
@@ -1,5 +1,4 @@
 import json
-import copy
 from datetime import datetime
 
 from lightwood.api import dtype
@@ -15,6 +14,8 @@ from mindsdb.integrations.mariadb.mariadb import Mariadb
 from mindsdb.integrations.mysql.mysql import MySQL
 from mindsdb.integrations.mssql.mssql import MSSQL
 from mindsdb.utilities.functions import cast_row_types
+from mindsdb.api.mysql.mysql_proxy.datahub.datanodes.timeseries_horizon import expand_horizon
+from mindsdb.interfaces.model.prediction_frame import PREDICTION_FRAME_COLUMNS
 from mindsdb.utilities.config import Config
 
 
@@ -286,114 +287,50 @@ class MindsDBDataNode(DataNode):
             else:
                 original_target_values[col + '_original'] = [None]
 
-        pred_dicts, explanations = self.model_interface.predict(table, where_data, 'dict&explain')
-
-        # transform predictions to more convenient view
-        new_pred_dicts = []
-        for row in pred_dicts:
-            new_row = {}
-            for key in row:
-                new_row.update(row[key])
-                new_row[key] = new_row['predicted_value']
-            del new_row['predicted_value']
-            new_pred_dicts.append(new_row)
-        pred_dicts = new_pred_dicts
-
+        # prediction is made by columns: input columns, predicted value and its explanation
+        predictions = self.model_interface.predict(table, where_data, 'frame')
+        target = predicted_columns[0]
+        explain_columns = {
+            name: f'{target}_{suffix}' for name, suffix in PREDICTION_FRAME_COLUMNS.items()
+            if f'{target}_{suffix}' in predictions.columns
+        }
         timeseries_settings = model['problem_definition']['timeseries_settings']
 
         if timeseries_settings['is_timeseries'] is True:
             __mdb_make_predictions = set([row.get('__mdb_make_predictions', True) for row in where_data]) == {True}
 
-            predict = model['predict']
             group_by = timeseries_settings['group_by'] or []
             order_by_column = timeseries_settings['order_by'][0]
             horizon = timeseries_settings['horizon']
 
-            groups = set()
-            for row in pred_dicts:
-                groups.add(
-                    tuple([row[x] for x in group_by])
-                )
+            predictions = expand_horizon(
+                predictions, target, group_by, order_by_column, horizon, __mdb_make_predictions
+            )
 
-            # split rows by groups
-            rows_by_groups = {}
-            for group in groups:
-                rows_by_groups[group] = {
-                    'rows': [],
-                    'explanations': []
-                }
-                for row_index, row in enumerate(pred_dicts):
-                    is_wrong_group = False
-                    for i, group_by_key in enumerate(group_by):
-                        if row[group_by_key] != group[i]:
-                            is_wrong_group = True
-                            break
-                    if not is_wrong_group:
-                        rows_by_groups[group]['rows'].append(row)
-                        rows_by_groups[group]['explanations'].append(explanations[row_index])
-
-            for group, data in rows_by_groups.items():
-                rows = data['rows']
-                explanations = data['explanations']
-
-                if len(rows) == 0:
-                    break
-
-                for row in rows:
-                    predictions = row[predict]
-                    if isinstance(predictions, list) is False:
-                        predictions = [predictions]
-
-                    date_values = row[order_by_column]
-                    if isinstance(date_values, list) is False:
-                        date_values = [date_values]
-
-                for i in range(len(rows) - 1):
-                    if horizon > 1:
-                        rows[i][predict] = rows[i][predict][0]
-                        rows[i][order_by_column] = rows[i][order_by_column][0]
-                    for col in ('predicted_value', 'confidence', 'confidence_lower_bound', 'confidence_upper_bound'):
-                        if horizon > 1:
-                            explanations[i][predict][col] = explanations[i][predict][col][0]
-
-                last_row = rows.pop()
-                last_explanation = explanations.pop()
-                for i in range(horizon):
-                    new_row = copy.deepcopy(last_row)
-                    if horizon > 1:
-                        new_row[predict] = new_row[predict][i]
-                        new_row[order_by_column] = new_row[order_by_column][i]
-                    if '__mindsdb_row_id' in new_row and (i > 0 or __mdb_make_predictions is False):
-                        new_row['__mindsdb_row_id'] = None
-                    rows.append(new_row)
-
-                    new_explanation = copy.deepcopy(last_explanation)
-                    for col in ('predicted_value', 'confidence', 'confidence_lower_bound', 'confidence_upper_bound'):
-                        if horizon > 1:
-                            new_explanation[predict][col] = new_explanation[predict][col][i]
-                    if i != 0:
-                        new_explanation[predict]['anomaly'] = None
-                        new_explanation[predict]['truth'] = None
-                    explanations.append(new_explanation)
-
-            pred_dicts = []
-            explanations = []
-            for group, data in rows_by_groups.items():
-                pred_dicts.extend(data['rows'])
-                explanations.extend(data['explanations'])
-
-            original_target_values[f'{predict}_original'] = []
-            for i in range(len(pred_dicts)):
-                original_target_values[f'{predict}_original'].append(explanations[i][predict].get('truth', None))
+            truth_column = f'{target}_truth'
+            if truth_column in predictions.columns:
+                original_target_values[f'{target}_original'] = predictions[truth_column].tolist()
+            else:
+                original_target_values[f'{target}_original'] = [None] * len(predictions)
 
             if model['dtypes'][order_by_column] == dtype.date:
-                for row in pred_dicts:
-                    if isinstance(row[order_by_column], (int, float)):
-                        row[order_by_column] = str(datetime.fromtimestamp(row[order_by_column]).date())
+                predictions[order_by_column] = predictions[order_by_column].map(
+                    lambda x: str(datetime.fromtimestamp(x).date()) if isinstance(x, (int, float, np.integer)) else x
+                )
             elif model['dtypes'][order_by_column] == dtype.datetime:
-                for row in pred_dicts:
-                    if isinstance(row[order_by_column], (int, float)):
-                        row[order_by_column] = str(datetime.fromtimestamp(row[order_by_column]))
+                predictions[order_by_column] = predictions[order_by_column].map(
+                    lambda x: str(datetime.fromtimestamp(x)) if isinstance(x, (int, float, np.integer)) else x
+                )
+
+        explain_keys = ['predicted_value', *explain_columns.keys()]
+        explanations = [
+            {target: dict(zip(explain_keys, values))}
+            for values in zip(
+                predictions[target].tolist(),
+                *[predictions[column].tolist() for column in explain_columns.values()]
+            )
+        ]
+        pred_dicts = predictions.drop(columns=list(explain_columns.values())).to_dict('records')
 
         keys = [x for x in pred_dicts[0] if x in columns]
         min_max_keys = []
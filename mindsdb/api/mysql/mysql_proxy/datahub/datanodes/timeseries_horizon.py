@@ -0,0 +1,201 @@
+import numpy as np
+import pandas as pd
+
+
+def _take_step(column, step):
+    ''' Item of horizon from each value of the column, values which are not lists are kept as is '''
+    values = np.empty(len(column), dtype=object)
+    values[:] = [
+        (value[step] if step < len(value) else None) if isinstance(value, (list, tuple, np.ndarray)) else value
+        for value in column.tolist()
+    ]
+    return values
+
+
+def _explode_horizon(column, horizon):
+    ''' All items of horizon of each value of the column, one after another '''
+    exploded = column.explode()
+    if len(exploded) == len(column) * horizon:
+        return exploded.values
+    # not every value is a list with item for each step
+    return np.concatenate([_take_step(column, step).reshape(-1, 1) for step in range(horizon)], axis=1).ravel()
+
+
+def expand_horizon(predictions, target, group_by, order_by_column, horizon, make_predictions=True):
+    ''' Makes rows of timeseries prediction: last row of each group is replaced with one row
+        for each step of the horizon, other rows keep only the first step.
+        Args:
+            predictions: DataFrame, prediction in 'frame' format: input columns, target,
+                and explanation columns {target}_confidence, _anomaly, _truth, _min, _max
+            target: str, name of predicted column
+            group_by: list of str, columns of groups
+            order_by_column: str
+            horizon: int
+            make_predictions: bool, False - the last row of group is not a prediction, so its row id is cleared
+        Returns:
+            DataFrame: rows of groups one after another, in order of first row of group
+    '''
+    frame = predictions.reset_index(drop=True)
+    rows_count = len(frame)
+    if rows_count == 0:
+        return frame
+
+    # values of these columns are lists with item for each step of horizon
+    list_columns = [
+        column for column in (target, order_by_column, f'{target}_confidence', f'{target}_min', f'{target}_max')
+        if column in frame.columns
+    ]
+
+    positions = np.arange(rows_count)
+    if len(group_by) > 0:
+        group_codes = frame.groupby(group_by, sort=False, dropna=False).ngroup().values
+        is_last = ~frame.duplicated(subset=group_by, keep='last').values
+    else:
+        group_codes = np.zeros(rows_count, dtype=int)
+        is_last = positions == rows_count - 1
+
+    head = frame[~is_last].copy()
+    if horizon > 1:
+        for column in list_columns:
+            head[column] = _take_step(head[column], 0)
+
+    last = frame[is_last]
+    tail = last.iloc[np.repeat(np.arange(len(last)), horizon)].copy()
+    steps = np.tile(np.arange(horizon), len(last))
+    if horizon > 1:
+        for column in list_columns:
+            tail[column] = _explode_horizon(last[column], horizon)
+
+    # only the first step is a prediction for the input row
+    cleared_columns = [(column, steps > 0) for column in (f'{target}_anomaly', f'{target}_truth')]
+    cleared_columns.append(('__mindsdb_row_id', (steps > 0) | (make_predictions is False)))
+    for column, mask in cleared_columns:
+        if column in tail.columns:
+            values = tail[column].values.astype(object)
+            values[mask] = None
+            tail[column] = values
+
+    result = pd.concat([head, tail], ignore_index=True)
+    order = np.lexsort((
+        np.concatenate([np.zeros(len(head), dtype=int), steps]),
+        np.concatenate([positions[~is_last], np.repeat(positions[is_last], horizon)]),
+        np.concatenate([group_codes[~is_last], np.repeat(group_codes[is_last], horizon)])
+    ))
+    return result.iloc[order].reset_index(drop=True)
+
+
+def _expand_horizon_by_rows(pred_dicts, explanations, predict, group_by, order_by_column, horizon,
+                            make_predictions=True):
+    ''' Previous implementation of expand_horizon, by rows, is kept for the benchmark '''
+    import copy
+    groups = set()
+    for row in pred_dicts:
+        groups.add(tuple([row[x] for x in group_by]))
+
+    rows_by_groups = {}
+    for group in groups:
+        rows_by_groups[group] = {'rows': [], 'explanations': []}
+        for row_index, row in enumerate(pred_dicts):
+            is_wrong_group = False
+            for i, group_by_key in enumerate(group_by):
+                if row[group_by_key] != group[i]:
+                    is_wrong_group = True
+                    break
+            if not is_wrong_group:
+                rows_by_groups[group]['rows'].append(row)
+                rows_by_groups[group]['explanations'].append(explanations[row_index])
+
+    for group, data in rows_by_groups.items():
+        rows = data['rows']
+        explanations = data['explanations']
+        for i in range(len(rows) - 1):
+            if horizon > 1:
+                rows[i][predict] = rows[i][predict][0]
+                rows[i][order_by_column] = rows[i][order_by_column][0]
+            for col in ('predicted_value', 'confidence', 'confidence_lower_bound', 'confidence_upper_bound'):
+                if horizon > 1:
+                    explanations[i][predict][col] = explanations[i][predict][col][0]
+        last_row = rows.pop()
+        last_explanation = explanations.pop()
+        for i in range(horizon):
+            new_row = copy.deepcopy(last_row)
+            if horizon > 1:
+                new_row[predict] = new_row[predict][i]
+                new_row[order_by_column] = new_row[order_by_column][i]
+            if '__mindsdb_row_id' in new_row and (i > 0 or make_predictions is False):
+                new_row['__mindsdb_row_id'] = None
+            rows.append(new_row)
+            new_explanation = copy.deepcopy(last_explanation)
+            for col in ('predicted_value', 'confidence', 'confidence_lower_bound', 'confidence_upper_bound'):
+                if horizon > 1:
+                    new_explanation[predict][col] = new_explanation[predict][col][i]
+            if i != 0:
+                new_explanation[predict]['anomaly'] = None
+                new_explanation[predict]['truth'] = None
+            explanations.append(new_explanation)
+
+    pred_dicts = []
+    explanations = []
+    for group, data in rows_by_groups.items():
+        pred_dicts.extend(data['rows'])
+        explanations.extend(data['explanations'])
+    return pred_dicts, explanations
+
+
+def benchmark(groups_count=2000, rows_per_group=5, horizon=5):
+    ''' Compares expand_horizon with the previous implementation by rows, run: python -m <this module> '''
+    import time
+    import random
+
+    rows_count = groups_count * rows_per_group
+    target = 'y'
+    frame = pd.DataFrame({
+        'g': [f'group {i % groups_count}' for i in range(rows_count)],
+        't': [[1000 + i + step for step in range(horizon)] for i in range(rows_count)],
+        'x': [random.random() for _ in range(rows_count)],
+        '__mindsdb_row_id': list(range(rows_count)),
+        target: [[random.random() for _ in range(horizon)] for _ in range(rows_count)],
+        f'{target}_confidence': [[0.9] * horizon for _ in range(rows_count)],
+        f'{target}_anomaly': [None] * rows_count,
+        f'{target}_truth': [random.random() for _ in range(rows_count)],
+        f'{target}_min': [[0.] * horizon for _ in range(rows_count)],
+        f'{target}_max': [[1.] * horizon for _ in range(rows_count)]
+    })
+
+    explain_names = {
+        f'{target}_confidence': 'confidence',
+        f'{target}_anomaly': 'anomaly',
+        f'{target}_truth': 'truth',
+        f'{target}_min': 'confidence_lower_bound',
+        f'{target}_max': 'confidence_upper_bound'
+    }
+    pred_dicts = frame[['g', 't', 'x', '__mindsdb_row_id', target]].to_dict('records')
+    explanations = [
+        {target: {'predicted_value': row[target], **{explain_names[k]: row[k] for k in explain_names}}}
+        for row in frame.to_dict('records')
+    ]
+
+    start = time.time()
+    old_rows, old_explanations = _expand_horizon_by_rows(pred_dicts, explanations, target, ['g'], 't', horizon)
+    old_time = time.time() - start
+
+    start = time.time()
+    result = expand_horizon(frame, target, ['g'], 't', horizon)
+    new_time = time.time() - start
+
+    # order of groups in the previous implementation is order of set
+    old_rows = sorted(old_rows, key=lambda row: (row['g'], row['t']))
+    new_rows = sorted(result.to_dict('records'), key=lambda row: (row['g'], row['t']))
+    assert len(old_rows) == len(new_rows), 'number of rows is different'
+    for old_row, new_row in zip(old_rows, new_rows):
+        for key in old_row:
+            assert old_row[key] == new_row[key], f'values of {key} are different'
+
+    print(f'groups: {groups_count}, rows: {rows_count}, horizon: {horizon}')
+    print(f'by rows: {old_time:.3f}s')
+    print(f'expand_horizon: {new_time:.3f}s ({old_time / new_time:.1f}x)')
+
+
+# only run the benchmark if this file is called directly
+if __name__ == "__main__":
+    benchmark()
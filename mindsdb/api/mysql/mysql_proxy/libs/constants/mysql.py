@@ -44,6 +44,7 @@ class CAPABILITIES(object):
     CLIENT_CAN_HANDLE_EXPIRED_PASSWORDS = 1 << 22
     CLIENT_SESSION_TRACK = 1 << 23
     CLIENT_DEPRECATE_EOF = 1 << 24
+    CLIENT_ZSTD_COMPRESSION_ALGORITHM = 1 << 26
     CLIENT_SSL_VERIFY_SERVER_CERT = 1 << 30
     CLIENT_REMEMBER_OPTIONS = 1 << 31
     CLIENT_SECURE_CONNECTION = 0x00008000
@@ -446,6 +447,7 @@ class ERR(object):
     ER_TOO_MANY_ROWS = 1172
     ER_TOO_MANY_TABLES = 1116
     ER_TOO_MANY_USER_CONNECTIONS = 1203
+    ER_CON_COUNT_ERROR = 1040
     ER_TOO_MANY_VALUES_ERROR = 1657
     ER_TOO_MUCH_AUTO_TIMESTAMP_COLS = 1293
     ER_TRANS_CACHE_FULL = 1197
@@ -25,6 +25,8 @@ from collections import OrderedDict
 from functools import partial
 import select
 import base64
+import itertools
+import multiprocessing
 
 import pandas as pd
 from mindsdb_sql import parse_sql
@@ -62,10 +64,20 @@ from mindsdb.api.mysql.mysql_proxy.utilities.sql import query_df
 from mindsdb.utilities.wizards import make_ssl_cert
 from mindsdb.utilities.config import Config
 from mindsdb.api.mysql.mysql_proxy.data_types.mysql_packet import Packet
+from mindsdb.api.mysql.mysql_proxy.data_types.resultset_row_encoder import encode_text_rows, encode_binary_rows
 from mindsdb.api.mysql.mysql_proxy.controllers.session_controller import SessionController
+from mindsdb.api.mysql.mysql_proxy.async_server import AsyncMysqlServer
 from mindsdb.api.mysql.mysql_proxy.classes.client_capabilities import ClentCapabilities
 from mindsdb.api.mysql.mysql_proxy.classes.server_capabilities import server_capabilities
+from mindsdb.api.mysql.mysql_proxy.classes.compressed_socket import (
+    CompressedSocket,
+    ZlibCompressor,
+    ZstdCompressor,
+    MIN_COMPRESS_LENGTH,
+    is_zstd_available
+)
 from mindsdb.api.mysql.mysql_proxy.classes.sql_statement_parser import SqlStatementParser
+from mindsdb.api.mysql.mysql_proxy.classes.ast_cache import parse_sql_cached
 from mindsdb.api.mysql.mysql_proxy.utilities import log
 from mindsdb.api.mysql.mysql_proxy.utilities import (
     SqlApiException,
@@ -77,6 +89,7 @@ from mindsdb.api.mysql.mysql_proxy.utilities import (
     ErDbDropDelete,
     ErNonInsertableTable,
     ErNotSupportedYet,
+    ResultsetStreamError,
 )
 from mindsdb.api.mysql.mysql_proxy.utilities.functions import get_column_in_case
 
@@ -110,10 +123,8 @@ from mindsdb.api.mysql.mysql_proxy.data_types.mysql_packets import (
     CommandPacket,
     ColumnCountPacket,
     ColumnDefenitionPacket,
-    ResultsetRowPacket,
     EofPacket,
-    STMTPrepareHeaderPacket,
-    BinaryResultsetRowPacket
+    STMTPrepareHeaderPacket
 )
 
 from mindsdb.interfaces.datastore.datastore import DataStore
@@ -123,6 +134,11 @@ from mindsdb.interfaces.database.views import ViewController
 
 connection_id = 0
 
+# packets of big resultsets are sent by chunks of at least this size
+STREAM_CHUNK_SIZE = 256 * 1024
+# number of resultset rows encoded at once
+ROWS_ENCODE_BLOCK_SIZE = 1000
+
 
 def empty_fn():
     pass
@@ -193,6 +209,7 @@ class MysqlProxy(SocketServer.BaseRequestHandler):
         self.charset_text_type = CHARSET_NUMBERS['utf8_general_ci']
         self.session = None
         self.client_capabilities = None
+        self.zstd_compression_level = None
         super().__init__(request, client_address, server)
 
     def init_session(self, company_id=None):
@@ -201,10 +218,13 @@ class MysqlProxy(SocketServer.BaseRequestHandler):
             ip=self.client_address[0], port=self.client_address[1]))
         log.debug(self.__dict__)
 
-        if self.server.connection_id >= 65025:
-            self.server.connection_id = 0
-        self.server.connection_id += 1
-        self.connection_id = self.server.connection_id
+        # counter may be shared by all processes which serve the port
+        counter = self.server.connection_id_counter
+        with counter.get_lock():
+            if counter.value >= 65025:
+                counter.value = 0
+            counter.value += 1
+            self.connection_id = counter.value
         self.session = SessionController(
             server=self.server,
             company_id=company_id
@@ -281,6 +301,8 @@ class MysqlProxy(SocketServer.BaseRequestHandler):
             client_auth_plugin = handshake_resp.client_auth_plugin.value.decode()
 
         username = handshake_resp.username.value.decode()
+        if isinstance(handshake_resp.zstd_compression_level.value, int):
+            self.zstd_compression_level = handshake_resp.zstd_compression_level.value
 
         if client_auth_plugin != DEFAULT_AUTH_METHOD:
             if client_auth_plugin == 'mysql_native_password':
@@ -347,9 +369,23 @@ class MysqlProxy(SocketServer.BaseRequestHandler):
             return False
 
     def send_package_group(self, packages):
-        string = b''.join([x.accum() for x in packages])
+        string = b''.join([x if isinstance(x, (bytes, bytearray)) else x.accum() for x in packages])
         self.socket.sendall(string)
 
+    def stream_package_group(self, packages):
+        ''' Sends packets as they are made, by chunks of STREAM_CHUNK_SIZE bytes.
+            Packets take their sequence numbers when they are made, so `packages` must be
+            a generator which makes them in the order of sending. Items may be already encoded bytes.
+        '''
+        buffer = bytearray()
+        for package in packages:
+            buffer += package if isinstance(package, (bytes, bytearray)) else package.accum()
+            if len(buffer) >= STREAM_CHUNK_SIZE:
+                self.socket.sendall(buffer)
+                buffer = bytearray()
+        if len(buffer) > 0:
+            self.socket.sendall(buffer)
+
     def insert_predictor_answer(self, insert):
         ''' Start learn new predictor.
             Parameters:
@@ -844,18 +880,13 @@ class MysqlProxy(SocketServer.BaseRequestHandler):
         return TYPES.MYSQL_TYPE_VAR_STRING
 
     def answer_stmt_prepare(self, sql):
-        sqlquery = SQLQuery(
-            sql,
-            session=self.session,
-            execute=False
-        )
+        sqlquery = SQLQuery.prepare_statement(sql, self.session)
 
         stmt_id = self.session.register_stmt(sqlquery)
         prepared_stmt = self.session.prepared_stmts[stmt_id]
 
-        sqlquery.prepare_query()
         parameters = sqlquery.parameters
-        columns_def = sqlquery.columns
+        columns_def = sqlquery.binary_columns
 
         statement = sqlquery.query
         if isinstance(statement, Insert):
@@ -889,7 +920,7 @@ class MysqlProxy(SocketServer.BaseRequestHandler):
             #     raise ErNonInsertableTable("At this moment supported only insert where all values is parameters.")
 
             columns_def = []
-            for col in sqlquery.columns:
+            for col in sqlquery.binary_columns:
                 col = col.copy()
                 col['charset'] = CHARSET_NUMBERS['binary']
                 columns_def.append(col)
@@ -972,7 +1003,7 @@ class MysqlProxy(SocketServer.BaseRequestHandler):
             )
         ]
 
-        parameters_def = sqlquery.to_mysql_columns(parameters)
+        parameters_def = sqlquery.to_mysql_columns(parameters, binary=True)
         if len(parameters_def) > 0:
             packages.extend(
                 self._get_column_defenition_packets(parameters_def)
@@ -993,10 +1024,13 @@ class MysqlProxy(SocketServer.BaseRequestHandler):
         self.send_package_group(packages)
 
     def answer_stmt_execute(self, stmt_id, parameters):
-        prepared_stmt = self.session.prepared_stmts[stmt_id]
+        prepared_stmt = self.session.get_stmt(stmt_id)
 
-        sqlquery = prepared_stmt['statement']
+        # plan of the statement is not changed, parameters are put into its copy
+        sqlquery = SQLQuery(None, session=self.session, execute=False, plan=prepared_stmt['plan'])
+        sqlquery.prepare_query(prepare=False)
         sqlquery.execute_query(parameters)
+        prepared_stmt['statement'] = sqlquery
         query = sqlquery.query
         if prepared_stmt['type'] == 'select':
             # sql = prepared_stmt['statement'].sql
@@ -1034,7 +1068,9 @@ class MysqlProxy(SocketServer.BaseRequestHandler):
             #     return
             # # ---
 
-            columns = sqlquery.columns
+            self.open_stmt_cursor(prepared_stmt)
+
+            columns = sqlquery.binary_columns
             packages = [self.packet(ColumnCountPacket, count=len(columns))]
             packages.extend(self._get_column_defenition_packets(columns))
 
@@ -1054,7 +1090,9 @@ class MysqlProxy(SocketServer.BaseRequestHandler):
             # sql = prepared_stmt['statement'].sql
             # query = SQLQuery(sql, session=self.session)
 
-            columns = sqlquery.columns
+            self.open_stmt_cursor(prepared_stmt)
+
+            columns = sqlquery.binary_columns
             packages = [self.packet(ColumnCountPacket, count=len(columns))]
             packages.extend(self._get_column_defenition_packets(columns))
 
@@ -1095,35 +1133,27 @@ class MysqlProxy(SocketServer.BaseRequestHandler):
         else:
             raise ErNotSupportedYet(f"Unknown statement type: {prepared_stmt['type']}")
 
-    def answer_stmt_fetch(self, stmt_id, limit=100000):
-        prepared_stmt = self.session.prepared_stmts[stmt_id]
-        # sql = prepared_stmt['statement'].sql
-        fetched = prepared_stmt['fetched']
-        # query = SQLQuery(sql, session=self.session)
+    def open_stmt_cursor(self, prepared_stmt):
+        ''' Rows of executed statement are sent by COM_STMT_FETCH, every fetch takes next rows of the cursor '''
         sqlquery = prepared_stmt['statement']
+        # types of columns are checked by values, to send them in binary protocol
+        sqlquery.collect_columns_stats()
+        prepared_stmt['cursor'] = sqlquery.iter_result_rows()
+        prepared_stmt['rows_count'] = sqlquery.get_result_rows_count()
+        prepared_stmt['fetched'] = 0
 
-        result = sqlquery.fetch(
-            self.session.datahub
-        )
-
-        if result['success'] is False:
-            self.packet(
-                ErrPacket,
-                err_code=result['error_code'],
-                msg=result['msg']
-            ).send()
-            return
-
-        packages = []
-        columns = sqlquery.columns
-        for row in sqlquery.result[fetched:limit]:
-            packages.append(
-                self.packet(BinaryResultsetRowPacket, data=row, columns=columns)
-            )
+    def answer_stmt_fetch(self, stmt_id, limit=100000):
+        prepared_stmt = self.session.get_stmt(stmt_id)
+        sqlquery = prepared_stmt['statement']
+        cursor = prepared_stmt['cursor']
+        if cursor is None:
+            raise SqlApiException('Statement is not executed or does not return rows')
 
-        prepared_stmt['fetched'] += len(sqlquery.result[fetched:limit])
+        columns = sqlquery.binary_columns
+        rows = list(itertools.islice(cursor, limit))
+        prepared_stmt['fetched'] += len(rows)
 
-        if len(sqlquery.result) <= limit:
+        if prepared_stmt['fetched'] >= prepared_stmt['rows_count']:
             status = sum([
                 SERVER_STATUS.SERVER_STATUS_AUTOCOMMIT,
                 SERVER_STATUS.SERVER_STATUS_LAST_ROW_SENT,
@@ -1134,8 +1164,21 @@ class MysqlProxy(SocketServer.BaseRequestHandler):
                 SERVER_STATUS.SERVER_STATUS_CURSOR_EXISTS,
             ])
 
-        packages.append(self.last_packet(status=status))
-        self.send_package_group(packages)
+        column_types = [column['type'] for column in columns]
+
+        def make_packages():
+            # rows are encoded by blocks, column by column, same as in text protocol
+            for i in range(0, len(rows), ROWS_ENCODE_BLOCK_SIZE):
+                block = rows[i:i + ROWS_ENCODE_BLOCK_SIZE]
+                encoded, self.session.packet_sequence_number = encode_binary_rows(
+                    [list(values) for values in zip(*block)],
+                    column_types,
+                    self.session.packet_sequence_number
+                )
+                yield encoded
+            yield self.last_packet(status=status)
+
+        self.stream_package_group(make_packages())
 
     def answer_stmt_close(self, stmt_id):
         self.session.unregister_stmt(stmt_id)
@@ -1326,9 +1369,9 @@ class MysqlProxy(SocketServer.BaseRequestHandler):
 
         try:
             try:
-                statement = parse_sql(sql, dialect='mindsdb')
+                statement = parse_sql_cached(sql, dialect='mindsdb')
             except Exception:
-                statement = parse_sql(sql, dialect='mysql')
+                statement = parse_sql_cached(sql, dialect='mysql')
         except Exception:
             # not all statemts are parse by parse_sql
             log.warning(f'SQL statement are not parsed by mindsdb_sql: {sql}')
@@ -2160,27 +2203,33 @@ class MysqlProxy(SocketServer.BaseRequestHandler):
         self.send_package_group(packages)
 
     def answer_select(self, query):
-        result = query.fetch(
-            self.session.datahub
-        )
+        ''' Sends the result in text protocol. Rows are made from columns of the result and encoded
+            by blocks while they are sent, so all rows of the result are not made at once.
+        '''
+        # stats give length of columns, so rows are not scanned for column definitions
+        query.collect_columns_stats()
+        sequence_number = self.session.packet_sequence_number
+        header = self._get_tabel_header_packets(query.columns)
+        blocks = self._iter_text_rows_blocks(query.iter_result_rows(ROWS_ENCODE_BLOCK_SIZE))
+        try:
+            # the first block is encoded before anything is sent, so its error can be answered with ErrPacket
+            first_block = next(blocks, b'')
+        except Exception:
+            self.session.packet_sequence_number = sequence_number
+            raise
 
-        if result['success'] is False:
-            self.packet(
-                ErrPacket,
-                err_code=result['error_code'],
-                msg=result['msg']
-            ).send()
-            return
+        def make_packages():
+            yield from header
+            yield first_block
+            try:
+                yield from blocks
+            except Exception as e:
+                raise ResultsetStreamError(f'Error while sending rows of the result: {e}') from e
+            # there was hang of mysql client
+            # yield self.packet(OkPacket, eof=True)
+            yield self.last_packet()
 
-        packages = []
-        packages += self.get_tabel_packets(
-            columns=query.columns,
-            data=query.result
-        )
-        # there was hang of mysql client
-        # packages.append(self.packet(OkPacket, eof=True))
-        packages.append(self.last_packet())
-        self.send_package_group(packages)
+        self.stream_package_group(make_packages())
 
     def _get_column_defenition_packets(self, columns, data=[]):
         packets = []
@@ -2189,9 +2238,13 @@ class MysqlProxy(SocketServer.BaseRequestHandler):
             column_name = column.get('name', 'column_name')
             column_alias = column.get('alias', column_name)
             flags = column.get('flags', 0)
+            stats = column.get('stats')
             if self.session.integration_type == 'mssql':
                 # mssql raise error if value more then this.
                 length = 0x2000
+            elif stats is not None:
+                # collected when the result was made, so values are not scanned again
+                length = 0xffff if stats['rows_count'] == 0 else max(stats['max_length'], 1)
             else:
                 if len(data) == 0:
                     length = 0xffff
@@ -2219,17 +2272,37 @@ class MysqlProxy(SocketServer.BaseRequestHandler):
             )
         return packets
 
-    def get_tabel_packets(self, columns, data, status=0):
+    def _get_tabel_header_packets(self, columns, data=[], status=0):
         # TODO remove columns order
         packets = [self.packet(ColumnCountPacket, count=len(columns))]
-        packets.extend(self._get_column_defenition_packets(columns, data))
+        packets += self._get_column_defenition_packets(columns, data)
 
         if self.client_capabilities.DEPRECATE_EOF is False:
             packets.append(self.packet(EofPacket, status=status))
-
-        packets += [self.packet(ResultsetRowPacket, data=x) for x in data]
         return packets
 
+    def _iter_text_rows_blocks(self, rows):
+        ''' Encodes rows by blocks, column by column, instead of a ResultsetRowPacket for each row.
+            Blocks take their sequence numbers when they are made, same as packets.
+        '''
+        rows = iter(rows)
+        while True:
+            block = list(itertools.islice(rows, ROWS_ENCODE_BLOCK_SIZE))
+            if len(block) == 0:
+                return
+            encoded, self.session.packet_sequence_number = encode_text_rows(
+                [list(values) for values in zip(*block)],
+                self.session.packet_sequence_number
+            )
+            yield encoded
+
+    def iter_tabel_packets(self, columns, data, status=0):
+        yield from self._get_tabel_header_packets(columns, data, status)
+        yield from self._iter_text_rows_blocks(data)
+
+    def get_tabel_packets(self, columns, data, status=0):
+        return list(self.iter_tabel_packets(columns, data, status))
+
     def decode_utf(self, text):
         try:
             return text.decode('utf-8')
@@ -2323,12 +2396,35 @@ class MysqlProxy(SocketServer.BaseRequestHandler):
         """
         self.server.hook_before_handle()
 
+        try:
+            if self.handle_connect() is False:
+                return
+
+            while self.handle_command():
+                pass
+        finally:
+            self.close_session()
+
+    def close_session(self):
+        """
+        Frees resources of the session, called when the connection is closed
+        """
+        if self.session is not None:
+            self.session.close()
+            self.session = None
+
+    def handle_connect(self):
+        """
+        Makes session of the new connection and authenticates the client
+        :return: False if the connection should be closed
+        """
         log.debug('handle new incoming connection')
         cloud_connection = self.is_cloud_connection()
         self.init_session(company_id=cloud_connection.get('company_id'))
         if cloud_connection['is_cloud'] is False:
             if self.handshake() is False:
-                return
+                return False
+            self.enable_compression()
         else:
             self.client_capabilities = ClentCapabilities(cloud_connection['client_capabilities'])
             self.session.database = cloud_connection['database']
@@ -2336,83 +2432,117 @@ class MysqlProxy(SocketServer.BaseRequestHandler):
             self.session.auth = True
             self.session.integration = None
             self.session.integration_type = None
+        return True
 
-        while True:
-            log.debug('Got a new packet')
-            p = self.packet(CommandPacket)
+    def enable_compression(self):
+        """
+        Switches the connection to compressed protocol after authentication, if the client asked for it.
+        zlib is used if the client set CLIENT_COMPRESS, zstd - if only CLIENT_ZSTD_COMPRESSION_ALGORITHM
+        """
+        compression_config = self.session.config['api']['mysql'].get('compression', {})
+        if server_capabilities.has(CAPABILITIES.CLIENT_COMPRESS) and self.client_capabilities.COMPRESS:
+            compressor = ZlibCompressor(compression_config.get('zlib_level'))
+        elif server_capabilities.has(CAPABILITIES.CLIENT_ZSTD_COMPRESSION_ALGORITHM) \
+                and self.client_capabilities.ZSTD_COMPRESSION_ALGORITHM:
+            compressor = ZstdCompressor(self.zstd_compression_level or compression_config.get('zstd_level'))
+        else:
+            return
+        log.debug(f'Connection uses {compressor.name} compression')
+        self.socket = CompressedSocket(
+            self.socket,
+            compressor,
+            min_length=compression_config.get('min_length', MIN_COMPRESS_LENGTH)
+        )
 
-            try:
-                success = p.get()
-            except Exception:
-                log.error('Session closed, on packet read error')
-                log.error(traceback.format_exc())
-                return
+    def handle_command(self):
+        """
+        Reads one command of the client and answers it
+        :return: False if the connection should be closed
+        """
+        log.debug('Got a new packet')
+        p = self.packet(CommandPacket)
 
-            if success is False:
-                log.debug('Session closed by client')
-                return
+        try:
+            success = p.get()
+        except Exception:
+            log.error('Session closed, on packet read error')
+            log.error(traceback.format_exc())
+            return False
 
-            log.debug('Command TYPE: {type}'.format(
-                type=getConstName(COMMANDS, p.type.value)))
+        if success is False:
+            log.debug('Session closed by client')
+            return False
 
-            try:
-                if p.type.value == COMMANDS.COM_QUERY:
-                    sql = self.decode_utf(p.sql.value)
-                    sql = SqlStatementParser.clear_sql(sql)
-                    log.debug(f'COM_QUERY: {sql}')
-                    self.query_answer(sql)
-                elif p.type.value == COMMANDS.COM_STMT_PREPARE:
-                    # https://dev.mysql.com/doc/internals/en/com-stmt-prepare.html
-                    sql = self.decode_utf(p.sql.value)
-                    # statement = SqlStatementParser(sql)
-                    # log.debug(f'COM_STMT_PREPARE: {statement.sql}')
-                    self.answer_stmt_prepare(sql)
-                elif p.type.value == COMMANDS.COM_STMT_EXECUTE:
-                    self.answer_stmt_execute(p.stmt_id.value, p.parameters)
-                elif p.type.value == COMMANDS.COM_STMT_FETCH:
-                    self.answer_stmt_fetch(p.stmt_id.value, p.limit.value)
-                elif p.type.value == COMMANDS.COM_STMT_CLOSE:
-                    self.answer_stmt_close(p.stmt_id.value)
-                elif p.type.value == COMMANDS.COM_QUIT:
-                    log.debug('Session closed, on client disconnect')
-                    self.session = None
-                    break
-                elif p.type.value == COMMANDS.COM_INIT_DB:
-                    new_database = p.database.value.decode()
-                    self.change_default_db(new_database)
-                    self.packet(OkPacket).send()
-                elif p.type.value == COMMANDS.COM_FIELD_LIST:
-                    # this command is deprecated, but console client still use it.
-                    self.packet(OkPacket).send()
-                else:
-                    log.warning('Command has no specific handler, return OK msg')
-                    log.debug(str(p))
-                    # p.pprintPacket() TODO: Make a version of print packet
-                    # that sends it to debug isntead
-                    self.packet(OkPacket).send()
-
-            except SqlApiException as e:
-                log.error(
-                    f'ERROR while executing query\n'
-                    f'{traceback.format_exc()}\n'
-                    f'{e}'
-                )
-                self.packet(
-                    ErrPacket,
-                    err_code=e.err_code,
-                    msg=str(e)
-                ).send()
-            except Exception as e:
-                log.error(
-                    f'ERROR while executing query\n'
-                    f'{traceback.format_exc()}\n'
-                    f'{e}'
-                )
-                self.packet(
-                    ErrPacket,
-                    err_code=ERR.ER_SYNTAX_ERROR,
-                    msg=str(e)
-                ).send()
+        log.debug('Command TYPE: {type}'.format(
+            type=getConstName(COMMANDS, p.type.value)))
+
+        try:
+            if p.type.value == COMMANDS.COM_QUERY:
+                sql = self.decode_utf(p.sql.value)
+                sql = SqlStatementParser.clear_sql(sql)
+                log.debug(f'COM_QUERY: {sql}')
+                self.query_answer(sql)
+            elif p.type.value == COMMANDS.COM_STMT_PREPARE:
+                # https://dev.mysql.com/doc/internals/en/com-stmt-prepare.html
+                sql = self.decode_utf(p.sql.value)
+                # statement = SqlStatementParser(sql)
+                # log.debug(f'COM_STMT_PREPARE: {statement.sql}')
+                self.answer_stmt_prepare(sql)
+            elif p.type.value == COMMANDS.COM_STMT_EXECUTE:
+                self.answer_stmt_execute(p.stmt_id.value, p.parameters)
+            elif p.type.value == COMMANDS.COM_STMT_FETCH:
+                self.answer_stmt_fetch(p.stmt_id.value, p.limit.value)
+            elif p.type.value == COMMANDS.COM_STMT_CLOSE:
+                self.answer_stmt_close(p.stmt_id.value)
+            elif p.type.value == COMMANDS.COM_QUIT:
+                log.debug('Session closed, on client disconnect')
+                self.close_session()
+                return False
+            elif p.type.value == COMMANDS.COM_INIT_DB:
+                new_database = p.database.value.decode()
+                self.change_default_db(new_database)
+                self.packet(OkPacket).send()
+            elif p.type.value == COMMANDS.COM_FIELD_LIST:
+                # this command is deprecated, but console client still use it.
+                self.packet(OkPacket).send()
+            else:
+                log.warning('Command has no specific handler, return OK msg')
+                log.debug(str(p))
+                # p.pprintPacket() TODO: Make a version of print packet
+                # that sends it to debug isntead
+                self.packet(OkPacket).send()
+
+        except ResultsetStreamError as e:
+            # part of the result is sent already, so the client can not get ErrPacket
+            log.error(
+                f'ERROR while sending result, connection is closed\n'
+                f'{traceback.format_exc()}\n'
+                f'{e}'
+            )
+            return False
+        except SqlApiException as e:
+            log.error(
+                f'ERROR while executing query\n'
+                f'{traceback.format_exc()}\n'
+                f'{e}'
+            )
+            self.packet(
+                ErrPacket,
+                err_code=e.err_code,
+                msg=str(e)
+            ).send()
+        except Exception as e:
+            log.error(
+                f'ERROR while executing query\n'
+                f'{traceback.format_exc()}\n'
+                f'{e}'
+            )
+            self.packet(
+                ErrPacket,
+                err_code=ERR.ER_SYNTAX_ERROR,
+                msg=str(e)
+            ).send()
+        return True
 
     def packet(self, packetClass=Packet, **kwargs):
         """
@@ -2438,9 +2568,11 @@ class MysqlProxy(SocketServer.BaseRequestHandler):
             return self.packet(EofPacket, status=status)
 
     @staticmethod
-    def startProxy():
+    def startProxy(reuse_port=False, connection_id_counter=None):
         """
         Create a server and wait for incoming connections until Ctrl-C
+        :param reuse_port: bind with SO_REUSEPORT, so several processes can serve the same port
+        :param connection_id_counter: multiprocessing.Value shared by the processes
         """
         config = Config()
 
@@ -2455,18 +2587,52 @@ class MysqlProxy(SocketServer.BaseRequestHandler):
             CAPABILITIES.CLIENT_SSL,
             config['api']['mysql']['ssl']
         )
+        # compressed protocol is offered to clients only if it is enabled in config
+        compression_config = config['api']['mysql'].get('compression', {})
+        server_capabilities.set(
+            CAPABILITIES.CLIENT_COMPRESS,
+            compression_config.get('zlib', False)
+        )
+        server_capabilities.set(
+            CAPABILITIES.CLIENT_ZSTD_COMPRESSION_ALGORITHM,
+            compression_config.get('zstd', False) and is_zstd_available()
+        )
 
         host = config['api']['mysql']['host']
         port = int(config['api']['mysql']['port'])
 
         log.info(f'Starting MindsDB Mysql proxy server on tcp://{host}:{port}')
 
-        SocketServer.TCPServer.allow_reuse_address = True
-        server = SocketServer.ThreadingTCPServer((host, port), MysqlProxy)
+        server_config = config['api']['mysql'].get('server', {})
+        # thread per connection by default, asyncio server is enabled by api.mysql.server.type = 'asyncio'
+        server_type = server_config.get('type', 'thread')
+        if reuse_port and hasattr(socket, 'SO_REUSEPORT') is False:
+            raise Exception('Several mysql workers require SO_REUSEPORT, which is not supported on this platform')
+
+        if server_type == 'thread':
+            SocketServer.TCPServer.allow_reuse_address = True
+            server = SocketServer.ThreadingTCPServer((host, port), MysqlProxy, bind_and_activate=False)
+            if reuse_port:
+                server.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            server.server_bind()
+            server.server_activate()
+        elif server_type == 'asyncio':
+            server = AsyncMysqlServer(
+                (host, port),
+                MysqlProxy,
+                reuse_port=reuse_port,
+                max_connections=server_config.get('max_connections', 1000),
+                max_workers=server_config.get('max_workers', 16),
+                connect_timeout=server_config.get('connect_timeout', 10),
+                net_timeout=server_config.get('net_timeout', 60),
+                idle_timeout=server_config.get('idle_timeout', 28800)
+            )
+        else:
+            raise Exception(f'Mysql server type: {server_type} not supported')
         server.mindsdb_config = config
         server.check_auth = partial(check_auth, config=config)
         server.cert_path = cert_path
-        server.connection_id = 0
+        server.connection_id_counter = connection_id_counter or multiprocessing.Value('i', 0)
         server.hook_before_handle = empty_fn
 
         server.original_model_interface = ModelInterface()
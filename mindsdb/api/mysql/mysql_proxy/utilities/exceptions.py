@@ -28,3 +28,11 @@ class ErNonInsertableTable(SqlApiException):
 
 class ErNotSupportedYet(SqlApiException):
     err_code = ERR.ER_NOT_SUPPORTED_YET
+
+
+class ErUnknownStmtHandler(SqlApiException):
+    err_code = ERR.ER_UNKNOWN_STMT_HANDLER
+
+
+class ResultsetStreamError(Exception):
+    ''' Error after part of the result is sent to the client, so the connection can only be closed '''
@@ -1,3 +1,5 @@
+import re
+
 import duckdb
 import numpy as np
 from mindsdb_sql import parse_sql
@@ -7,6 +9,33 @@ from mindsdb_sql.render.sqlalchemy_render import SqlalchemyRender
 from mindsdb.utilities.log import log
 
 
+# quoted strings and identifiers, which must be kept as is
+_quoted_re = re.compile(r"""('(?:[^'\\]|\\.|'')*'|"(?:[^"\\]|\\.|"")*"|`(?:[^`]|``)*`)""")
+_spaces_re = re.compile(r'\s+')
+
+
+def _replace_spaces(match):
+    # line breaks are kept, since they end '--' and '#' comments
+    return '\n' if '\n' in match.group() else ' '
+
+
+def normalize_sql(sql):
+    """ Makes text of query which is the same for queries which differ only by whitespaces
+        outside of quoted strings and by trailing ';'
+
+        Args:
+            sql (str): query
+
+        Returns:
+            str
+    """
+    parts = _quoted_re.split(sql.strip().rstrip(';').strip())
+    # odd parts are quoted
+    for i in range(0, len(parts), 2):
+        parts[i] = _spaces_re.sub(_replace_spaces, parts[i])
+    return ''.join(parts)
+
+
 def _remove_table_name(root):
     if isinstance(root, BinaryOperation):
         _remove_table_name(root.args[0])
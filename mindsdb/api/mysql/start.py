@@ -3,9 +3,9 @@ from mindsdb.utilities.config import Config
 from mindsdb.utilities.log import initialize_log
 
 
-def start(verbose=False):
+def start(verbose=False, reuse_port=False, connection_id_counter=None):
     config = Config()
 
     initialize_log(config, 'mysql', wrap_print=True)
 
-    MysqlProxy.startProxy()
+    MysqlProxy.startProxy(reuse_port=reuse_port, connection_id_counter=connection_id_counter)
@@ -9,7 +9,7 @@ from sqlalchemy import func
 from mindsdb.interfaces.storage.db import session
 from mindsdb.interfaces.storage.db import Integration
 from mindsdb.utilities.config import Config
-from mindsdb.interfaces.storage.fs import FsStore
+from mindsdb.interfaces.storage.fs import FsStore, remove as remove_fs_copy
 from mindsdb.utilities.fs import create_directory
 
 
@@ -107,8 +107,7 @@ class DatasourceController:
         integrations_dir = Config()['paths']['integrations']
         folder_name = f'integration_files_{company_id}_{integration_record.id}'
         integration_dir = os.path.join(integrations_dir, folder_name)
-        if os.path.isdir(integration_dir):
-            shutil.rmtree(integration_dir)
+        remove_fs_copy(integration_dir)
         try:
             FsStore().delete(folder_name)
         except Exception:
@@ -17,7 +17,8 @@ from mindsdb.utilities.log import log
 from mindsdb.utilities.json_encoder import CustomJSONEncoder
 from mindsdb.utilities.with_kwargs_wrapper import WithKWArgsWrapper
 from mindsdb.interfaces.storage.db import session, Datasource, Semaphor, Predictor
-from mindsdb.interfaces.storage.fs import FsStore
+from mindsdb.interfaces.storage.fs import FsStore, remove as remove_fs_copy
+from mindsdb.interfaces.storage.lock_manager import get_lock_manager
 from mindsdb.interfaces.database.integrations import DatasourceController
 from mindsdb.interfaces.database.views import ViewController
 from mindsdb.api.mysql.mysql_proxy.utilities.sql import query_df
@@ -97,12 +98,9 @@ class DataStore():
         datasource_record = session.query(Datasource).filter_by(company_id=company_id, name=name).first()
         if datasource_record.analysis is not None:
             return None
-        semaphor_record = session.query(Semaphor).filter_by(company_id=company_id, entity_id=datasource_record.id, entity_type='datasource').first()
-        if semaphor_record is None:
-            semaphor_record = Semaphor(company_id=company_id, entity_id=datasource_record.id, entity_type='datasource', action='write')
-            session.add(semaphor_record)
-            session.commit()
-        else:
+        lock_manager = get_lock_manager()
+        if not lock_manager.acquire('datasource', datasource_record.id, 'write', timeout=0):
+            # analysis is made by someone else already
             return
         try:
             analysis = self.model_interface.analyse_dataset(ds=self.get_datasource_obj(name, raw=True, company_id=company_id), company_id=company_id)
@@ -112,9 +110,7 @@ class DataStore():
         except Exception as e:
             log.error(e)
         finally:
-            semaphor_record = session.query(Semaphor).filter_by(company_id=company_id, entity_id=datasource_record.id, entity_type='datasource').first()
-            session.delete(semaphor_record)
-            session.commit()
+            lock_manager.release('datasource', datasource_record.id, 'write')
 
     def get_datasources(self, name=None, company_id=None):
         datasource_arr = []
@@ -170,14 +166,15 @@ class DataStore():
             linked_models = Predictor.query.filter_by(company_id=company_id, datasource_id=datasource_record.id).all()
             if linked_models:
                 raise Exception("Can't delete {} datasource because there are next models linked to it: {}".format(name, [model.name for model in linked_models]))
+        # rows of the lock manager have no company_id, datasource id is unique anyway
         session.query(Semaphor).filter_by(
-            company_id=company_id, entity_id=datasource_record.id, entity_type='datasource'
+            entity_id=datasource_record.id, entity_type='datasource'
         ).delete()
         session.delete(datasource_record)
         session.commit()
         self.fs_store.delete(f'datasource_{company_id}_{datasource_record.id}')
         try:
-            shutil.rmtree(os.path.join(self.dir, f'{company_id}@@@@@{name}'))
+            remove_fs_copy(os.path.join(self.dir, f'{company_id}@@@@@{name}'))
         except Exception:
             pass
 
@@ -0,0 +1,324 @@
+import atexit
+import bisect
+import hashlib
+import itertools
+import time
+import queue
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+import torch.multiprocessing as mp
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:
+    pyarrow = None
+
+try:
+    from multiprocessing import shared_memory, resource_tracker
+except ImportError:
+    shared_memory = None
+
+from mindsdb.utilities.log import log
+
+
+ctx = mp.get_context('spawn')
+
+# seconds, how often waiting request checks that its worker is alive
+WORKER_CHECK_INTERVAL = 1
+
+
+def pack_data(data: Any) -> Tuple:
+    """ Prepares data to be passed to other process. DataFrame is written as Arrow IPC stream
+        to shared memory block, so only name of the block goes through the queue.
+        Other data, or DataFrame which can not be converted to Arrow, is pickled by the queue.
+    """
+    if isinstance(data, pd.DataFrame) and len(data) > 0 and pyarrow is not None and shared_memory is not None:
+        try:
+            table = pyarrow.Table.from_pandas(data, preserve_index=False)
+            sink = pyarrow.BufferOutputStream()
+            with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+            buffer = sink.getvalue()
+        except Exception:
+            # for example, column with values of different types
+            return ('pickle', data)
+        block = shared_memory.SharedMemory(create=True, size=buffer.size)
+        block.buf[:buffer.size] = memoryview(buffer).cast('B')
+        # block is removed by the process which reads it, or by InferencePool if it is not read:
+        # the tracker of this process must not remove it at exit
+        resource_tracker.unregister(block._name, 'shared_memory')
+        block.close()
+        return ('arrow', block.name, buffer.size)
+    return ('pickle', data)
+
+
+def unpack_data(packed: Tuple) -> Any:
+    """ Reads data made by pack_data, shared memory block is removed after that """
+    if packed[0] == 'arrow':
+        _, name, size = packed
+        block = shared_memory.SharedMemory(name=name)
+        try:
+            # copy, because block can not be closed while dataframe refers to its memory
+            data = bytes(block.buf[:size])
+        finally:
+            block.close()
+            block.unlink()
+        return pyarrow.ipc.open_stream(pyarrow.py_buffer(data)).read_all().to_pandas()
+    return packed[1]
+
+
+def discard_data(packed: Tuple) -> None:
+    """ Removes shared memory block of data which will not be read """
+    if packed[0] == 'arrow':
+        try:
+            block = shared_memory.SharedMemory(name=packed[1])
+            block.close()
+            block.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class HashRing():
+    """ Consistent hashing of keys to nodes. Each node has `replicas` points on the ring,
+        key goes to the node of the first point after hash of the key.
+    """
+
+    def __init__(self, nodes: List[int], replicas: int = 64):
+        self._ring = sorted(
+            (self._hash(f'{node}:{i}'), node) for node in nodes for i in range(replicas)
+        )
+        self._hashes = [point for point, _ in self._ring]
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int(hashlib.md5(key.encode()).hexdigest()[:16], 16)
+
+    def get_node(self, key: str) -> int:
+        index = bisect.bisect(self._hashes, self._hash(key)) % len(self._hashes)
+        return self._ring[index][1]
+
+
+def run_inference_worker(requests_queue, results_queue):
+    from mindsdb.interfaces.model.model_controller import ModelController
+    controller = ModelController(False)
+    # predictions of this process are made in place
+    controller.predict_batcher = None
+    controller.inference_pool = None
+
+    while True:
+        request = requests_queue.get()
+        if request is None:
+            break
+        request_id, name, packed_when_data, pred_format, company_id = request
+        try:
+            result = controller._predict(name, unpack_data(packed_when_data), pred_format, company_id)
+            results_queue.put((request_id, pack_data(result), None))
+        except Exception as e:
+            log.error(f'Inference worker failed to predict {name}: {e}')
+            results_queue.put((request_id, None, f'{type(e).__name__}: {e}'))
+
+
+class InferenceWorker(ctx.Process):
+    daemon = True
+
+    def __init__(self, *args):
+        super(InferenceWorker, self).__init__(args=args)
+
+    def run(self):
+        run_inference_worker(*self._args)
+
+
+class InferencePool():
+    """ Makes predictions in pool of worker processes, so predictions of concurrent requests
+    are not serialised on the GIL of API process.
+
+    Each worker loads predictors to its own PredictorCache. Predictor always goes to the same worker
+    (consistent hashing of its name), so it is loaded only once and stays warm. Input rows and
+    'frame' results are handed off as Arrow IPC in shared memory if pyarrow is installed. Shared memory
+    of request which is not answered (timeout, worker died, pool is stopped) is removed by the pool.
+    Queue of each worker has `queue_size` requests; when it is full, request waits for `queue_timeout`
+    seconds and then is rejected. Workers are started on the first prediction, restarted if they die,
+    and stopped at exit of the process.
+
+    Pool belongs to the API process which made it: each API (http, mysql, every mysql worker process)
+    starts its own `workers_count` workers, and each of them loads its predictors. So the number of
+    inference processes on the host is `workers_count` multiplied by the number of API processes.
+
+    Args:
+        workers_count: int, number of worker processes
+        queue_size: int, max number of requests which wait for a worker
+        queue_timeout: float, seconds to wait for free place in the queue of the worker
+        timeout: float, seconds to wait for result of prediction
+    """
+
+    def __init__(self, workers_count: int = 2, queue_size: int = 16,
+                 queue_timeout: float = 30, timeout: float = 600):
+        self.workers_count = workers_count
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.timeout = timeout
+        self._ring = HashRing(list(range(workers_count)))
+        self._workers: List[Optional[InferenceWorker]] = [None] * workers_count
+        self._queues: List[Any] = [None] * workers_count
+        self._results_queue = None
+        self._futures: Dict[int, Tuple[Future, int]] = {}
+        # packed input data of requests which may be not read by worker yet
+        self._requests_data: Dict[int, Tuple] = {}
+        self._is_stop_registered = False
+        self._request_ids = itertools.count()
+        self._lock = threading.Lock()
+        self.requests = [0] * workers_count
+        self.rejected = 0
+        self.restarts = 0
+
+    @classmethod
+    def from_config(cls, config) -> Optional['InferencePool']:
+        pool_config = config.get('inference_pool', {})
+        if pool_config.get('enabled', False) is False:
+            return None
+        return cls(
+            workers_count=pool_config.get('workers', 2),
+            queue_size=pool_config.get('queue_size', 16),
+            queue_timeout=pool_config.get('queue_timeout', 30),
+            timeout=pool_config.get('timeout', 600)
+        )
+
+    def get_worker_index(self, name: str, company_id: int) -> int:
+        return self._ring.get_node(f'{company_id}@@@@@{name}')
+
+    def _discard_request(self, request_id: int) -> None:
+        """ Forgets the request which will not be answered, its input data is removed if worker did not read it """
+        self._futures.pop(request_id, None)
+        packed_when_data = self._requests_data.pop(request_id, None)
+        if packed_when_data is not None:
+            discard_data(packed_when_data)
+
+    def _get_worker_queue(self, index: int):
+        if self._results_queue is None:
+            self._results_queue = ctx.Queue()
+            threading.Thread(target=self._read_results, daemon=True).start()
+        if self._is_stop_registered is False:
+            atexit.register(self.stop)
+            self._is_stop_registered = True
+        worker = self._workers[index]
+        if worker is None or worker.is_alive() is False:
+            if worker is not None:
+                log.warning(f'Inference worker {index} is dead (exit code {worker.exitcode}), restart it')
+                self.restarts += 1
+                # requests of the dead worker will not be answered
+                for request_id, (future, worker_index) in list(self._futures.items()):
+                    if worker_index == index:
+                        self._discard_request(request_id)
+                        future.set_exception(Exception('Inference worker died while making prediction'))
+            self._queues[index] = ctx.Queue(maxsize=self.queue_size)
+            worker = InferenceWorker(self._queues[index], self._results_queue)
+            worker.start()
+            self._workers[index] = worker
+        return self._queues[index]
+
+    def _read_results(self) -> None:
+        while True:
+            request_id, packed_result, error = self._results_queue.get()
+            with self._lock:
+                future, _ = self._futures.pop(request_id, (None, None))
+                # worker has read input data of the request
+                self._requests_data.pop(request_id, None)
+            if future is None:
+                # request is timed out already
+                if packed_result is not None:
+                    discard_data(packed_result)
+                continue
+            if error is not None:
+                future.set_exception(Exception(error))
+                continue
+            try:
+                future.set_result(unpack_data(packed_result))
+            except Exception as e:
+                future.set_exception(e)
+
+    def predict(self, name: str, when_data: Any, pred_format: str, company_id: int) -> Any:
+        """ Same as ModelController._predict, but it is made in the worker of the predictor """
+        if isinstance(when_data, dict) and not ('kwargs' in when_data and 'args' in when_data):
+            when_data = [when_data]
+        if isinstance(when_data, list):
+            when_data = pd.DataFrame(when_data)
+
+        index = self.get_worker_index(name, company_id)
+        future = Future()
+        with self._lock:
+            requests_queue = self._get_worker_queue(index)
+            request_id = next(self._request_ids)
+            self._futures[request_id] = (future, index)
+            self.requests[index] += 1
+
+        packed_when_data = pack_data(when_data)
+        with self._lock:
+            if request_id not in self._futures:
+                # request is failed already: pool is stopped, or worker died
+                discard_data(packed_when_data)
+                return future.result()
+            self._requests_data[request_id] = packed_when_data
+        try:
+            requests_queue.put(
+                (request_id, name, packed_when_data, pred_format, company_id),
+                timeout=self.queue_timeout
+            )
+        except queue.Full:
+            with self._lock:
+                self._discard_request(request_id)
+                self.rejected += 1
+            raise Exception(f'Inference worker {index} is busy, prediction of {name} is rejected')
+
+        deadline = time.time() + self.timeout
+        while True:
+            try:
+                return future.result(timeout=min(WORKER_CHECK_INTERVAL, max(deadline - time.time(), 0)))
+            except FutureTimeoutError:
+                pass
+            if time.time() >= deadline:
+                error = f'Prediction of {name} is not done in {self.timeout} seconds'
+            elif self._workers[index] is not None and self._workers[index].is_alive() is False:
+                error = f'Inference worker {index} died while making prediction of {name}'
+            else:
+                continue
+            with self._lock:
+                self._discard_request(request_id)
+            raise Exception(error)
+
+    def stop(self) -> None:
+        """ Stops workers, requests which are not answered get an error. It is called at exit of the process """
+        with self._lock:
+            for request_id, (future, _) in list(self._futures.items()):
+                self._discard_request(request_id)
+                future.set_exception(Exception('Inference pool is stopped'))
+            for index, worker in enumerate(self._workers):
+                if worker is not None and worker.is_alive():
+                    try:
+                        self._queues[index].put_nowait(None)
+                    except queue.Full:
+                        worker.terminate()
+            self._workers = [None] * self.workers_count
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            in_progress = [0] * self.workers_count
+            for _, index in self._futures.values():
+                in_progress[index] += 1
+            return {
+                'workers': [
+                    {
+                        'pid': worker.pid if worker is not None else None,
+                        'alive': worker is not None and worker.is_alive(),
+                        'requests': self.requests[index],
+                        'in_progress': in_progress[index]
+                    }
+                    for index, worker in enumerate(self._workers)
+                ],
+                'queue_size': self.queue_size,
+                'rejected': self.rejected,
+                'restarts': self.restarts
+            }
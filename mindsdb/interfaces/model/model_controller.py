@@ -1,13 +1,9 @@
 import os
 import sys
-import time
 import json
-import psutil
-import datetime
 from copy import deepcopy
-from contextlib import contextmanager
 from dateutil.parser import parse as parse_datetime
-from typing import Optional, Tuple, Union, Dict, Any
+from typing import Optional, Tuple, Union
 import requests
 from typing import List
 
@@ -24,9 +20,16 @@ import mindsdb_datasources
 from mindsdb import __version__ as mindsdb_version
 import mindsdb.interfaces.storage.db as db
 from mindsdb.utilities.functions import mark_process
+from mindsdb.utilities.fs import get_path_size
 from mindsdb.interfaces.database.database import DatabaseWrapper
 from mindsdb.utilities.config import Config
-from mindsdb.interfaces.storage.fs import FsStore
+from mindsdb.interfaces.storage.fs import FsStore, remove as remove_fs_copy
+from mindsdb.interfaces.model.predictor_cache import PredictorCache
+from mindsdb.interfaces.model.predict_batcher import PredictBatcher
+from mindsdb.interfaces.model.inference_pool import InferencePool
+from mindsdb.interfaces.model.prediction_cache import PredictionCache
+from mindsdb.interfaces.model.prediction_frame import PREDICTION_FRAME_COLUMNS
+from mindsdb.interfaces.model.predictor_catalog import get_predictor_catalog
 from mindsdb.utilities.log import log
 from mindsdb.interfaces.model.learn_process import LearnProcess, GenerateProcess, FitProcess, UpdateProcess, LearnRemoteProcess
 from mindsdb.interfaces.datastore.datastore import DataStore
@@ -38,52 +41,42 @@ IS_PY36 = sys.version_info[1] <= 6
 class ModelController():
     config: Config
     fs_store: FsStore
-    predictor_cache: Dict[str, Dict[str, Union[Any]]]
+    predictor_cache: PredictorCache
+    predict_batcher: Optional[PredictBatcher]
+    inference_pool: Optional[InferencePool]
+    prediction_cache: Optional[PredictionCache]
     ray_based: bool
 
     def __init__(self, ray_based: bool) -> None:
         self.config = Config()
         self.fs_store = FsStore()
-        self.predictor_cache = {}
+        self.predictor_cache = PredictorCache.from_config(self.config)
+        self.predict_batcher = PredictBatcher.from_config(self.config)
+        self.inference_pool = InferencePool.from_config(self.config)
+        self.prediction_cache = PredictionCache.from_config(self.config)
         self.ray_based = ray_based
 
     def _invalidate_cached_predictors(self) -> None:
         # @TODO: Cache will become stale if the respective ModelInterface is not invoked yet a bunch of predictors remained cached, no matter where we invoke it. In practice shouldn't be a big issue though
-        for predictor_name in list(self.predictor_cache.keys()):
-            if (datetime.datetime.now() - self.predictor_cache[predictor_name]['created']).total_seconds() > 1200:
-                del self.predictor_cache[predictor_name]
-
-    def _lock_predictor(self, id: int, mode: str) -> None:
-        from mindsdb.interfaces.storage.db import session, Semaphor
-
-        while True:
-            semaphor_record = session.query(Semaphor).filter_by(entity_id=id, entity_type='predictor').first()
-            if semaphor_record is not None:
-                if mode == 'read' and semaphor_record.action == 'read':
-                    return True
-            try:
-                semaphor_record = Semaphor(entity_id=id, entity_type='predictor', action=mode)
-                session.add(semaphor_record)
-                session.commit()
-                return True
-            except Exception:
-                pass
-            time.sleep(1)
-
-    def _unlock_predictor(self, id: int) -> None:
-        from mindsdb.interfaces.storage.db import session, Semaphor
-        semaphor_record = session.query(Semaphor).filter_by(entity_id=id, entity_type='predictor').first()
-        if semaphor_record is not None:
-            session.delete(semaphor_record)
-            session.commit()
-
-    @contextmanager
-    def _lock_context(self, id, mode: str):
-        try:
-            self._lock_predictor(id, mode)
-            yield True
-        finally:
-            self._unlock_predictor(id)
+        self.predictor_cache.invalidate_expired()
+
+    def get_predictor_cache_stats(self) -> dict:
+        return self.predictor_cache.get_stats()
+
+    def get_predict_batcher_stats(self) -> Optional[dict]:
+        if self.predict_batcher is None:
+            return None
+        return self.predict_batcher.get_stats()
+
+    def get_inference_pool_stats(self) -> Optional[dict]:
+        if self.inference_pool is None:
+            return None
+        return self.inference_pool.get_stats()
+
+    def get_prediction_cache_stats(self) -> Optional[dict]:
+        if self.prediction_cache is None:
+            return None
+        return self.prediction_cache.get_stats()
 
     def _get_from_data_df(self, from_data: dict) -> DataFrame:
         if from_data['class'] == 'QueryDS':
@@ -232,6 +225,30 @@ class ModelController():
 
     @mark_process(name='predict')
     def predict(self, name: str, when_data: Union[dict, list, pd.DataFrame], pred_format: str, company_id: int):
+        is_cacheable = self.prediction_cache is not None and self.prediction_cache.is_cacheable(when_data)
+        is_batchable = self.predict_batcher is not None and self.predict_batcher.is_batchable(when_data)
+        predictor = None
+        if is_cacheable or is_batchable:
+            predictor = get_predictor_catalog().get(company_id, [name]).get(name)
+        # rows of timeseries predictors are predicted together with their group, so they can not be mixed
+        is_row_wise = predictor is not None and predictor['metadata']['timeseries'] is False
+
+        # with inference pool the prediction is made in the worker process of the predictor
+        predict_fn = self._predict if self.inference_pool is None else self.inference_pool.predict
+
+        def predict_rows(name, when_data, pred_format, company_id):
+            if is_row_wise and self.predict_batcher is not None and self.predict_batcher.is_batchable(when_data):
+                return self.predict_batcher.predict(predict_fn, name, when_data, pred_format, company_id)
+            return predict_fn(name, when_data, pred_format, company_id)
+
+        if is_row_wise and is_cacheable:
+            return self.prediction_cache.predict(
+                predict_rows, name, when_data, pred_format, company_id,
+                predictor_id=predictor['id'], updated_at=predictor['updated_at']
+            )
+        return predict_rows(name, when_data, pred_format, company_id)
+
+    def _predict(self, name: str, when_data: Union[dict, list, pd.DataFrame], pred_format: str, company_id: int):
         original_name = name
         name = f'{company_id}@@@@@{name}'
 
@@ -271,81 +288,98 @@ class ModelController():
         else:
             fs_name = f'predictor_{company_id}_{predictor_record.id}'
 
-            if (
-                name in self.predictor_cache
-                and self.predictor_cache[name]['updated_at'] != predictor_record.updated_at
-            ):
-                del self.predictor_cache[name]
-
-            if name not in self.predictor_cache:
-                # Clear the cache entirely if we have less than 1.2 GB left
-                if psutil.virtual_memory().available < 1.2 * pow(10, 9):
-                    self.predictor_cache = {}
-
-                if predictor_data['status'] == 'complete':
-                    self.fs_store.get(fs_name, fs_name, self.config['paths']['predictors'])
-                    self.predictor_cache[name] = {
-                        'predictor': lightwood.predictor_from_state(
-                            os.path.join(self.config['paths']['predictors'], fs_name),
-                            predictor_record.code
-                        ),
-                        'updated_at': predictor_record.updated_at,
-                        'created': datetime.datetime.now(),
-                        'code': predictor_record.code,
-                        'pickle': str(os.path.join(self.config['paths']['predictors'], fs_name))
-                    }
-                else:
+            def load_predictor():
+                if predictor_data['status'] != 'complete':
                     raise Exception(
                         f'Trying to predict using predictor {original_name} with status: {predictor_data["status"]}. Error is: {predictor_data.get("error", "unknown")}'
                     )
-            predictions = self.predictor_cache[name]['predictor'].predict(df)
+                # predictor is read from storage in place if possible, so processes share one copy of the file
+                with self.fs_store.local_path(fs_name, fs_name, self.config['paths']['predictors']) as predictor_path:
+                    predictor = lightwood.predictor_from_state(predictor_path, predictor_record.code)
+                    return predictor, get_path_size(predictor_path)
+
+            predictor = self.predictor_cache.get_or_load(
+                name,
+                predictor_record.updated_at,
+                load_predictor,
+                code=predictor_record.code
+            )
+            predictions = predictor.predict(df)
             # Bellow is useful for debugging caching and storage issues
-            # del self.predictor_cache[name]
+            # self.predictor_cache.pop(name)
 
-        predictions = predictions.to_dict(orient='records')
         target = predictor_record.to_predict[0]
-        if pred_format in ('explain', 'dict', 'dict&explain'):
-            explain_arr = []
-            dict_arr = []
-            for i, row in enumerate(predictions):
-                obj = {
-                    target: {
-                        'predicted_value': row['prediction'],
-                        'confidence': row.get('confidence', None),
-                        'anomaly': row.get('anomaly', None),
-                        'truth': row.get('truth', None)
-                    }
-                }
-                if 'lower' in row:
-                    obj[target]['confidence_lower_bound'] = row.get('lower', None)
-                    obj[target]['confidence_upper_bound'] = row.get('upper', None)
-                    
-                explain_arr.append(obj)
-
-                td = {'predicted_value': row['prediction']}
-                for col in df.columns:
-                    if col in row:
-                        td[col] = row[col]
-                    elif f'order_{col}' in row:
-                        td[col] = row[f'order_{col}']
-                    elif f'group_{col}' in row:
-                        td[col] = row[f'group_{col}']
-                    else:
-                        orginal_index = row.get('original_index')
-                        if orginal_index is None:
-                            log.warning('original_index is None')
-                            orginal_index = i
-                        td[col] = df.iloc[orginal_index][col]
-                dict_arr.append({target: td})
-            if pred_format == 'explain':
-                return explain_arr
-            elif pred_format == 'dict':
-                return dict_arr
-            elif pred_format == 'dict&explain':
-                return dict_arr, explain_arr
+        if pred_format in ('explain', 'dict', 'dict&explain', 'frame'):
+            inputs, explain = self._make_prediction_frames(predictions, df)
+            if pred_format == 'frame':
+                return self._to_prediction_frame(inputs, explain, target)
+            result = []
+            if pred_format in ('dict', 'dict&explain'):
+                result.append([
+                    {target: {'predicted_value': predicted_value, **row}}
+                    for predicted_value, row in zip(explain['predicted_value'].tolist(), inputs.to_dict('records'))
+                ])
+            if pred_format in ('explain', 'dict&explain'):
+                result.append([{target: row} for row in explain.to_dict('records')])
+            return tuple(result) if len(result) > 1 else result[0]
         # New format -- Try switching to this in 2-3 months for speed, for now above is ok
         else:
-            return predictions
+            return predictions.to_dict(orient='records')
+
+    @staticmethod
+    def _make_prediction_frames(predictions: pd.DataFrame, df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """ Columns of the result of predictor, row by row with predictions:
+            inputs - values of columns of when_data, explain - predicted value, confidence and bounds
+        """
+        rows_count = len(predictions)
+
+        def get_column(name):
+            if name in predictions.columns:
+                return predictions[name].values
+            return np.full(rows_count, None, dtype=object)
+
+        original_index = None
+        inputs = {}
+        for col in df.columns:
+            if col in predictions.columns:
+                inputs[col] = predictions[col].values
+            elif f'order_{col}' in predictions.columns:
+                inputs[col] = predictions[f'order_{col}'].values
+            elif f'group_{col}' in predictions.columns:
+                inputs[col] = predictions[f'group_{col}'].values
+            else:
+                if original_index is None:
+                    original_index = pd.Series(get_column('original_index'))
+                    is_missed = original_index.isnull()
+                    if is_missed.any():
+                        log.warning('original_index is None')
+                        original_index[is_missed] = np.arange(rows_count)[is_missed.values]
+                    original_index = original_index.astype(int).values
+                inputs[col] = df[col].values.take(original_index)
+        inputs = pd.DataFrame(inputs, index=range(rows_count), columns=df.columns)
+
+        explain = pd.DataFrame({
+            'predicted_value': get_column('prediction'),
+            'confidence': get_column('confidence'),
+            'anomaly': get_column('anomaly'),
+            'truth': get_column('truth')
+        }, index=range(rows_count))
+        if 'lower' in predictions.columns:
+            explain['confidence_lower_bound'] = get_column('lower')
+            explain['confidence_upper_bound'] = get_column('upper')
+        return inputs, explain
+
+    @staticmethod
+    def _to_prediction_frame(inputs: pd.DataFrame, explain: pd.DataFrame, target: str) -> pd.DataFrame:
+        """ Result of predict in 'frame' format: columns of when_data, target column with predicted value,
+            and columns of explanation: {target}_confidence, _anomaly, _truth, _min and _max (if predictor has bounds)
+        """
+        frame = inputs.copy()
+        frame[target] = explain['predicted_value'].values
+        for name, suffix in PREDICTION_FRAME_COLUMNS.items():
+            if name in explain.columns:
+                frame[f'{target}_{suffix}'] = explain[name].values
+        return frame
 
     @mark_process(name='analyse')
     def analyse_dataset(self, ds: dict, company_id: int) -> lightwood.DataAnalysis:
@@ -466,10 +500,13 @@ class ModelController():
                 pass
         db.session.commit()
 
+        self.predictor_cache.pop(name)
         DatabaseWrapper(company_id).unregister_predictor(name)
 
         # delete from s3
-        self.fs_store.delete(f'predictor_{company_id}_{db_p.id}')
+        fs_name = f'predictor_{company_id}_{db_p.id}'
+        self.fs_store.delete(fs_name)
+        remove_fs_copy(os.path.join(self.config['paths']['predictors'], fs_name))
 
         return 0
 
@@ -488,6 +525,8 @@ class ModelController():
         assert predictor_record is not None
         predictor_record.update_status = 'updating'
         db.session.commit()
+        if self.prediction_cache is not None:
+            self.prediction_cache.invalidate(company_id, predictor_record.id)
 
         p = UpdateProcess(name, company_id)
         p.start()
@@ -560,6 +599,8 @@ class ModelController():
         assert predictor_record is not None
 
         df = self._get_from_data_df(from_data)
+        if self.prediction_cache is not None:
+            self.prediction_cache.invalidate(company_id, predictor_record.id)
         p = FitProcess(predictor_record.id, df)
         p.start()
         if join_learn_process:
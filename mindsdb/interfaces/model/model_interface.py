@@ -51,6 +51,18 @@ class ModelInterface():
     def code_from_json_ai(self, *args, **kwargs):
         return self.controller.code_from_json_ai(*args, **kwargs)
 
+    def get_predictor_cache_stats(self, *args, **kwargs):
+        return self.controller.get_predictor_cache_stats(*args, **kwargs)
+
+    def get_predict_batcher_stats(self, *args, **kwargs):
+        return self.controller.get_predict_batcher_stats(*args, **kwargs)
+
+    def get_inference_pool_stats(self, *args, **kwargs):
+        return self.controller.get_inference_pool_stats(*args, **kwargs)
+
+    def get_prediction_cache_stats(self, *args, **kwargs):
+        return self.controller.get_prediction_cache_stats(*args, **kwargs)
+
 
 ray_based = False
 
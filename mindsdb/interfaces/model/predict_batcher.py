@@ -0,0 +1,181 @@
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from mindsdb.utilities.log import log
+
+
+class _Batch():
+    def __init__(self):
+        self.requests: List[List[dict]] = []
+        self.rows_count = 0
+        self.is_closed = threading.Event()
+        self.is_done = threading.Event()
+        self.results: List[Any] = []
+        self.errors: List[Optional[Exception]] = []
+
+
+class PredictBatcher():
+    """ Coalesces concurrent predict requests for the same predictor into one call.
+
+    First request for a predictor opens a batch and waits up to `max_wait` seconds, or until the batch
+    has `max_batch_rows` rows. Requests which come from other connections in this time are added to the
+    batch. Then one predict is made for rows of all requests, and its result is split back by requests.
+    If the batched predict fails, requests are predicted one by one, so an error of one request does
+    not affect others.
+
+    Args:
+        max_wait: float, seconds which first request of the batch waits for others
+        max_batch_rows: int, batch is predicted as soon as it has this number of rows
+    """
+
+    def __init__(self, max_wait: float = 0.002, max_batch_rows: int = 256):
+        self.max_wait = max_wait
+        self.max_batch_rows = max_batch_rows
+        self._batches: Dict[Tuple, _Batch] = {}
+        self._lock = threading.Lock()
+        self.queue_requests = 0
+        self.queue_rows = 0
+        self.batches = 0
+        self.batched_requests = 0
+        self.batched_rows = 0
+        self.max_batch_size = 0
+        self.fallbacks = 0
+
+    @classmethod
+    def from_config(cls, config) -> Optional['PredictBatcher']:
+        batching_config = config.get('predict_batching', {})
+        if batching_config.get('enabled', False) is False:
+            return None
+        return cls(
+            max_wait=batching_config.get('max_wait_ms', 2) / 1000,
+            max_batch_rows=batching_config.get('max_batch_rows', 256)
+        )
+
+    def is_batchable(self, when_data: Any) -> bool:
+        """ Only small requests of rows are batched: point lookups, not datasources """
+        if isinstance(when_data, dict):
+            return not ('kwargs' in when_data and 'args' in when_data)
+        return isinstance(when_data, list) and 0 < len(when_data) < self.max_batch_rows \
+            and all(isinstance(row, dict) for row in when_data)
+
+    def _close(self, key: Tuple, batch: _Batch) -> None:
+        if self._batches.get(key) is batch:
+            del self._batches[key]
+            self.queue_requests -= len(batch.requests)
+            self.queue_rows -= batch.rows_count
+        batch.is_closed.set()
+
+    def predict(self, predict_fn: Callable, name: str, when_data: Any, pred_format: str, company_id: int) -> Any:
+        """ Same as predict_fn(name, when_data, pred_format, company_id), but may be done in a batch """
+        rows = [when_data] if isinstance(when_data, dict) else when_data
+        columns = set()
+        for row in rows:
+            columns.update(row.keys())
+        # rows of the batch must have the same columns, missing column is not the same as NULL
+        key = (company_id, name, pred_format, tuple(sorted(columns)))
+
+        with self._lock:
+            batch = self._batches.get(key)
+            if batch is not None and batch.rows_count + len(rows) > self.max_batch_rows:
+                self._close(key, batch)
+                batch = None
+            is_leader = batch is None
+            if is_leader:
+                batch = _Batch()
+                self._batches[key] = batch
+            index = len(batch.requests)
+            batch.requests.append(rows)
+            batch.rows_count += len(rows)
+            self.queue_requests += 1
+            self.queue_rows += len(rows)
+            if batch.rows_count >= self.max_batch_rows:
+                self._close(key, batch)
+
+        if is_leader:
+            batch.is_closed.wait(self.max_wait)
+            with self._lock:
+                self._close(key, batch)
+            self._run(batch, predict_fn, name, pred_format, company_id)
+        else:
+            batch.is_done.wait()
+
+        error = batch.errors[index]
+        if error is not None:
+            raise error
+        return batch.results[index]
+
+    def _run(self, batch: _Batch, predict_fn: Callable, name: str, pred_format: str, company_id: int) -> None:
+        requests_count = len(batch.requests)
+        batch.results = [None] * requests_count
+        batch.errors = [None] * requests_count
+        with self._lock:
+            self.batches += 1
+            self.batched_requests += requests_count
+            self.batched_rows += batch.rows_count
+            self.max_batch_size = max(self.max_batch_size, batch.rows_count)
+        try:
+            if requests_count == 1:
+                try:
+                    batch.results[0] = predict_fn(name, batch.requests[0], pred_format, company_id)
+                except Exception as e:
+                    batch.errors[0] = e
+                return
+            try:
+                result = predict_fn(
+                    name, [row for rows in batch.requests for row in rows], pred_format, company_id
+                )
+                batch.results = self._split(result, [len(rows) for rows in batch.requests])
+            except Exception as e:
+                batch_error = e
+                for i, rows in enumerate(batch.requests):
+                    try:
+                        batch.results[i] = predict_fn(name, rows, pred_format, company_id)
+                    except Exception as e:
+                        batch.errors[i] = e
+                with self._lock:
+                    self.fallbacks += 1
+                try:
+                    log.warning(f'Batched predict of {name} failed, requests are predicted one by one: {batch_error}')
+                except Exception:
+                    # requests are predicted already, failed logging must not fail them
+                    pass
+        finally:
+            batch.is_done.set()
+
+    @staticmethod
+    def _split(result: Any, lengths: List[int]) -> List[Any]:
+        """ Splits result of the batch by requests. Result is list with item for each row,
+            tuple of such lists for 'dict&explain' format, or DataFrame for 'frame' format
+        """
+        parts = list(result) if isinstance(result, tuple) else [result]
+        total = sum(lengths)
+        for part in parts:
+            if isinstance(part, (list, pd.DataFrame)) is False or len(part) != total:
+                raise Exception('Number of predictions is not equal to number of rows')
+        results = []
+        start = 0
+        for length in lengths:
+            request_parts = [
+                part.iloc[start:start + length].reset_index(drop=True) if isinstance(part, pd.DataFrame)
+                else part[start:start + length]
+                for part in parts
+            ]
+            results.append(tuple(request_parts) if isinstance(result, tuple) else request_parts[0])
+            start += length
+        return results
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                'queue_requests': self.queue_requests,
+                'queue_rows': self.queue_rows,
+                'batches': self.batches,
+                'batched_requests': self.batched_requests,
+                'batched_rows': self.batched_rows,
+                'avg_batch_requests': self.batched_requests / self.batches if self.batches > 0 else 0.,
+                'avg_batch_rows': self.batched_rows / self.batches if self.batches > 0 else 0.,
+                'max_batch_rows': self.max_batch_size,
+                'fallbacks': self.fallbacks
+            }
@@ -0,0 +1,181 @@
+import copy
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+
+class PredictionCache():
+    """ Cache of prediction results by input rows.
+
+    Result of each row is stored under key (company_id, predictor id, updated_at, pred_format, hash of row),
+    so a retrained predictor never gets results of its previous version. If only some rows of a request
+    are cached, only the rest rows are predicted. Entries are evicted in LRU order when there are more
+    than `max_rows` of them, and are expired after `ttl` seconds.
+
+    Only predictions of non-timeseries predictors can be cached: their result has one row for each
+    input row, and does not depend on other rows of the request.
+
+    Args:
+        max_rows: int, max number of cached rows
+        ttl: int, seconds after which row is predicted again, None - never
+    """
+
+    def __init__(self, max_rows: int = 100000, ttl: Optional[int] = 300):
+        self.max_rows = max_rows
+        self.ttl = ttl
+        self._entries: Dict[Tuple, Tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_config(cls, config) -> Optional['PredictionCache']:
+        cache_config = config.get('prediction_cache', {})
+        if cache_config.get('enabled', False) is False:
+            return None
+        return cls(
+            max_rows=cache_config.get('max_rows', 100000),
+            ttl=cache_config.get('ttl', 300)
+        )
+
+    def is_cacheable(self, when_data: Any) -> bool:
+        """ Only rows can be cached, not datasources """
+        if isinstance(when_data, dict):
+            return not ('kwargs' in when_data and 'args' in when_data)
+        return isinstance(when_data, list) and len(when_data) > 0 \
+            and all(isinstance(row, dict) for row in when_data)
+
+    @staticmethod
+    def hash_row(row: dict) -> str:
+        # repr keeps type of value, so datetime and string with the same text have different hashes
+        return hashlib.sha1(json.dumps(row, sort_keys=True, default=repr).encode()).hexdigest()
+
+    @staticmethod
+    def _split_rows(result: Any, rows_count: int) -> Optional[List[Tuple]]:
+        """ Splits result to results of rows, None - if result is not row by row.
+            Row of DataFrame is kept as mapping of column to value, because the same row may be
+            in other request with other order of columns.
+        """
+        if isinstance(result, pd.DataFrame):
+            if len(result) != rows_count:
+                return None
+            columns = list(result.columns)
+            return [('frame', dict(zip(columns, values))) for values in result.itertuples(index=False, name=None)]
+        if isinstance(result, tuple):
+            if any(isinstance(part, list) is False or len(part) != rows_count for part in result):
+                return None
+            return [('tuple', items) for items in zip(*result)]
+        if isinstance(result, list) and len(result) == rows_count:
+            return [('list', item) for item in result]
+        return None
+
+    @staticmethod
+    def _join_rows(rows: List[Tuple], columns: Optional[List[str]] = None) -> Any:
+        """ Result of request made of results of its rows. Columns of DataFrame are `columns` which are
+            in the rows (columns of the request), and then other columns of the rows
+        """
+        kind = rows[0][0]
+        # results are copied, because caller may change them
+        if kind == 'list':
+            return [copy.deepcopy(item) for _, item in rows]
+        if kind == 'tuple':
+            return tuple(list(copy.deepcopy(part)) for part in zip(*[items for _, items in rows]))
+        rows_columns = []
+        for _, row in rows:
+            rows_columns.extend(column for column in row if column not in rows_columns)
+        columns = [column for column in columns or [] if column in rows_columns]
+        columns.extend(column for column in rows_columns if column not in columns)
+        return pd.DataFrame([[row.get(column) for column in columns] for _, row in rows], columns=columns)
+
+    def _get(self, key: Tuple) -> Optional[Tuple]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        created, value = entry
+        if self.ttl is not None and time.time() - created > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _put(self, key: Tuple, value: Tuple) -> None:
+        # value is copied, because the same objects are returned to caller, which may change them
+        self._entries[key] = (time.time(), copy.deepcopy(value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_rows:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def predict(self, predict_fn: Callable, name: str, when_data: Any, pred_format: str, company_id: int,
+                predictor_id: int, updated_at: Any) -> Any:
+        """ Same as predict_fn(name, when_data, pred_format, company_id), but cached rows are not predicted """
+        rows = [when_data] if isinstance(when_data, dict) else when_data
+        keys = [(company_id, predictor_id, updated_at, pred_format, self.hash_row(row)) for row in rows]
+
+        with self._lock:
+            results = [self._get(key) for key in keys]
+        missed = {}
+        for key, row, result in zip(keys, rows, results):
+            if result is None and key not in missed:
+                missed[key] = row
+        with self._lock:
+            self.hits += len(rows) - len(missed)
+            self.misses += len(missed)
+
+        if len(missed) == len(rows):
+            # nothing is cached, so the request is predicted as is
+            result = predict_fn(name, when_data, pred_format, company_id)
+            predicted = self._split_rows(result, len(rows))
+            if predicted is not None:
+                with self._lock:
+                    for key, value in zip(keys, predicted):
+                        self._put(key, value)
+            return result
+
+        # columns of input rows go first in predicted DataFrame
+        columns = []
+        for row in rows:
+            columns.extend(column for column in row if column not in columns)
+        if len(missed) > 0:
+            result = predict_fn(name, list(missed.values()), pred_format, company_id)
+            if isinstance(result, pd.DataFrame):
+                columns = list(result.columns)
+            predicted = self._split_rows(result, len(missed))
+            if predicted is None:
+                # cached rows were split from results of the same version of predictor, so its results are
+                # row by row. Missed rows are not predicted again with the whole request
+                raise Exception(f'Result of prediction of {name} does not have a row for each input row')
+            predicted = dict(zip(missed.keys(), predicted))
+            with self._lock:
+                for key, value in predicted.items():
+                    self._put(key, value)
+            results = [predicted[key] if result is None else result for key, result in zip(keys, results)]
+
+        return self._join_rows(results, columns)
+
+    def invalidate(self, company_id: int, predictor_id: Optional[int] = None) -> None:
+        """ Forgets results of the predictor, or of all predictors of the company """
+        with self._lock:
+            for key in list(self._entries.keys()):
+                if key[0] == company_id and (predictor_id is None or key[1] == predictor_id):
+                    del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_rows': self.max_rows,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
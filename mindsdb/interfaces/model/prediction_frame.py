@@ -0,0 +1,12 @@
+""" Layout of prediction in 'frame' format. It is used by API processes too, so this module
+    must not import ModelController and its dependencies.
+"""
+
+# columns of explanation in 'frame' format of prediction, they are named as {target}_{suffix}
+PREDICTION_FRAME_COLUMNS = {
+    'confidence': 'confidence',
+    'anomaly': 'anomaly',
+    'truth': 'truth',
+    'confidence_lower_bound': 'min',
+    'confidence_upper_bound': 'max'
+}
@@ -0,0 +1,211 @@
+import datetime
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import psutil
+
+from mindsdb.utilities.fs import get_path_size
+from mindsdb.utilities.log import log
+
+
+class PredictorCache():
+    """ In-memory cache of loaded predictors with a byte budget.
+
+    Size of each entry is estimated by the size of the unpacked predictor on disk.
+    When the budget is exceeded, or when the host runs low on memory, entries are
+    evicted one at a time (least recently or least frequently used first) until
+    the deficit is covered. Pinned entries are never evicted, only replaced when
+    the predictor gets retrained. Concurrent misses of the same predictor are
+    loaded once (see get_or_load).
+
+    Args:
+        max_size: int, bytes budget for all cached predictors, None - unlimited
+        min_free_memory: int, bytes of system memory that should stay available, None - no limit
+        ttl: int, seconds after which entry is considered expired, None - never
+        policy: str, 'lru' or 'lfu'
+        pinned: list of str, names of predictors which must not be evicted
+    """
+
+    POLICIES = ('lru', 'lfu')
+
+    def __init__(self, max_size: Optional[int] = None, min_free_memory: Optional[int] = None,
+                 ttl: Optional[int] = None, policy: str = 'lru', pinned: Optional[List[str]] = None):
+        if policy not in self.POLICIES:
+            raise Exception(f"Unknown predictor cache policy: '{policy}', expected one of {self.POLICIES}")
+        self.max_size = max_size
+        self.min_free_memory = min_free_memory
+        self.ttl = ttl
+        self.policy = policy
+        self._pinned = set(pinned or [])
+        self._entries: Dict[str, Dict[str, Any]] = OrderedDict()
+        self._lock = threading.RLock()
+        self._loading: Dict[str, threading.Lock] = {}
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_config(cls, config) -> 'PredictorCache':
+        cache_config = config.get('predictor_cache', {})
+        max_size = cache_config.get('max_size_mb')
+        min_free_memory = cache_config.get('min_free_memory_mb')
+        return cls(
+            max_size=int(max_size * pow(2, 20)) if max_size is not None else None,
+            min_free_memory=int(min_free_memory * pow(2, 20)) if min_free_memory is not None else None,
+            ttl=cache_config.get('ttl'),
+            policy=cache_config.get('policy', 'lru'),
+            pinned=cache_config.get('pinned', [])
+        )
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def is_pinned(self, name: str) -> bool:
+        # pinned names may be set with or without the company prefix
+        return name in self._pinned or name.split('@@@@@')[-1] in self._pinned
+
+    def pin(self, name: str) -> None:
+        self._pinned.add(name)
+
+    def unpin(self, name: str) -> None:
+        self._pinned.discard(name)
+
+    def get(self, name: str, updated_at: Optional[datetime.datetime] = None) -> Optional[Any]:
+        """ Returns cached predictor, or None if it is not cached or was retrained since """
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and updated_at is not None and entry['updated_at'] != updated_at:
+                self._remove(name)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            entry['hits'] += 1
+            entry['last_used'] = datetime.datetime.now()
+            self._entries.move_to_end(name)
+            return entry['predictor']
+
+    def get_or_load(self, name: str, updated_at: datetime.datetime,
+                    load: Callable[[], Tuple[Any, Optional[str]]], code: Optional[str] = None) -> Any:
+        """ Returns cached predictor, or loads it and puts to the cache. Only one thread loads the predictor,
+            others which miss it at the same time wait for the load and take the result from the cache.
+            Args:
+                load: function which returns loaded predictor and size of its file
+        """
+        predictor = self.get(name, updated_at)
+        if predictor is not None:
+            return predictor
+        with self._lock:
+            loading_lock = self._loading.setdefault(name, threading.Lock())
+        try:
+            with loading_lock:
+                with self._lock:
+                    entry = self._entries.get(name)
+                    if entry is not None and entry['updated_at'] == updated_at:
+                        # loaded by other thread while this one waited
+                        return self.get(name, updated_at)
+                predictor, size = load()
+                self.put(name, predictor, updated_at=updated_at, code=code, size=size)
+                return predictor
+        finally:
+            with self._lock:
+                if self._loading.get(name) is loading_lock:
+                    del self._loading[name]
+
+    def put(self, name: str, predictor: Any, updated_at: datetime.datetime,
+            code: Optional[str] = None, path: Optional[str] = None, size: Optional[int] = None) -> None:
+        if size is None:
+            size = get_path_size(path) if path is not None else 0
+        with self._lock:
+            if name in self._entries:
+                self._remove(name)
+            self.invalidate_expired()
+            self._make_room(size)
+            now = datetime.datetime.now()
+            self._entries[name] = {
+                'predictor': predictor,
+                'updated_at': updated_at,
+                'created': now,
+                'last_used': now,
+                'code': code,
+                'pickle': path,
+                'size': size,
+                'hits': 0
+            }
+            self.size += size
+
+    def pop(self, name: str) -> None:
+        with self._lock:
+            if name in self._entries:
+                self._remove(name)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def invalidate_expired(self) -> None:
+        if self.ttl is None:
+            return
+        now = datetime.datetime.now()
+        with self._lock:
+            for name in list(self._entries.keys()):
+                entry = self._entries[name]
+                if self.is_pinned(name):
+                    continue
+                if (now - entry['created']).total_seconds() > self.ttl:
+                    self._remove(name)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                'policy': self.policy,
+                'entries': len(self._entries),
+                'size': self.size,
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'pinned': [name for name in self._entries if self.is_pinned(name)]
+            }
+
+    def _remove(self, name: str) -> None:
+        entry = self._entries.pop(name)
+        self.size -= entry['size']
+
+    def _pick_victim(self) -> Optional[str]:
+        candidates = [name for name in self._entries if not self.is_pinned(name)]
+        if len(candidates) == 0:
+            return None
+        if self.policy == 'lfu':
+            # min() keeps the first of equal elements, so ties are resolved in LRU order
+            return min(candidates, key=lambda name: self._entries[name]['hits'])
+        return candidates[0]
+
+    def _get_deficit(self, incoming_size: int) -> int:
+        deficit = 0
+        if self.max_size is not None:
+            deficit = max(deficit, self.size + incoming_size - self.max_size)
+        if self.min_free_memory is not None:
+            # incoming predictor is already loaded, so it is accounted in available memory
+            deficit = max(deficit, self.min_free_memory - psutil.virtual_memory().available)
+        return deficit
+
+    def _make_room(self, incoming_size: int) -> None:
+        # memory of evicted predictors is not returned to the system immediately,
+        # so freed size is tracked by estimates instead of re-checking psutil
+        deficit = self._get_deficit(incoming_size)
+        while deficit > 0:
+            victim = self._pick_victim()
+            if victim is None:
+                log.warning(f'Predictor cache is over budget by {deficit} bytes, but there is nothing left to evict')
+                break
+            deficit -= self._entries[victim]['size']
+            self._remove(victim)
+            self.evictions += 1
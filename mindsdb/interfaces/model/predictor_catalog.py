@@ -0,0 +1,120 @@
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+import mindsdb.interfaces.storage.db as db
+
+
+class PredictorCatalog():
+    """ In-memory catalog of predictors metadata needed to plan sql queries.
+
+    Every entry keeps the planner metadata (timeseries settings) and dtypes of one predictor,
+    decoded once from `learn_args` and `data`. Entry is versioned by (id, updated_at) of the
+    predictor record: on lookup only these two columns are selected for the requested names,
+    and heavy json columns are loaded again only for predictors which changed since.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Tuple[int, str], dict] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _make_entry(record) -> Optional[dict]:
+        if not isinstance(record.data, dict) or 'error' in record.data:
+            return None
+        ts_settings = (record.learn_args or {}).get('timeseries_settings', {})
+        if ts_settings.get('is_timeseries') is True:
+            group_by = ts_settings.get('group_by')
+            if isinstance(group_by, list) is False and group_by is not None:
+                group_by = [group_by]
+            metadata = {
+                'timeseries': True,
+                'window': ts_settings.get('window'),
+                'horizon': ts_settings.get('horizon'),
+                'order_by_column': ts_settings.get('order_by')[0],
+                'group_by_columns': group_by
+            }
+        else:
+            metadata = {
+                'timeseries': False
+            }
+        return {
+            'id': record.id,
+            'updated_at': record.updated_at,
+            'metadata': metadata,
+            'dtypes': record.data.get('dtypes', {})
+        }
+
+    def get(self, company_id: Optional[int], names: Iterable[str]) -> Dict[str, dict]:
+        """ Returns metadata of predictors with given names, names which are not predictors are skipped
+            Args:
+                company_id: int
+                names: iterable of str, names of tables referenced by query
+            Returns:
+                dict: predictor name -> {'id': int, 'updated_at': datetime, 'metadata': dict, 'dtypes': dict}
+        """
+        names = set(names)
+        if len(names) == 0:
+            return {}
+
+        versions = db.session.query(
+            db.Predictor.id, db.Predictor.name, db.Predictor.updated_at
+        ).filter(
+            db.Predictor.company_id == company_id,
+            db.Predictor.name.in_(names)
+        ).all()
+
+        result = {}
+        stale_ids = []
+        with self._lock:
+            for record_id, name, updated_at in versions:
+                entry = self._entries.get((company_id, name))
+                if entry is not None and entry['id'] == record_id and entry['updated_at'] == updated_at:
+                    self.hits += 1
+                    if entry['value'] is not None:
+                        result[name] = entry['value']
+                else:
+                    self.misses += 1
+                    stale_ids.append(record_id)
+            # forget predictors which were deleted
+            found = set(name for _, name, _ in versions)
+            for name in names - found:
+                self._entries.pop((company_id, name), None)
+
+        if len(stale_ids) > 0:
+            records = db.session.query(db.Predictor).filter(db.Predictor.id.in_(stale_ids)).all()
+            with self._lock:
+                for record in records:
+                    value = self._make_entry(record)
+                    self._entries[(company_id, record.name)] = {
+                        'id': record.id,
+                        'updated_at': record.updated_at,
+                        'value': value
+                    }
+                    if value is not None:
+                        result[record.name] = value
+        return result
+
+    def invalidate(self, company_id: Optional[int], name: Optional[str] = None) -> None:
+        with self._lock:
+            if name is not None:
+                self._entries.pop((company_id, name), None)
+            else:
+                for key in [key for key in self._entries if key[0] == company_id]:
+                    del self._entries[key]
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+_predictor_catalog = PredictorCatalog()
+
+
+def get_predictor_catalog() -> PredictorCatalog:
+    return _predictor_catalog
@@ -0,0 +1,143 @@
+import os
+import json
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from mindsdb.utilities.fs import create_directory, get_path_size, FileLock
+
+
+META_SUFFIX = '.meta.json'
+
+# how many times entry is taken under shared lock if it is evicted right after fetching,
+# the last time it is used under exclusive lock
+FETCH_ATTEMPTS = 3
+
+
+class FileCache():
+    ''' On-disk cache of remote content shared by all processes of the host.
+
+        Every entry is a directory with unpacked content and its etag. Entry is fetched again only
+        if etag of the remote content changed. Access to an entry is guarded by a file lock: readers
+        hold it shared, refresh and eviction take it exclusive, so an entry is never removed while
+        it is read. Least recently used entries are evicted when total size exceeds `max_size`,
+        time of the last use is the mtime of the entry's meta file.
+
+        Args:
+            path: str, cache directory
+            max_size: int, size limit in bytes, None - unlimited
+    '''
+
+    def __init__(self, path: str, max_size: Optional[int] = None):
+        self.path = path
+        self.max_size = max_size
+        create_directory(path)
+
+    def _entry_path(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _meta_path(self, name: str) -> str:
+        return os.path.join(self.path, f'.{name}{META_SUFFIX}')
+
+    def _lock(self, name: str) -> FileLock:
+        return FileLock(os.path.join(self.path, f'.{name}.lock'))
+
+    def _read_meta(self, name: str) -> dict:
+        try:
+            with open(self._meta_path(name), 'r') as fp:
+                return json.load(fp)
+        except Exception:
+            return {}
+
+    def _write_meta(self, name: str, meta: dict) -> None:
+        tmp_path = f'{self._meta_path(name)}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as fp:
+            json.dump(meta, fp)
+        os.replace(tmp_path, self._meta_path(name))
+
+    def _is_valid(self, name: str, etag: str) -> bool:
+        return self._read_meta(name).get('etag') == etag and os.path.isdir(self._entry_path(name))
+
+    def _touch(self, name: str) -> None:
+        # last use is the mtime of the meta file, it is updated without rewriting the file, best effort
+        try:
+            os.utime(self._meta_path(name))
+        except OSError:
+            pass
+
+    @contextmanager
+    def open(self, name: str, etag: str, fetch: Callable[[str], None]):
+        ''' Yields path to the directory with cached content of `name`
+            Args:
+                name: str, name of the entry, must be a valid file name
+                etag: str, etag of the remote content
+                fetch: function which puts the remote content into the directory passed to it
+        '''
+        lock = self._lock(name)
+        entry_path = self._entry_path(name)
+        is_fetched = False
+        try:
+            for attempt in range(FETCH_ATTEMPTS):
+                lock.acquire(shared=True)
+                if self._is_valid(name, etag):
+                    break
+                # entry is missing or stale: it is fetched under exclusive lock
+                lock.acquire()
+                if not self._is_valid(name, etag):
+                    tmp_path = tempfile.mkdtemp(dir=self.path, prefix=f'.{name}.')
+                    try:
+                        fetch(tmp_path)
+                    except Exception:
+                        shutil.rmtree(tmp_path, ignore_errors=True)
+                        raise
+                    shutil.rmtree(entry_path, ignore_errors=True)
+                    os.rename(tmp_path, entry_path)
+                    self._write_meta(name, {'etag': etag, 'size': get_path_size(entry_path)})
+                    is_fetched = True
+                if attempt == FETCH_ATTEMPTS - 1:
+                    # entry is valid and can not be evicted while exclusive lock is held, so it is used under it
+                    break
+                # flock conversion is not atomic: lock is released before it is taken shared again,
+                # so the entry may be evicted in between and is checked once more
+            self._touch(name)
+            if is_fetched:
+                self._evict()
+            yield entry_path
+        finally:
+            lock.release()
+
+    def _evict(self) -> None:
+        if self.max_size is None:
+            return
+        evict_lock = FileLock(os.path.join(self.path, '.evict.lock'))
+        if not evict_lock.acquire(blocking=False):
+            # another process is evicting already
+            return
+        try:
+            entries = []
+            for file_name in os.listdir(self.path):
+                if file_name.startswith('.') and file_name.endswith(META_SUFFIX):
+                    name = file_name[1:-len(META_SUFFIX)]
+                    try:
+                        last_used = os.path.getmtime(self._meta_path(name))
+                    except OSError:
+                        continue
+                    entries.append((name, self._read_meta(name), last_used))
+            total_size = sum(meta.get('size', 0) for _, meta, _ in entries)
+            entries.sort(key=lambda x: x[2])
+            for name, meta, _ in entries:
+                if total_size <= self.max_size:
+                    break
+                lock = self._lock(name)
+                # entries which are in use are skipped
+                if not lock.acquire(blocking=False):
+                    continue
+                try:
+                    shutil.rmtree(self._entry_path(name), ignore_errors=True)
+                    os.remove(self._meta_path(name))
+                    total_size -= meta.get('size', 0)
+                finally:
+                    lock.release()
+        finally:
+            evict_lock.release()
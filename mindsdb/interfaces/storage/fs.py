@@ -1,26 +1,154 @@
 import shutil
 import os
-from mindsdb.utilities.config import Config
-from checksumdir import dirhash
+import json
 import hashlib
+import threading
+from contextlib import contextmanager
+from functools import partial
+from urllib.parse import quote
+
+from mindsdb.utilities.config import Config
+from mindsdb.interfaces.storage.s3_stream import CODECS, check_codec, upload_archive, download_archive
+from mindsdb.interfaces.storage.file_cache import FileCache
+
+
+MANIFEST_SUFFIX = '.manifest.json'
+
+
+def _get_manifest_path(path):
+    path = os.path.normpath(path)
+    return os.path.join(os.path.dirname(path), f'.{os.path.basename(path)}{MANIFEST_SUFFIX}')
+
+
+def _read_manifest(path):
+    try:
+        with open(_get_manifest_path(path), 'r') as fp:
+            return json.load(fp)
+    except Exception:
+        return {}
+
+
+def _write_manifest(path, files):
+    manifest_path = _get_manifest_path(path)
+    tmp_path = f'{manifest_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp_path, 'w') as fp:
+        json.dump({'files': files}, fp)
+    os.replace(tmp_path, manifest_path)
+
+
+def _file_hash(path):
+    md5 = hashlib.md5()
+    with open(path, 'rb') as fp:
+        for chunk in iter(lambda: fp.read(pow(2, 20)), b''):
+            md5.update(chunk)
+    return md5.hexdigest()
+
+
+def _list_files(path):
+    ''' yields pairs (path relative to `path`, os.stat_result) for a file or for every file in a directory '''
+    if os.path.isfile(path):
+        yield '.', os.stat(path)
+        return
+    for dirpath, _dirnames, filenames in os.walk(path):
+        for filename in filenames:
+            file_path = os.path.join(dirpath, filename)
+            yield os.path.relpath(file_path, path), os.stat(file_path)
+
+
+def get_manifest(path, rehash=True):
+    ''' Returns manifest of a file or directory: {relative_path: {'size', 'mtime', 'hash'}}
+        Hashes are taken from the stored manifest for files whose size and mtime did not change.
+        Args:
+            path: str, path to file or directory
+            rehash: bool, if True then hash of changed files is calculated and stored manifest is updated,
+                otherwise hash of changed files is None
+        Returns:
+            dict
+    '''
+    if not os.path.exists(path):
+        return {}
+    stored = _read_manifest(path).get('files', {})
+    files = {}
+    is_modified = False
+    for rel_path, stat in _list_files(path):
+        entry = stored.get(rel_path)
+        if entry is None or entry['size'] != stat.st_size or entry['mtime'] != stat.st_mtime_ns:
+            is_modified = True
+            entry = {
+                'size': stat.st_size,
+                'mtime': stat.st_mtime_ns,
+                'hash': _file_hash(os.path.normpath(os.path.join(path, rel_path))) if rehash else None
+            }
+        files[rel_path] = entry
+    if rehash and (is_modified or len(files) != len(stored)):
+        _write_manifest(path, files)
+    return files
+
+
+def _remove_empty_dirs(root, rel_dirs):
+    ''' Removes directories which became empty, going up to `root` (it is kept) '''
+    for rel_dir in sorted(rel_dirs, key=len, reverse=True):
+        while rel_dir not in ('', '.'):
+            dir_path = os.path.join(root, rel_dir)
+            if not os.path.isdir(dir_path) or len(os.listdir(dir_path)) > 0:
+                break
+            os.rmdir(dir_path)
+            rel_dir = os.path.dirname(rel_dir)
+
+
+def remove(path):
+    ''' Removes file or directory together with its manifest '''
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+    elif os.path.exists(path):
+        os.remove(path)
+    try:
+        os.remove(_get_manifest_path(path))
+    except FileNotFoundError:
+        pass
 
 
 def copy(src, dst):
-    if os.path.isdir(src):
-        if os.path.exists(dst):
-            if dirhash(src) == dirhash(dst):
-                return
-        shutil.rmtree(dst, ignore_errors=True)
-        shutil.copytree(src, dst)
-    else:
-        if os.path.exists(dst):
-            if hashlib.md5(open(src, 'rb').read()).hexdigest() == hashlib.md5(open(dst, 'rb').read()).hexdigest():
-                return
-        try:
+    ''' Syncs `dst` with `src` copying only files whose hash differs.
+        Files are compared by manifests, so hashes are calculated only for files changed since the last copy.
+    '''
+    if not os.path.exists(src):
+        raise FileNotFoundError(src)
+    src_files = get_manifest(src)
+    if os.path.realpath(src) == os.path.realpath(dst):
+        return
+    if os.path.isdir(src) != os.path.isdir(dst) and os.path.exists(dst):
+        if os.path.isdir(dst):
+            shutil.rmtree(dst, ignore_errors=True)
+        else:
             os.remove(dst)
-        except Exception:
-            pass
-        shutil.copy2(src, dst)
+    os.makedirs(dst if os.path.isdir(src) else os.path.dirname(os.path.normpath(dst)), exist_ok=True)
+    dst_files = get_manifest(dst, rehash=False)
+
+    removed_dirs = set()
+    for rel_path in dst_files:
+        if rel_path not in src_files:
+            os.remove(os.path.normpath(os.path.join(dst, rel_path)))
+            removed_dirs.add(os.path.dirname(rel_path))
+    _remove_empty_dirs(dst, removed_dirs)
+
+    for rel_path, entry in src_files.items():
+        dst_entry = dst_files.get(rel_path)
+        if dst_entry is not None and dst_entry['hash'] == entry['hash']:
+            continue
+        dst_file_path = os.path.normpath(os.path.join(dst, rel_path))
+        os.makedirs(os.path.dirname(dst_file_path), exist_ok=True)
+        if os.path.exists(dst_file_path):
+            os.remove(dst_file_path)
+        shutil.copy2(os.path.normpath(os.path.join(src, rel_path)), dst_file_path)
+        stat = os.stat(dst_file_path)
+        dst_files[rel_path] = {
+            'size': stat.st_size,
+            'mtime': stat.st_mtime_ns,
+            'hash': entry['hash']
+        }
+
+    _write_manifest(dst, {rel_path: dst_files[rel_path] for rel_path in src_files})
 
 
 try:
@@ -42,6 +170,18 @@ class FsStore():
             else:
                 self.s3 = boto3.client('s3')
             self.bucket = self.config['permanent_storage']['bucket']
+            self.codec = self.config['permanent_storage'].get('codec', 'gz')
+            check_codec(self.codec)
+            self.part_size = int(self.config['permanent_storage'].get('part_size_mb', 16) * pow(2, 20))
+            self.concurrency = self.config['permanent_storage'].get('max_concurrency', 8)
+            self.file_cache = None
+            cache_config = self.config['permanent_storage'].get('local_cache', {})
+            if cache_config.get('enabled', True):
+                max_size = cache_config.get('max_size_mb', 10240)
+                self.file_cache = FileCache(
+                    os.path.join(self.config['paths']['cache'], 'fs_store'),
+                    max_size=int(max_size * pow(2, 20)) if max_size is not None else None
+                )
         else:
             raise Exception('Location: ' + self.location + ' not supported')
 
@@ -51,25 +191,77 @@ class FsStore():
             print('To: ', os.path.join(self.config['paths']['storage'], remote_name))
             copy(os.path.join(local_path, filename), os.path.join(self.config['paths']['storage'], remote_name))
         elif self.location == 's3':
-            # NOTE: This `make_archive` function is implemente poorly and will create an empty archive file even if the file/dir to be archived doesn't exist or for some other reason can't be archived
-            shutil.make_archive(os.path.join(local_path, remote_name), 'gztar', root_dir=local_path, base_dir=filename)
-            self.s3.upload_file(os.path.join(local_path, f'{remote_name}.tar.gz'), self.bucket, f'{remote_name}.tar.gz')
-            os.remove(os.path.join(local_path, remote_name + '.tar.gz'))
+            upload_archive(
+                self.s3, self.bucket, f'{remote_name}{CODECS[self.codec]}',
+                os.path.join(local_path, filename), arcname=filename,
+                codec=self.codec, part_size=self.part_size, concurrency=self.concurrency
+            )
+            # archives of the same file made with another codec are stale now
+            for codec, suffix in CODECS.items():
+                if codec != self.codec:
+                    self.s3.delete_object(Bucket=self.bucket, Key=f'{remote_name}{suffix}')
+
+    def _find_remote_archive(self, remote_name):
+        ''' Returns key, codec, size and etag of the archive, looking for the configured codec first '''
+        codecs = [self.codec] + [x for x in CODECS if x != self.codec]
+        for codec in codecs:
+            key = f'{remote_name}{CODECS[codec]}'
+            try:
+                head = self.s3.head_object(Bucket=self.bucket, Key=key)
+            except Exception:
+                continue
+            return key, codec, head['ContentLength'], head['ETag']
+        raise FileNotFoundError(f'{remote_name} not found in bucket {self.bucket}')
+
+    def _fetch_archive(self, key, codec, size, path):
+        extracted = download_archive(
+            self.s3, self.bucket, key, size, path,
+            codec=codec, part_size=self.part_size, concurrency=self.concurrency
+        )
+        for extracted_path in extracted:
+            os.chmod(extracted_path, 0o777)
 
     def get(self, filename, remote_name, local_path):
         if self.location == 'local':
             copy(os.path.join(self.config['paths']['storage'], remote_name), os.path.join(local_path, filename))
         elif self.location == 's3':
-            remote_ziped_name = f'{remote_name}.tar.gz'
-            local_ziped_name = f'{filename}.tar.gz'
-            local_ziped_path = os.path.join(local_path, local_ziped_name)
-            self.s3.download_file(self.bucket, remote_ziped_name, local_ziped_path)
-            shutil.unpack_archive(local_ziped_path, local_path)
-            os.system(f'chmod -R 777 {local_path}')
-            os.remove(local_ziped_path)
+            key, codec, size, etag = self._find_remote_archive(remote_name)
+            fetch = partial(self._fetch_archive, key, codec, size)
+
+            if self.file_cache is None:
+                fetch(local_path)
+                return
+            # the archive is downloaded once per host, other processes copy it from the cache
+            with self.file_cache.open(quote(key, safe=''), etag, fetch) as cached_path:
+                for name in os.listdir(cached_path):
+                    if name.endswith(MANIFEST_SUFFIX):
+                        continue
+                    copy(os.path.join(cached_path, name), os.path.join(local_path, name))
+
+    @contextmanager
+    def local_path(self, filename, remote_name, local_path):
+        ''' Yields path from which the file can be read in place, the path is valid only inside the context.
+            For local storage it is the permanent copy. For s3 storage with local cache it is the copy
+            in the cache, which is not evicted until the context is closed. Otherwise the file
+            is fetched to `local_path` first.
+        '''
+        if self.location == 'local':
+            storage_path = os.path.join(self.config['paths']['storage'], remote_name)
+            if os.path.exists(storage_path):
+                yield storage_path
+                return
+        elif self.location == 's3' and self.file_cache is not None:
+            key, codec, size, etag = self._find_remote_archive(remote_name)
+            fetch = partial(self._fetch_archive, key, codec, size)
+            with self.file_cache.open(quote(key, safe=''), etag, fetch) as cached_path:
+                yield os.path.join(cached_path, filename)
+            return
+        self.get(filename, remote_name, local_path)
+        yield os.path.join(local_path, filename)
 
     def delete(self, remote_name):
         if self.location == 'local':
-            pass
+            remove(os.path.join(self.config['paths']['storage'], remote_name))
         elif self.location == 's3':
-            self.s3.delete_object(Bucket=self.bucket, Key=remote_name)
+            for suffix in CODECS.values():
+                self.s3.delete_object(Bucket=self.bucket, Key=f'{remote_name}{suffix}')
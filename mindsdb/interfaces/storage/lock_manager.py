@@ -0,0 +1,349 @@
+import time
+import zlib
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Optional
+
+from sqlalchemy import text
+
+import mindsdb.interfaces.storage.db as db
+from mindsdb.utilities.config import Config
+
+
+class LockTimeoutError(Exception):
+    pass
+
+
+class ReadWriteLock():
+    ''' In-process lock with any number of readers or one writer.
+        Waiting writers block new readers, so writers are not starved.
+        Waiters are notified on release instead of polling.
+    '''
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    def acquire_read(self, timeout: Optional[float] = None) -> bool:
+        with self._cond:
+            is_acquired = self._cond.wait_for(
+                lambda: self._writer is False and self._waiting_writers == 0,
+                timeout
+            )
+            if is_acquired:
+                self._readers += 1
+            return is_acquired
+
+    def release_read(self) -> None:
+        with self._cond:
+            self._readers -= 1
+            if self._readers == 0:
+                self._cond.notify_all()
+
+    def acquire_write(self, timeout: Optional[float] = None) -> bool:
+        with self._cond:
+            self._waiting_writers += 1
+            try:
+                is_acquired = self._cond.wait_for(
+                    lambda: self._writer is False and self._readers == 0,
+                    timeout
+                )
+            finally:
+                self._waiting_writers -= 1
+            if is_acquired:
+                self._writer = True
+            else:
+                # readers may wait only because of this writer
+                self._cond.notify_all()
+            return is_acquired
+
+    def release_write(self) -> None:
+        with self._cond:
+            self._writer = False
+            self._cond.notify_all()
+
+
+class BaseLockManager(ABC):
+    ''' Locks entities (predictors, datasources) in 'read' (shared) or 'write' (exclusive) mode
+        and collects statistics of time spent waiting for locks.
+    '''
+
+    def __init__(self):
+        self._stats_lock = threading.Lock()
+        self.acquired = 0
+        self.timeouts = 0
+        self.contended = 0
+        self.total_wait_time = 0.
+        self.max_wait_time = 0.
+
+    @abstractmethod
+    def _acquire(self, entity_type: str, entity_id: int, mode: str, timeout: Optional[float]) -> bool:
+        pass
+
+    @abstractmethod
+    def release(self, entity_type: str, entity_id: int, mode: str) -> None:
+        pass
+
+    def acquire(self, entity_type: str, entity_id: int, mode: str = 'write', timeout: Optional[float] = None) -> bool:
+        ''' Waits until the lock is acquired
+            Args:
+                entity_type: str
+                entity_id: int
+                mode: str, 'read' or 'write'
+                timeout: float, seconds to wait, None - wait forever, 0 - do not wait
+            Returns:
+                bool, False if the lock was not acquired within `timeout`
+        '''
+        if mode not in ('read', 'write'):
+            raise Exception(f"Wrong lock mode: '{mode}'")
+        start_time = time.time()
+        is_acquired = self._acquire(entity_type, entity_id, mode, timeout)
+        wait_time = time.time() - start_time
+        with self._stats_lock:
+            if is_acquired:
+                self.acquired += 1
+            else:
+                self.timeouts += 1
+            # anything longer than a scheduler tick means someone else held the lock
+            if wait_time > 0.001:
+                self.contended += 1
+            self.total_wait_time += wait_time
+            self.max_wait_time = max(self.max_wait_time, wait_time)
+        return is_acquired
+
+    @contextmanager
+    def lock(self, entity_type: str, entity_id: int, mode: str = 'write', timeout: Optional[float] = None):
+        if not self.acquire(entity_type, entity_id, mode, timeout):
+            raise LockTimeoutError(f"Can not lock {entity_type} {entity_id} for '{mode}' in {timeout} seconds")
+        try:
+            yield True
+        finally:
+            self.release(entity_type, entity_id, mode)
+
+    def get_stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                'type': self.__class__.__name__,
+                'acquired': self.acquired,
+                'timeouts': self.timeouts,
+                'contended': self.contended,
+                'total_wait_time': self.total_wait_time,
+                'max_wait_time': self.max_wait_time,
+                'avg_wait_time': self.total_wait_time / max(self.acquired + self.timeouts, 1)
+            }
+
+
+class LocalLockManager(BaseLockManager):
+    ''' Locks shared by threads of the current process only '''
+
+    def __init__(self):
+        super().__init__()
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+
+    def _get_lock(self, entity_type: str, entity_id: int) -> ReadWriteLock:
+        with self._locks_lock:
+            key = (entity_type, entity_id)
+            if key not in self._locks:
+                self._locks[key] = ReadWriteLock()
+            return self._locks[key]
+
+    def _acquire(self, entity_type, entity_id, mode, timeout):
+        lock = self._get_lock(entity_type, entity_id)
+        if mode == 'read':
+            return lock.acquire_read(timeout)
+        return lock.acquire_write(timeout)
+
+    def release(self, entity_type, entity_id, mode):
+        lock = self._get_lock(entity_type, entity_id)
+        if mode == 'read':
+            lock.release_read()
+        else:
+            lock.release_write()
+
+
+class DbAdvisoryLockManager(BaseLockManager):
+    ''' Locks shared by all processes which use the same Postgres or MySQL database.
+        Uses advisory locks, so waiting is done by the database server, without polling.
+        Each held lock keeps its own connection, since advisory locks belong to a session.
+        The connection is in autocommit mode, so it does not stay idle in transaction while the lock is held.
+        MySQL has no shared advisory locks, so there 'read' locks are exclusive too.
+    '''
+
+    def __init__(self, engine=None):
+        super().__init__()
+        self.engine = engine or db.engine
+        self.dialect = self.engine.dialect.name
+        if self.dialect not in ('postgresql', 'mysql'):
+            raise Exception(f'Advisory locks are not supported for {self.dialect} database')
+        self._connections = {}
+        self._connections_lock = threading.Lock()
+
+    @staticmethod
+    def _to_int4(value: int) -> int:
+        return value - pow(2, 32) if value >= pow(2, 31) else value
+
+    def _acquire(self, entity_type, entity_id, mode, timeout):
+        connection = self.engine.connect().execution_options(isolation_level='AUTOCOMMIT')
+        try:
+            if self.dialect == 'postgresql' and timeout == 0:
+                func = 'pg_try_advisory_lock_shared' if mode == 'read' else 'pg_try_advisory_lock'
+                is_acquired = connection.execute(
+                    text(f'SELECT {func}(:type_key, :entity_id)'),
+                    type_key=self._to_int4(zlib.crc32(entity_type.encode())),
+                    entity_id=entity_id
+                ).scalar() is True
+            elif self.dialect == 'postgresql':
+                # lock_timeout = 0 means 'no timeout' in postgres, so 0 is handled by try-lock above
+                if timeout is not None:
+                    connection.execute(text(f'SET lock_timeout = {int(timeout * 1000)}'))
+                func = 'pg_advisory_lock_shared' if mode == 'read' else 'pg_advisory_lock'
+                try:
+                    connection.execute(
+                        text(f'SELECT {func}(:type_key, :entity_id)'),
+                        type_key=self._to_int4(zlib.crc32(entity_type.encode())),
+                        entity_id=entity_id
+                    )
+                    is_acquired = True
+                except Exception:
+                    is_acquired = False
+                if timeout is not None:
+                    connection.execute(text('RESET lock_timeout'))
+            else:
+                is_acquired = connection.execute(
+                    text('SELECT GET_LOCK(:name, :timeout)'),
+                    name=f'mindsdb_{entity_type}_{entity_id}',
+                    timeout=-1 if timeout is None else timeout
+                ).scalar() == 1
+        except Exception:
+            connection.close()
+            raise
+        if not is_acquired:
+            connection.close()
+            return False
+        with self._connections_lock:
+            key = (entity_type, entity_id, mode, threading.get_ident())
+            self._connections.setdefault(key, []).append(connection)
+        return True
+
+    def release(self, entity_type, entity_id, mode):
+        with self._connections_lock:
+            key = (entity_type, entity_id, mode, threading.get_ident())
+            connections = self._connections.get(key, [])
+            if len(connections) == 0:
+                return
+            connection = connections.pop()
+            if len(connections) == 0:
+                del self._connections[key]
+        try:
+            if self.dialect == 'postgresql':
+                func = 'pg_advisory_unlock_shared' if mode == 'read' else 'pg_advisory_unlock'
+                connection.execute(
+                    text(f'SELECT {func}(:type_key, :entity_id)'),
+                    type_key=self._to_int4(zlib.crc32(entity_type.encode())),
+                    entity_id=entity_id
+                )
+            else:
+                connection.execute(
+                    text('SELECT RELEASE_LOCK(:name)'),
+                    name=f'mindsdb_{entity_type}_{entity_id}'
+                )
+        finally:
+            connection.close()
+
+
+class SemaphorLockManager(BaseLockManager):
+    ''' Locks based on rows of the `semaphor` table, for databases without advisory locks (sqlite).
+        Threads of the current process wait on the in-process lock and are notified on release,
+        so the table is polled only while another process holds the lock.
+    '''
+
+    MIN_POLL_INTERVAL = 0.01
+    MAX_POLL_INTERVAL = 1
+
+    def __init__(self):
+        super().__init__()
+        self._local = LocalLockManager()
+        # number of readers of the process that share one 'read' row
+        self._readers = {}
+        self._readers_lock = threading.Lock()
+
+    def _try_insert(self, entity_type, entity_id, mode) -> bool:
+        semaphor_record = db.session.query(db.Semaphor).filter_by(entity_id=entity_id, entity_type=entity_type).first()
+        if semaphor_record is not None:
+            return mode == 'read' and semaphor_record.action == 'read'
+        try:
+            db.session.add(db.Semaphor(entity_id=entity_id, entity_type=entity_type, action=mode))
+            db.session.commit()
+            return True
+        except Exception:
+            db.session.rollback()
+            return False
+
+    def _acquire(self, entity_type, entity_id, mode, timeout):
+        start_time = time.time()
+        if not self._local._acquire(entity_type, entity_id, mode, timeout):
+            return False
+        key = (entity_type, entity_id)
+        if mode == 'read':
+            with self._readers_lock:
+                if self._readers.get(key, 0) > 0:
+                    self._readers[key] += 1
+                    return True
+        poll_interval = self.MIN_POLL_INTERVAL
+        while not self._try_insert(entity_type, entity_id, mode):
+            if timeout is not None and time.time() - start_time + poll_interval > timeout:
+                self._local.release(entity_type, entity_id, mode)
+                return False
+            time.sleep(poll_interval)
+            poll_interval = min(poll_interval * 2, self.MAX_POLL_INTERVAL)
+        if mode == 'read':
+            with self._readers_lock:
+                self._readers[key] = self._readers.get(key, 0) + 1
+        return True
+
+    def release(self, entity_type, entity_id, mode):
+        key = (entity_type, entity_id)
+        if mode == 'read':
+            with self._readers_lock:
+                self._readers[key] -= 1
+                if self._readers[key] > 0:
+                    self._local.release(entity_type, entity_id, mode)
+                    return
+                del self._readers[key]
+        try:
+            semaphor_record = db.session.query(db.Semaphor).filter_by(entity_id=entity_id, entity_type=entity_type).first()
+            if semaphor_record is not None:
+                db.session.delete(semaphor_record)
+                db.session.commit()
+        finally:
+            self._local.release(entity_type, entity_id, mode)
+
+
+_lock_manager = None
+_lock_manager_init_lock = threading.Lock()
+
+
+def get_lock_manager() -> BaseLockManager:
+    ''' Returns lock manager of the process, its type is set by `lock_manager.type` in config:
+        'local' - for single process setups, 'db' - advisory locks of Postgres or MySQL,
+        'semaphor' - `semaphor` table, 'auto' - 'db' if it is supported by the database, else 'semaphor'
+    '''
+    global _lock_manager
+    with _lock_manager_init_lock:
+        if _lock_manager is None:
+            manager_type = Config().get('lock_manager', {}).get('type', 'auto')
+            if manager_type == 'auto':
+                manager_type = 'db' if db.engine.dialect.name in ('postgresql', 'mysql') else 'semaphor'
+            if manager_type == 'local':
+                _lock_manager = LocalLockManager()
+            elif manager_type == 'db':
+                _lock_manager = DbAdvisoryLockManager()
+            elif manager_type == 'semaphor':
+                _lock_manager = SemaphorLockManager()
+            else:
+                raise Exception(f'Lock manager type: {manager_type} not supported')
+        return _lock_manager
@@ -0,0 +1,231 @@
+import io
+import os
+import tarfile
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import zstandard
+except ImportError:
+    # Only required for 'zstd' codec
+    zstandard = None
+
+try:
+    import lz4.frame
+except ImportError:
+    # Only required for 'lz4' codec
+    lz4 = None
+
+
+# codec name -> suffix of the archive key in the bucket
+CODECS = {
+    'gz': '.tar.gz',
+    'zstd': '.tar.zst',
+    'lz4': '.tar.lz4'
+}
+
+# s3 does not accept multipart parts smaller than 5MB, except the last one
+MIN_PART_SIZE = 5 * pow(2, 20)
+
+
+class MultipartUploadWriter(io.RawIOBase):
+    ''' Write-only stream which uploads written data as parts of s3 multipart upload.
+        At most `concurrency` parts are kept in memory and uploaded at the same time.
+    '''
+
+    def __init__(self, s3, bucket, key, part_size, concurrency):
+        super().__init__()
+        self.s3 = s3
+        self.bucket = bucket
+        self.key = key
+        self.part_size = max(part_size, MIN_PART_SIZE)
+        self._buffer = bytearray()
+        self._part_number = 1
+        self._futures = []
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency)
+        self.upload_id = s3.create_multipart_upload(Bucket=bucket, Key=key)['UploadId']
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._buffer += data
+        while len(self._buffer) >= self.part_size:
+            self._submit_part(bytes(self._buffer[:self.part_size]))
+            del self._buffer[:self.part_size]
+        return len(data)
+
+    def _submit_part(self, data):
+        self._slots.acquire()
+        self._futures.append(self._executor.submit(self._upload_part, self._part_number, data))
+        self._part_number += 1
+
+    def _upload_part(self, part_number, data):
+        try:
+            resp = self.s3.upload_part(
+                Bucket=self.bucket,
+                Key=self.key,
+                PartNumber=part_number,
+                UploadId=self.upload_id,
+                Body=data
+            )
+            return {'PartNumber': part_number, 'ETag': resp['ETag']}
+        finally:
+            self._slots.release()
+
+    def complete(self):
+        if len(self._buffer) > 0 or self._part_number == 1:
+            self._submit_part(bytes(self._buffer))
+            self._buffer = bytearray()
+        try:
+            parts = [future.result() for future in self._futures]
+        finally:
+            self._executor.shutdown()
+        self.s3.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self.upload_id,
+            MultipartUpload={'Parts': parts}
+        )
+
+    def abort(self):
+        self._executor.shutdown()
+        self.s3.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id)
+
+
+class RangedDownloadReader(io.RawIOBase):
+    ''' Read-only stream over s3 object which is fetched by ranged requests.
+        Up to `concurrency` ranges are downloaded ahead of the reader, and returned in order.
+    '''
+
+    def __init__(self, s3, bucket, key, size, part_size, concurrency):
+        super().__init__()
+        self.s3 = s3
+        self.bucket = bucket
+        self.key = key
+        self.size = size
+        self.part_size = part_size
+        self._offsets = iter(range(0, size, part_size))
+        self._pending = deque()
+        self._current = b''
+        self._position = 0
+        self._executor = ThreadPoolExecutor(max_workers=concurrency)
+        for _ in range(concurrency):
+            self._submit_next()
+
+    def readable(self):
+        return True
+
+    def _submit_next(self):
+        offset = next(self._offsets, None)
+        if offset is not None:
+            self._pending.append(self._executor.submit(self._fetch, offset))
+
+    def _fetch(self, offset):
+        end = min(offset + self.part_size, self.size) - 1
+        resp = self.s3.get_object(Bucket=self.bucket, Key=self.key, Range=f'bytes={offset}-{end}')
+        return resp['Body'].read()
+
+    def readinto(self, buffer):
+        while self._position >= len(self._current):
+            if len(self._pending) == 0:
+                return 0
+            self._current = self._pending.popleft().result()
+            self._position = 0
+            self._submit_next()
+        size = min(len(buffer), len(self._current) - self._position)
+        buffer[:size] = self._current[self._position:self._position + size]
+        self._position += size
+        return size
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        super().close()
+
+
+# codec name -> package required for it
+CODEC_PACKAGES = {
+    'zstd': 'zstandard',
+    'lz4': 'lz4'
+}
+
+
+def check_codec(codec):
+    ''' Raises an exception if the codec is unknown or its package is not installed '''
+    if codec not in CODECS:
+        raise Exception(f'Unknown storage codec: {codec}')
+    if (codec == 'zstd' and zstandard is None) or (codec == 'lz4' and lz4 is None):
+        raise Exception(
+            f"Package '{CODEC_PACKAGES[codec]}' is required for '{codec}' storage codec, "
+            f"install it with: pip install {CODEC_PACKAGES[codec]}"
+        )
+
+
+def _compress_stream(raw, codec):
+    check_codec(codec)
+    if codec == 'gz':
+        return None, 'w|gz'
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor().stream_writer(raw, closefd=False), 'w|'
+    return lz4.frame.LZ4FrameFile(raw, mode='wb'), 'w|'
+
+
+def _decompress_stream(raw, codec):
+    check_codec(codec)
+    if codec == 'gz':
+        return raw, 'r|gz'
+    if codec == 'zstd':
+        return zstandard.ZstdDecompressor().stream_reader(raw), 'r|'
+    return lz4.frame.LZ4FrameFile(raw, mode='rb'), 'r|'
+
+
+def upload_archive(s3, bucket, key, path, arcname, codec='gz', part_size=MIN_PART_SIZE, concurrency=4):
+    ''' Archives file or directory and streams the archive to s3, without temporary files
+        Args:
+            s3: boto3 s3 client
+            bucket: str
+            key: str, key of the archive in the bucket
+            path: str, path to file or directory to archive
+            arcname: str, name of the file or directory inside the archive
+            codec: str, one of CODECS
+            part_size: int, size of each multipart part in bytes
+            concurrency: int, number of parts uploaded at the same time
+    '''
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    writer = MultipartUploadWriter(s3, bucket, key, part_size, concurrency)
+    try:
+        compressor, mode = _compress_stream(writer, codec)
+        with tarfile.open(fileobj=compressor or writer, mode=mode) as tar:
+            tar.add(path, arcname=arcname)
+        if compressor is not None:
+            compressor.close()
+        writer.complete()
+    except Exception:
+        writer.abort()
+        raise
+
+
+def download_archive(s3, bucket, key, size, local_path, codec='gz', part_size=MIN_PART_SIZE, concurrency=4):
+    ''' Downloads archive from s3 with parallel ranged requests and unpacks it on the fly into `local_path`
+        Args:
+            size: int, size of the archive in bytes
+        Returns:
+            list of str: paths of unpacked files and directories
+    '''
+    reader = io.BufferedReader(
+        RangedDownloadReader(s3, bucket, key, size, part_size, concurrency),
+        buffer_size=part_size
+    )
+    extracted = []
+    try:
+        stream, mode = _decompress_stream(reader, codec)
+        with tarfile.open(fileobj=stream, mode=mode) as tar:
+            for member in tar:
+                tar.extract(member, local_path)
+                extracted.append(os.path.join(local_path, member.name))
+    finally:
+        reader.close()
+    return extracted
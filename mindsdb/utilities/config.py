@@ -61,7 +61,36 @@ class Config():
                     "port": "47335",
                     "user": "mindsdb",
                     "database": "mindsdb",
-                    "ssl": True
+                    "ssl": True,
+                    "map_reduce": {
+                        "batch_size": 100,
+                        "max_workers": 8
+                    },
+                    "compression": {
+                        "zlib": False,
+                        "zstd": False,
+                        "min_length": 50,
+                        "zlib_level": 6,
+                        "zstd_level": 3
+                    },
+                    "ast_cache": {
+                        "size": 1024,
+                        "parametrize_literals": True
+                    },
+                    "prepared_statements": {
+                        "max_per_session": 1024,
+                        "session_plan_cache_size": 128,
+                        "plan_cache_size": 1024
+                    },
+                    "server": {
+                        "type": "thread",
+                        "workers": 1,
+                        "max_connections": 1000,
+                        "max_workers": 16,
+                        "connect_timeout": 10,
+                        "net_timeout": 60,
+                        "idle_timeout": 28800
+                    }
                 },
                 "mongodb": {
                     "host": "127.0.0.1",
@@ -72,6 +101,30 @@ class Config():
             "cache": {
                 "type": "local"
             },
+            "predictor_cache": {
+                "max_size_mb": None,
+                "min_free_memory_mb": 1200,
+                "ttl": 1200,
+                "policy": "lru",
+                "pinned": []
+            },
+            "predict_batching": {
+                "enabled": False,
+                "max_wait_ms": 2,
+                "max_batch_rows": 256
+            },
+            "inference_pool": {
+                "enabled": False,
+                "workers": 2,
+                "queue_size": 16,
+                "queue_timeout": 30,
+                "timeout": 600
+            },
+            "prediction_cache": {
+                "enabled": False,
+                "max_rows": 100000,
+                "ttl": 300
+            },
             "force_datasource_removing": False
         }
 
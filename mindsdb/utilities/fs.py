@@ -7,6 +7,12 @@ from typing import Optional
 
 from appdirs import user_data_dir
 
+try:
+    import fcntl
+except Exception:
+    # not available on windows, FileLock is no-op there
+    fcntl = None
+
 
 def create_directory(path):
     path = Path(path)
@@ -78,3 +84,63 @@ def delete_process_mark(folder: str = 'learn', mark: Optional[str] = None):
         )
         if p.exists():
             p.unlink()
+
+
+def get_path_size(path: str) -> int:
+    ''' Calculates the size on disk of a file or of a directory with all its content
+        Args:
+            path: str, path to file or directory
+        Returns:
+            size in bytes, 0 if path does not exist
+    '''
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    size = 0
+    for dirpath, _dirnames, filenames in os.walk(path):
+        for filename in filenames:
+            file_path = os.path.join(dirpath, filename)
+            if not os.path.islink(file_path):
+                size += os.path.getsize(file_path)
+    return size
+
+
+class FileLock():
+    ''' Advisory lock on a file, shared between processes of the host.
+        Works on posix systems only, on other systems lock is always acquired.
+    '''
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = None
+
+    def acquire(self, shared: bool = False, blocking: bool = True) -> bool:
+        ''' Acquires the lock. Lock already held by this object is converted to the requested mode.
+            Returns:
+                bool, False if `blocking` is False and the lock is held by someone else
+        '''
+        if fcntl is None:
+            return True
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o666)
+        flags = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+        if not blocking:
+            flags |= fcntl.LOCK_NB
+        try:
+            fcntl.flock(self._fd, flags)
+        except BlockingIOError:
+            return False
+        return True
+
+    def release(self) -> None:
+        if self._fd is None:
+            return
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+        self._fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, _type, value, traceback):
+        self.release()
@@ -14,6 +14,7 @@ def args_parse():
     parser.add_argument('--no_studio', action='store_true')
     parser.add_argument('-v', '--version', action='store_true')
     parser.add_argument('--ray', action='store_true', default=None)
+    parser.add_argument('--mysql-workers', type=int, default=None)
     return parser.parse_args()
 
 
@@ -0,0 +1,4 @@
+import sys
+
+# mindsdb parses command line arguments on import, arguments of pytest are not for it
+sys.argv = sys.argv[:1]
@@ -0,0 +1,95 @@
+import struct
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from mindsdb.api.mysql.mysql_proxy.libs.constants.mysql import TYPES
+from mindsdb.api.mysql.mysql_proxy.mysql_proxy import MysqlProxy, ROWS_ENCODE_BLOCK_SIZE
+from mindsdb.api.mysql.mysql_proxy.utilities import ResultsetStreamError
+
+
+class FakeQuery():
+    ''' Result of SQLQuery with one column, rows are taken from `rows` '''
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.columns = [{
+            'database': 'mindsdb',
+            'table_name': 't',
+            'name': 'a',
+            'alias': 'a',
+            'type': TYPES.MYSQL_TYPE_VAR_STRING,
+            'stats': {'rows_count': 1, 'max_length': 10}
+        }]
+
+    def collect_columns_stats(self):
+        pass
+
+    def iter_result_rows(self, block_size=1000):
+        return iter(self.rows)
+
+
+class FakeSession():
+    def __init__(self):
+        self.packet_sequence_number = 1
+        self.integration_type = None
+        self.logging = mock.Mock()
+
+    def inc_packet_sequence_number(self):
+        self.packet_sequence_number = (self.packet_sequence_number + 1) % 256
+
+
+def failed_rows(rows_count):
+    for i in range(rows_count):
+        yield [str(i)]
+    raise Exception('broken value')
+
+
+def split_packets(data):
+    ''' Returns: list of (sequence id, body) '''
+    packets = []
+    while len(data) > 0:
+        length = struct.unpack('<I', data[:3] + b'\x00')[0]
+        packets.append((data[3], data[4:4 + length]))
+        data = data[4 + length:]
+    return packets
+
+
+class AnswerSelectTest(unittest.TestCase):
+    def setUp(self):
+        self.proxy = MysqlProxy.__new__(MysqlProxy)
+        self.proxy.socket = mock.Mock()
+        self.proxy.session = FakeSession()
+        self.proxy.client_capabilities = SimpleNamespace(DEPRECATE_EOF=True)
+
+    def sent_packets(self):
+        return split_packets(b''.join(call.args[0] for call in self.proxy.socket.sendall.call_args_list))
+
+    def test_rows_are_streamed(self):
+        rows_count = ROWS_ENCODE_BLOCK_SIZE * 2 + 10
+        query = FakeQuery(([str(i)] for i in range(rows_count)))
+        self.proxy.answer_select(query)
+
+        packets = self.sent_packets()
+        # column count, column definition, rows, ok packet
+        self.assertEqual(len(packets), rows_count + 3)
+        self.assertEqual([seq for seq, _ in packets], [(i + 1) % 256 for i in range(len(packets))])
+        self.assertEqual([body for _, body in packets[2:4]], [b'\x010', b'\x011'])
+
+    def test_error_in_first_block(self):
+        query = FakeQuery(failed_rows(10))
+        with self.assertRaises(Exception) as context:
+            self.proxy.answer_select(query)
+        self.assertNotIsInstance(context.exception, ResultsetStreamError)
+        # nothing is sent, so the error is answered with ErrPacket in the same sequence
+        self.proxy.socket.sendall.assert_not_called()
+        self.assertEqual(self.proxy.session.packet_sequence_number, 1)
+
+    def test_error_after_first_block(self):
+        query = FakeQuery(failed_rows(ROWS_ENCODE_BLOCK_SIZE + 10))
+        with self.assertRaises(ResultsetStreamError):
+            self.proxy.answer_select(query)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+
+from mindsdb_sql import parse_sql
+
+from mindsdb.api.mysql.mysql_proxy.classes.ast_cache import AstCache, bind_parameters, parametrize_sql
+
+
+class ParametrizeSqlTest(unittest.TestCase):
+    def assert_round_trip(self, sql):
+        template, values = parametrize_sql(sql)
+        self.assertIsNotNone(template)
+        query = parse_sql(template, dialect='mindsdb')
+        self.assertTrue(bind_parameters(query, values))
+        self.assertEqual(query, parse_sql(sql, dialect='mindsdb'))
+
+    def test_literals(self):
+        template, values = parametrize_sql("SELECT a FROM t WHERE a > 1 AND b = 'x y' AND c = 2.5")
+        self.assertEqual(template, 'SELECT a FROM t WHERE a > ? AND b = ? AND c = ?')
+        self.assertEqual(values, [1, 'x y', 2.5])
+
+    def test_round_trip(self):
+        for sql in [
+            "SELECT a, b FROM int1.t1 WHERE a > 5 AND b = 'x5'",
+            "SELECT t.a, p.y FROM int1.t1 AS t JOIN mindsdb.pred AS p WHERE t.a = 1.5",
+            "SELECT a FROM t WHERE x in (1, 2, 'a b')",
+        ]:
+            self.assert_round_trip(sql)
+
+    def test_not_parameters(self):
+        # identifiers, limit and offset are kept in the template
+        template, values = parametrize_sql('SELECT `c1`, "x 2" FROM t2 WHERE a = 3 LIMIT 10 OFFSET 5')
+        self.assertEqual(template, 'SELECT `c1`, "x 2" FROM t2 WHERE a = ? LIMIT 10 OFFSET 5')
+        self.assertEqual(values, [3])
+
+    def test_not_parametrized(self):
+        self.assertEqual(parametrize_sql('SELECT a FROM t WHERE a = ?'), (None, None))
+        self.assertEqual(parametrize_sql("SELECT a FROM t WHERE b = 'it''s'"), (None, None))
+        self.assertEqual(parametrize_sql('SHOW TABLES'), (None, None))
+
+    def test_cache_uses_template(self):
+        cache = AstCache(10)
+        for i in range(3):
+            sql = f"SELECT a FROM t WHERE a = {i} AND b = 'x{i}'"
+            self.assertEqual(cache.parse(sql), parse_sql(sql, dialect='mindsdb'))
+        stats = cache.get_stats()
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['template_hits'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import socket
+import struct
+import unittest
+from unittest import mock
+
+from mindsdb.api.mysql.mysql_proxy.classes import compressed_socket
+from mindsdb.api.mysql.mysql_proxy.classes.compressed_socket import (
+    CompressedSocket,
+    ZlibCompressor,
+    ZstdCompressor,
+    is_zstd_available
+)
+
+
+class CompressedSocketTestMixin():
+    ''' Server side CompressedSocket and plain socket of the client, which reads frames as is '''
+
+    def make_compressor(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.server_socket, self.client_socket = socket.socketpair()
+        self.addCleanup(self.server_socket.close)
+        self.addCleanup(self.client_socket.close)
+        self.server = CompressedSocket(self.server_socket, self.make_compressor())
+
+    def recv_exactly(self, length):
+        data = b''
+        while len(data) < length:
+            data += self.client_socket.recv(length - len(data))
+        return data
+
+    def read_frame(self):
+        ''' Returns: (sequence id, uncompressed length, payload as it is sent) '''
+        header = self.recv_exactly(7)
+        length = struct.unpack('<I', header[:3] + b'\x00')[0]
+        uncompressed_length = struct.unpack('<I', header[4:] + b'\x00')[0]
+        return header[3], uncompressed_length, self.recv_exactly(length)
+
+    def unpack(self, uncompressed_length, payload):
+        if uncompressed_length == 0:
+            return payload
+        return self.make_compressor().decompress(payload, uncompressed_length)
+
+    def test_short_payload_is_not_compressed(self):
+        self.server.sendall(b'a' * 10)
+        self.assertEqual(self.read_frame(), (0, 0, b'a' * 10))
+
+    def test_long_payload_is_compressed(self):
+        data = b'abc' * 100
+        self.server.sendall(data)
+        sequence_id, uncompressed_length, payload = self.read_frame()
+        self.assertEqual(uncompressed_length, len(data))
+        self.assertLess(len(payload), len(data))
+        self.assertEqual(self.unpack(uncompressed_length, payload), data)
+        self.assertEqual(self.server.bytes_sent, len(data))
+        self.assertEqual(self.server.bytes_sent_compressed, len(payload) + 7)
+
+    def test_split_by_max_packet_size(self):
+        data = bytes(range(100)) * 3
+        with mock.patch.object(compressed_socket, 'MAX_PACKET_SIZE', 128):
+            self.server.sendall(data)
+        frames = [self.read_frame() for _ in range(3)]
+        self.assertEqual([sequence_id for sequence_id, _, _ in frames], [0, 1, 2])
+        self.assertEqual(b''.join(self.unpack(length, payload) for _, length, payload in frames), data)
+
+    def test_sequence(self):
+        self.server.sendall(b'first')
+        self.server.sendall(b'second')
+        self.assertEqual(self.read_frame()[0], 0)
+        # sequence continues in the next sendall
+        self.assertEqual(self.read_frame()[0], 1)
+
+        # new command of the client starts the sequence again
+        client = CompressedSocket(self.client_socket, self.make_compressor())
+        client.sendall(b'x' * 200)
+        self.assertEqual(self.server.recv(200), b'x' * 200)
+        self.server.sendall(b'answer')
+        self.assertEqual(self.read_frame(), (1, 0, b'answer'))
+
+    def test_round_trip(self):
+        client = CompressedSocket(self.client_socket, self.make_compressor())
+        data = b'row of resultset ' * 1000
+        with mock.patch.object(compressed_socket, 'MAX_PACKET_SIZE', 4096):
+            self.server.sendall(data)
+        self.assertEqual(client.recv(len(data)), data)
+        self.assertEqual(client.pending(), 0)
+
+
+class ZlibCompressedSocketTest(CompressedSocketTestMixin, unittest.TestCase):
+    def make_compressor(self):
+        return ZlibCompressor()
+
+
+@unittest.skipIf(is_zstd_available() is False, 'zstandard is required')
+class ZstdCompressedSocketTest(CompressedSocketTestMixin, unittest.TestCase):
+    def make_compressor(self):
+        return ZstdCompressor()
+
+
+if __name__ == '__main__':
+    unittest.main()
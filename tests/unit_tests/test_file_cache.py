@@ -0,0 +1,110 @@
+import os
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from mindsdb.interfaces.storage import file_cache
+from mindsdb.interfaces.storage.file_cache import FileCache
+
+
+def make_fetch(content, calls):
+    def fetch(path):
+        calls.append(path)
+        with open(os.path.join(path, 'data'), 'w') as fp:
+            fp.write(content)
+    return fetch
+
+
+class FileCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def test_fetch_once_and_refetch_on_new_etag(self):
+        cache = FileCache(self.dir)
+        calls = []
+        for _ in range(2):
+            with cache.open('entry', 'etag1', make_fetch('v1', calls)) as path:
+                with open(os.path.join(path, 'data')) as fp:
+                    self.assertEqual(fp.read(), 'v1')
+        self.assertEqual(len(calls), 1)
+
+        with cache.open('entry', 'etag2', make_fetch('v2', calls)) as path:
+            with open(os.path.join(path, 'data')) as fp:
+                self.assertEqual(fp.read(), 'v2')
+        self.assertEqual(len(calls), 2)
+
+    def test_readers_are_not_serialised(self):
+        cache = FileCache(self.dir)
+        calls = []
+        with cache.open('entry', 'etag1', make_fetch('v1', calls)):
+            pass
+
+        opened = threading.Event()
+        release = threading.Event()
+
+        def hold():
+            with cache.open('entry', 'etag1', make_fetch('v1', calls)):
+                opened.set()
+                release.wait(5)
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        self.assertTrue(opened.wait(5))
+        start = time.time()
+        # FileLock is per open file, so the second reader in the same process is a separate lock holder
+        with cache.open('entry', 'etag1', make_fetch('v1', calls)):
+            self.assertLess(time.time() - start, 1)
+        release.set()
+        thread.join()
+        self.assertEqual(len(calls), 1)
+
+    def test_evicted_after_each_fetch(self):
+        cache = FileCache(self.dir)
+        calls = []
+        checks = []
+        is_valid = cache._is_valid
+
+        def is_valid_under_lock(name, etag):
+            # checks under shared lock see the entry evicted, checks under exclusive lock see it as is
+            checks.append(name)
+            return len(checks) % 2 == 0 and is_valid(name, etag)
+
+        with mock.patch.object(cache, '_is_valid', side_effect=is_valid_under_lock):
+            with cache.open('entry', 'etag', make_fetch('v1', calls)) as path:
+                with open(os.path.join(path, 'data')) as fp:
+                    self.assertEqual(fp.read(), 'v1')
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(checks), 2 * file_cache.FETCH_ATTEMPTS)
+
+    def test_fetched_on_the_last_attempt(self):
+        cache = FileCache(self.dir)
+        calls = []
+        with mock.patch.object(file_cache, 'FETCH_ATTEMPTS', 1):
+            with cache.open('entry', 'etag', make_fetch('v1', calls)) as path:
+                with open(os.path.join(path, 'data')) as fp:
+                    self.assertEqual(fp.read(), 'v1')
+        self.assertEqual(len(calls), 1)
+
+    def test_least_recently_used_is_evicted(self):
+        cache = FileCache(self.dir, max_size=7)
+        calls = []
+        with cache.open('old', 'etag', make_fetch('aaa', calls)):
+            pass
+        with cache.open('used', 'etag', make_fetch('bbb', calls)):
+            pass
+        os.utime(cache._meta_path('old'), (1, 1))
+        with cache.open('new', 'etag', make_fetch('cc', calls)):
+            pass
+        self.assertFalse(os.path.exists(cache._entry_path('old')))
+        self.assertTrue(os.path.exists(cache._entry_path('used')))
+        self.assertTrue(os.path.exists(cache._entry_path('new')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from mindsdb.interfaces.storage.fs import copy, remove, MANIFEST_SUFFIX
+
+
+class FsCopyTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.src = os.path.join(self.dir, 'src')
+        self.dst = os.path.join(self.dir, 'dst')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def _write(self, rel_path, content):
+        path = os.path.join(self.src, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as fp:
+            fp.write(content)
+
+    def test_removed_files_and_empty_dirs(self):
+        self._write('a.txt', 'a')
+        self._write('sub/deep/b.txt', 'b')
+        copy(self.src, self.dst)
+        self.assertTrue(os.path.isfile(os.path.join(self.dst, 'sub', 'deep', 'b.txt')))
+
+        shutil.rmtree(os.path.join(self.src, 'sub'))
+        self._write('a.txt', 'changed')
+        copy(self.src, self.dst)
+
+        self.assertEqual(os.listdir(self.dst), ['a.txt'])
+        with open(os.path.join(self.dst, 'a.txt')) as fp:
+            self.assertEqual(fp.read(), 'changed')
+
+    def test_remove_deletes_manifest(self):
+        self._write('a.txt', 'a')
+        copy(self.src, self.dst)
+        manifest_path = os.path.join(self.dir, f'.dst{MANIFEST_SUFFIX}')
+        self.assertTrue(os.path.exists(manifest_path))
+
+        remove(self.dst)
+        self.assertFalse(os.path.exists(self.dst))
+        self.assertFalse(os.path.exists(manifest_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import queue
+import unittest
+import threading
+from collections import Counter
+
+import pandas as pd
+
+from mindsdb.interfaces.model import inference_pool
+from mindsdb.interfaces.model.inference_pool import HashRing, InferencePool, discard_data, pack_data, unpack_data
+
+
+def is_block_exists(name):
+    try:
+        block = inference_pool.shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return False
+    block.close()
+    return True
+
+
+class HashRingTest(unittest.TestCase):
+    def test_stable(self):
+        ring = HashRing(list(range(4)))
+        keys = [f'predictor_{i}' for i in range(200)]
+        self.assertEqual([ring.get_node(key) for key in keys], [HashRing(list(range(4))).get_node(key) for key in keys])
+
+    def test_all_nodes_are_used(self):
+        ring = HashRing(list(range(4)))
+        counts = Counter(ring.get_node(f'predictor_{i}') for i in range(1000))
+        self.assertEqual(set(counts.keys()), {0, 1, 2, 3})
+        self.assertTrue(all(count > 100 for count in counts.values()))
+
+    def test_new_node_moves_few_keys(self):
+        keys = [f'predictor_{i}' for i in range(1000)]
+        old_ring = HashRing(list(range(4)))
+        new_ring = HashRing(list(range(5)))
+        moved = [key for key in keys if old_ring.get_node(key) != new_ring.get_node(key)]
+        # keys move only to the new node
+        self.assertTrue(all(new_ring.get_node(key) == 4 for key in moved))
+        self.assertLess(len(moved), 400)
+
+
+class FakeWorker():
+    ''' Worker which is alive, but never reads its queue '''
+    pid = None
+    exitcode = None
+
+    def is_alive(self):
+        return True
+
+
+@unittest.skipIf(inference_pool.pyarrow is None or inference_pool.shared_memory is None, 'pyarrow is required')
+class SharedMemoryTest(unittest.TestCase):
+    def test_round_trip(self):
+        frame = pd.DataFrame({'x': [1, 2, None], 'y': ['a', 'b', 'c']})
+        packed = pack_data(frame)
+        self.assertEqual(packed[0], 'arrow')
+        self.assertTrue(frame.equals(unpack_data(packed)))
+        self.assertFalse(is_block_exists(packed[1]))
+
+    def test_not_arrow(self):
+        self.assertEqual(pack_data([{'x': 1}]), ('pickle', [{'x': 1}]))
+        self.assertEqual(pack_data(pd.DataFrame({'x': [1, 'a']}))[0], 'pickle')
+
+    def test_discard(self):
+        packed = pack_data(pd.DataFrame({'x': [1]}))
+        discard_data(packed)
+        self.assertFalse(is_block_exists(packed[1]))
+        # block removed by worker already
+        discard_data(packed)
+
+    def make_pool(self, **kwargs):
+        pool = InferencePool(workers_count=1, **kwargs)
+        requests_queue = queue.Queue(maxsize=1)
+        pool._workers[0] = FakeWorker()
+        pool._queues[0] = requests_queue
+        pool._results_queue = queue.Queue()
+        pool._is_stop_registered = True
+        return pool, requests_queue
+
+    def test_not_read_data_is_removed_on_timeout(self):
+        pool, requests_queue = self.make_pool(timeout=0.1)
+        with self.assertRaisesRegex(Exception, 'is not done in'):
+            pool.predict('p', pd.DataFrame({'x': [1, 2]}), 'dict', None)
+        packed = requests_queue.get_nowait()[2]
+        self.assertEqual(packed[0], 'arrow')
+        self.assertFalse(is_block_exists(packed[1]))
+        self.assertEqual(pool._futures, {})
+        self.assertEqual(pool._requests_data, {})
+
+    def test_not_read_data_is_removed_on_stop(self):
+        pool, requests_queue = self.make_pool(timeout=10)
+        requests = []
+
+        def stop_when_requested():
+            requests.append(requests_queue.get())
+            pool.stop()
+
+        thread = threading.Thread(target=stop_when_requested)
+        thread.start()
+        with self.assertRaisesRegex(Exception, 'Inference pool is stopped'):
+            pool.predict('p', pd.DataFrame({'x': [1, 2]}), 'dict', None)
+        thread.join()
+        self.assertFalse(is_block_exists(requests[0][2][1]))
+        # worker is asked to stop
+        self.assertIsNone(requests_queue.get_nowait())
+
+    def test_rejected_request(self):
+        pool, requests_queue = self.make_pool(queue_timeout=0.1)
+        requests_queue.put(None)
+        with self.assertRaisesRegex(Exception, 'is busy'):
+            pool.predict('p', pd.DataFrame({'x': [1, 2]}), 'dict', None)
+        self.assertEqual(pool._requests_data, {})
+        self.assertEqual(pool.get_stats()['rejected'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import datetime
+import unittest
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+from mindsdb.api.mysql.mysql_proxy.classes.sql_query import to_join_frame
+
+
+class ToJoinFrameTest(unittest.TestCase):
+    def test_types(self):
+        frame = pd.DataFrame({
+            'id': pd.Series([1, 2, 3], dtype=object),
+            'nullable': pd.Series([1, None, 3], dtype=object),
+            'ratio': pd.Series([0.5, 1, None], dtype=object),
+            'name': pd.Series(['a', None, 'c'], dtype=object),
+            'flag': pd.Series([True, False, None], dtype=object),
+            'day': pd.Series([datetime.date(2020, 1, 1), None, datetime.date(2020, 1, 3)], dtype=object),
+            'mixed': pd.Series([1, 'b', None], dtype=object)
+        })
+        result = to_join_frame(frame, 'ta')
+        self.assertEqual(list(result.columns), [f'ta{i}' for i in range(7)])
+        self.assertEqual(
+            [str(x) for x in result.dtypes],
+            ['int64', 'float64', 'float64', 'object', 'object', 'object', 'object']
+        )
+        self.assertTrue(np.isnan(result['ta1'][1]))
+        self.assertEqual(result['ta5'].tolist()[0], datetime.date(2020, 1, 1))
+
+    def test_big_integers(self):
+        frame = pd.DataFrame({'x': pd.Series([2 ** 70, 1], dtype=object)})
+        result = to_join_frame(frame, 'ta')
+        self.assertEqual(str(result.dtypes['ta0']), 'float64')
+
+    def test_join(self):
+        left = to_join_frame(pd.DataFrame({
+            'id': pd.Series([1, 2, None], dtype=object),
+            'name': pd.Series(['a', 'b', 'c'], dtype=object)
+        }), 'ta')
+        right = to_join_frame(pd.DataFrame({
+            'id': pd.Series([2, 1], dtype=object),
+            'value': pd.Series([20.5, 10], dtype=object)
+        }), 'tb')
+        con = duckdb.connect(database=':memory:')
+        try:
+            con.register('left_frame', left)
+            con.register('right_frame', right)
+            rows = con.execute(
+                'select ta1, tb1 from left_frame join right_frame on ta0 = tb0 order by ta1'
+            ).fetchall()
+        finally:
+            con.close()
+        self.assertEqual(rows, [('a', 10.0), ('b', 20.5)])
+
+
+if __name__ == '__main__':
+    unittest.main()
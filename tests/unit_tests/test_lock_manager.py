@@ -0,0 +1,57 @@
+import time
+import threading
+import unittest
+
+from mindsdb.interfaces.storage.lock_manager import LocalLockManager, LockTimeoutError
+
+
+class LocalLockManagerTest(unittest.TestCase):
+    def test_try_lock_does_not_wait(self):
+        manager = LocalLockManager()
+        self.assertTrue(manager.acquire('datasource', 1, 'write', timeout=0))
+        start = time.time()
+        self.assertFalse(manager.acquire('datasource', 1, 'write', timeout=0))
+        self.assertLess(time.time() - start, 0.5)
+        # other entity is not affected
+        self.assertTrue(manager.acquire('datasource', 2, 'write', timeout=0))
+        manager.release('datasource', 1, 'write')
+        self.assertTrue(manager.acquire('datasource', 1, 'write', timeout=0))
+
+    def test_readers_share_lock_and_block_writer(self):
+        manager = LocalLockManager()
+        self.assertTrue(manager.acquire('predictor', 1, 'read'))
+        self.assertTrue(manager.acquire('predictor', 1, 'read', timeout=0))
+        self.assertFalse(manager.acquire('predictor', 1, 'write', timeout=0.05))
+        manager.release('predictor', 1, 'read')
+        manager.release('predictor', 1, 'read')
+        self.assertTrue(manager.acquire('predictor', 1, 'write', timeout=0))
+
+    def test_waiter_is_notified_on_release(self):
+        manager = LocalLockManager()
+        manager.acquire('predictor', 1, 'write')
+        acquired = []
+
+        def wait():
+            with manager.lock('predictor', 1, 'write', timeout=5):
+                acquired.append(time.time())
+
+        thread = threading.Thread(target=wait)
+        thread.start()
+        time.sleep(0.05)
+        released_at = time.time()
+        manager.release('predictor', 1, 'write')
+        thread.join()
+        self.assertEqual(len(acquired), 1)
+        self.assertLess(acquired[0] - released_at, 0.5)
+
+    def test_lock_context_timeout(self):
+        manager = LocalLockManager()
+        manager.acquire('predictor', 1, 'write')
+        with self.assertRaises(LockTimeoutError):
+            with manager.lock('predictor', 1, 'read', timeout=0):
+                pass
+        self.assertEqual(manager.get_stats()['timeouts'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import threading
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from mindsdb.interfaces.model import predict_batcher
+from mindsdb.interfaces.model.predict_batcher import PredictBatcher
+
+
+class SplitTest(unittest.TestCase):
+    def test_list(self):
+        self.assertEqual(PredictBatcher._split([1, 2, 3, 4], [1, 3]), [[1], [2, 3, 4]])
+
+    def test_tuple(self):
+        result = PredictBatcher._split(([1, 2, 3], ['a', 'b', 'c']), [2, 1])
+        self.assertEqual(result, [([1, 2], ['a', 'b']), ([3], ['c'])])
+
+    def test_frame(self):
+        frame = pd.DataFrame({'x': [1, 2, 3], 'y': ['a', 'b', 'c']})
+        first, second = PredictBatcher._split(frame, [1, 2])
+        self.assertEqual(first.to_dict('records'), [{'x': 1, 'y': 'a'}])
+        # index of each part starts from 0, same as if the request was predicted alone
+        self.assertEqual(list(second.index), [0, 1])
+        self.assertEqual(second['y'].tolist(), ['b', 'c'])
+
+    def test_wrong_length(self):
+        with self.assertRaises(Exception):
+            PredictBatcher._split([1, 2], [1, 2])
+        with self.assertRaises(Exception):
+            PredictBatcher._split(([1, 2, 3], [1, 2]), [1, 2])
+
+
+def predict_concurrently(batcher, predict_fn, values):
+    ''' Predicts request [{'x': value}] for each value in separate thread, error of request is its result '''
+    results = {}
+
+    def request(value):
+        try:
+            results[value] = batcher.predict(predict_fn, 'p', [{'x': value}], 'dict', None)
+        except Exception as e:
+            results[value] = str(e)
+
+    threads = [threading.Thread(target=request, args=(value,)) for value in values]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def predict_or_fail(name, rows, pred_format, company_id):
+    if any(row['x'] == 'bad' for row in rows):
+        raise Exception('bad row')
+    return [row['x'] for row in rows]
+
+
+class PredictTest(unittest.TestCase):
+    def setUp(self):
+        # log is written to the database, which is not needed by unit tests
+        patcher = mock.patch.object(predict_batcher, 'log')
+        self.log = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_concurrent_requests_are_batched(self):
+        batcher = PredictBatcher(max_wait=0.5, max_batch_rows=3)
+        calls = []
+
+        def predict_fn(name, rows, pred_format, company_id):
+            calls.append(len(rows))
+            return [row['x'] * 10 for row in rows]
+
+        results = predict_concurrently(batcher, predict_fn, range(3))
+        self.assertEqual(results, {0: [0], 1: [10], 2: [20]})
+        self.assertEqual(calls, [3])
+
+    def test_fallback_to_single_requests(self):
+        batcher = PredictBatcher(max_wait=0.5, max_batch_rows=2)
+        results = predict_concurrently(batcher, predict_or_fail, ('good', 'bad'))
+        self.assertEqual(results, {'good': ['good'], 'bad': 'bad row'})
+        self.assertEqual(batcher.get_stats()['fallbacks'], 1)
+        self.assertEqual(self.log.warning.call_count, 1)
+
+    def test_failed_logging_does_not_fail_fallback(self):
+        self.log.warning.side_effect = Exception('log is not available')
+        batcher = PredictBatcher(max_wait=0.5, max_batch_rows=2)
+        results = predict_concurrently(batcher, predict_or_fail, ('good', 'bad'))
+        self.assertEqual(results, {'good': ['good'], 'bad': 'bad row'})
+
+if __name__ == '__main__':
+    unittest.main()
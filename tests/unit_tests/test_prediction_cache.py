@@ -0,0 +1,111 @@
+import time
+import unittest
+
+import pandas as pd
+
+from mindsdb.interfaces.model.prediction_cache import PredictionCache
+
+
+class FakePredictor():
+    ''' Predicts y = a * 10 for each row, 'frame' result has input columns in order of the request '''
+
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, name, when_data, pred_format, company_id):
+        rows = [when_data] if isinstance(when_data, dict) else when_data
+        self.calls.append(len(rows))
+        if pred_format == 'frame':
+            frame = pd.DataFrame(rows)
+            frame['y'] = [row['a'] * 10 for row in rows]
+            return frame
+        return [{'y': row['a'] * 10} for row in rows]
+
+
+class PredictionCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.cache = PredictionCache(max_rows=100, ttl=None)
+        self.predictor = FakePredictor()
+
+    def predict(self, when_data, pred_format='dict', updated_at=1):
+        return self.cache.predict(self.predictor.predict, 'p', when_data, pred_format, None, 1, updated_at)
+
+    def test_partial_hit(self):
+        self.assertEqual(self.predict([{'a': 1}, {'a': 2}]), [{'y': 10}, {'y': 20}])
+        self.assertEqual(self.predict([{'a': 2}, {'a': 3}, {'a': 1}, {'a': 3}]), [{'y': 20}, {'y': 30}, {'y': 10}, {'y': 30}])
+        # only the new row is predicted, once
+        self.assertEqual(self.predictor.calls, [2, 1])
+        self.assertEqual(self.cache.get_stats()['hits'], 3)
+
+    def test_reordered_columns(self):
+        first = self.predict([{'a': 1, 'b': 'x'}], 'frame')
+        self.assertEqual(list(first.columns), ['a', 'b', 'y'])
+        # the same row, cached, and a new row, with other order of columns
+        result = self.predict([{'b': 'z', 'a': 3}, {'b': 'x', 'a': 1}], 'frame')
+        self.assertEqual(self.predictor.calls, [1, 1])
+        self.assertEqual(list(result.columns), ['b', 'a', 'y'])
+        self.assertEqual(result.to_dict('records'), [
+            {'b': 'z', 'a': 3, 'y': 30},
+            {'b': 'x', 'a': 1, 'y': 10}
+        ])
+
+    def test_all_cached_reordered(self):
+        self.predict([{'a': 1, 'b': 'x'}, {'a': 2, 'b': 'y'}], 'frame')
+        result = self.predict([{'b': 'y', 'a': 2}, {'b': 'x', 'a': 1}], 'frame')
+        self.assertEqual(self.predictor.calls, [2])
+        self.assertEqual(list(result.columns), ['b', 'a', 'y'])
+        self.assertEqual(result['y'].tolist(), [20, 10])
+
+    def test_rows_with_other_columns(self):
+        self.predict([{'a': 1}], 'frame')
+        result = self.predict([{'a': 1}, {'a': 2, 'b': 'x'}], 'frame')
+        self.assertEqual(list(result.columns), ['a', 'b', 'y'])
+        self.assertEqual(result['a'].tolist(), [1, 2])
+        self.assertEqual(result['y'].tolist(), [10, 20])
+        self.assertTrue(pd.isnull(result['b'][0]))
+        self.assertEqual(result['b'][1], 'x')
+
+    def test_result_is_copied(self):
+        self.predict([{'a': 1}])
+        self.predict([{'a': 1}])[0]['y'] = 0
+        self.assertEqual(self.predict([{'a': 1}]), [{'y': 10}])
+
+    def test_predicted_result_is_copied(self):
+        # result of request which is not cached at all is not stored by reference
+        self.predict([{'a': 1}])[0]['y'] = 0
+        self.assertEqual(self.predict([{'a': 1}]), [{'y': 10}])
+
+    def test_missed_rows_are_predicted_once(self):
+        self.predict([{'a': 1}])
+
+        def predict_not_by_rows(name, when_data, pred_format, company_id):
+            self.predictor.calls.append(len(when_data))
+            return [{'y': 0}]
+
+        with self.assertRaises(Exception):
+            self.cache.predict(predict_not_by_rows, 'p', [{'a': 1}, {'a': 2}, {'a': 3}], 'dict', None, 1, 1)
+        self.assertEqual(self.predictor.calls, [1, 2])
+
+    def test_new_version_of_predictor(self):
+        self.predict([{'a': 1}])
+        self.predict([{'a': 1}], updated_at=2)
+        self.assertEqual(self.predictor.calls, [1, 1])
+
+    def test_ttl_and_eviction(self):
+        cache = PredictionCache(max_rows=2, ttl=0.05)
+        for a in (1, 2, 3):
+            cache.predict(self.predictor.predict, 'p', {'a': a}, 'dict', None, 1, 1)
+        self.assertEqual(cache.get_stats()['evictions'], 1)
+        time.sleep(0.1)
+        cache.predict(self.predictor.predict, 'p', {'a': 3}, 'dict', None, 1, 1)
+        self.assertEqual(cache.get_stats()['hits'], 0)
+
+    def test_invalidate(self):
+        self.predict([{'a': 1}])
+        self.cache.invalidate(None, 1)
+        self.predict([{'a': 1}])
+        self.assertEqual(self.predictor.calls, [1, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import time
+import datetime
+import threading
+import unittest
+
+from mindsdb.interfaces.model.predictor_cache import PredictorCache
+
+
+class PredictorCacheTest(unittest.TestCase):
+    def test_concurrent_misses_load_once(self):
+        cache = PredictorCache()
+        updated_at = datetime.datetime(2022, 1, 1)
+        loads = []
+
+        def load():
+            loads.append(1)
+            time.sleep(0.1)
+            return object(), 0
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get_or_load('1@@@@@p', updated_at, load)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(loads), 1)
+        self.assertEqual(len(set(id(x) for x in results)), 1)
+
+    def test_retrained_predictor_is_loaded_again(self):
+        cache = PredictorCache()
+        first = cache.get_or_load('1@@@@@p', datetime.datetime(2022, 1, 1), lambda: ('v1', 0))
+        second = cache.get_or_load('1@@@@@p', datetime.datetime(2022, 1, 2), lambda: ('v2', 0))
+        self.assertEqual((first, second), ('v1', 'v2'))
+        self.assertEqual(len(cache), 1)
+
+    def test_failed_load_is_not_cached(self):
+        cache = PredictorCache()
+        updated_at = datetime.datetime(2022, 1, 1)
+
+        def fail():
+            raise Exception('broken predictor')
+
+        with self.assertRaises(Exception):
+            cache.get_or_load('1@@@@@p', updated_at, fail)
+        self.assertEqual(cache.get_or_load('1@@@@@p', updated_at, lambda: ('v1', 0)), 'v1')
+
+
+if __name__ == '__main__':
+    unittest.main()
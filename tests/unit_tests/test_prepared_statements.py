@@ -0,0 +1,65 @@
+import datetime
+import unittest
+
+import pandas as pd
+from mindsdb_sql import parse_sql
+
+from mindsdb.api.mysql.mysql_proxy.classes.sql_query import Column, SQLQuery, get_column_stats
+from mindsdb.api.mysql.mysql_proxy.libs.constants.mysql import TYPES
+
+
+class BindParametersTest(unittest.TestCase):
+    def test_bound_query_is_planned(self):
+        # statement is prepared by the planner, and then executed with values of parameters
+        sql_query = SQLQuery.__new__(SQLQuery)
+        sql_query.query = parse_sql('SELECT a, b FROM int1.t1 WHERE a > ? AND b = ?', dialect='mindsdb')
+        sql_query.integrations_names = ['int1']
+        sql_query.mindsdb_database_name = 'mindsdb'
+        sql_query.database = None
+        sql_query._make_planner({})
+        table = ('int1', 't1', 't1')
+        for step in sql_query.planner.prepare_steps(sql_query.query):
+            step.set_result({'tables': [table], 'columns': {table: [('a', 'a'), ('b', 'b')]}, 'values': []})
+        self.assertEqual(len(sql_query.planner.get_statement_info()['parameters']), 2)
+
+        sql_query._bind_parameters([5, 'x'])
+        steps = list(sql_query.planner.execute_steps())
+        self.assertEqual(len(steps), 1)
+        self.assertEqual(str(steps[0].query), "SELECT t1.a AS a, t1.b AS b FROM t1 WHERE t1.a > 5 AND t1.b = 'x'")
+
+    def test_count_of_parameters(self):
+        sql_query = SQLQuery.__new__(SQLQuery)
+        sql_query.query = parse_sql('SELECT a FROM int1.t1 WHERE a > ?', dialect='mindsdb')
+        with self.assertRaisesRegex(Exception, "Count of execution parameters"):
+            sql_query._bind_parameters([1, 2])
+
+
+class ColumnTypesTest(unittest.TestCase):
+    def test_types_by_protocol(self):
+        sql_query = SQLQuery.__new__(SQLQuery)
+        sql_query.database = 'mindsdb'
+        sql_query.model_types = {'y': 'integer'}
+        columns_list = [Column(name='y'), Column(name='x'), Column(name='d')]
+        columns_stats = [
+            get_column_stats(pd.Series(values, dtype=object))
+            for values in ([1, 2], [1.5, None], [datetime.date(2020, 1, 1)])
+        ]
+
+        # text protocol: types of predictor columns only, same as before stats were collected
+        columns = sql_query.to_mysql_columns(columns_list, columns_stats)
+        self.assertEqual(
+            [column['type'] for column in columns],
+            [TYPES.MYSQL_TYPE_LONG, TYPES.MYSQL_TYPE_VAR_STRING, TYPES.MYSQL_TYPE_VAR_STRING]
+        )
+        self.assertEqual(columns[1]['stats']['null_count'], 1)
+
+        # binary protocol: types are found by values, so they can be encoded
+        columns = sql_query.to_mysql_columns(columns_list, columns_stats, binary=True)
+        self.assertEqual(
+            [column['type'] for column in columns],
+            [TYPES.MYSQL_TYPE_LONGLONG, TYPES.MYSQL_TYPE_DOUBLE, TYPES.MYSQL_TYPE_DATE]
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
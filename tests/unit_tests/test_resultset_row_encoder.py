@@ -0,0 +1,81 @@
+import types
+import decimal
+import datetime
+import unittest
+
+import numpy as np
+
+from mindsdb.api.mysql.mysql_proxy.data_types.mysql_packets.binary_resultset_row_package import (
+    BinaryResultsetRowPacket
+)
+from mindsdb.api.mysql.mysql_proxy.data_types.mysql_packets.resultset_row_package import ResultsetRowPacket
+from mindsdb.api.mysql.mysql_proxy.data_types.resultset_row_encoder import encode_binary_rows, encode_text_rows
+from mindsdb.api.mysql.mysql_proxy.libs.constants.mysql import TYPES
+
+
+def make_session():
+    return types.SimpleNamespace(logging=types.SimpleNamespace(debug=lambda *args: None), packet_sequence_number=0)
+
+
+def columns_of(rows):
+    return [list(values) for values in zip(*rows)]
+
+
+class EncodeTextRowsTest(unittest.TestCase):
+    def test_same_as_packets(self):
+        rows = [
+            [i, i * 0.5, f'name {i}', None if i % 3 == 0 else 'text ' * (i % 70), datetime.date(2020, 1, 1 + i % 28),
+             decimal.Decimal('1.5'), 'юникод' if i % 2 else 7, np.int64(i), True]
+            for i in range(600)
+        ]
+        session = make_session()
+        expected = []
+        for i, row in enumerate(rows):
+            session.packet_sequence_number = (3 + i) % 256
+            expected.append(ResultsetRowPacket(session=session, data=row).accum())
+
+        encoded, sequence_id = encode_text_rows(columns_of(rows), 3)
+        self.assertEqual(encoded, b''.join(expected))
+        self.assertEqual(sequence_id, (3 + len(rows)) % 256)
+
+    def test_no_columns(self):
+        self.assertEqual(encode_text_rows([], 5), (b'', 5))
+
+
+class EncodeBinaryRowsTest(unittest.TestCase):
+    column_types = [
+        TYPES.MYSQL_TYPE_LONGLONG, TYPES.MYSQL_TYPE_DOUBLE, TYPES.MYSQL_TYPE_VAR_STRING, TYPES.MYSQL_TYPE_DATE,
+        TYPES.MYSQL_TYPE_DATETIME, TYPES.MYSQL_TYPE_TIME, TYPES.MYSQL_TYPE_NEWDECIMAL
+    ]
+
+    def test_same_as_packets(self):
+        rows = [
+            [None if i % 7 == 0 else i, float('nan') if i % 5 == 0 else i * 0.5, f's{i}' * (i % 90),
+             datetime.date(2020, 1, 1 + i % 28), datetime.datetime(2020, 1, 2, 3, 4, 5, i % 3),
+             datetime.time(1, 2, i % 60), decimal.Decimal('1.5')]
+            for i in range(300)
+        ]
+        session = make_session()
+        columns = [{'type': column_type} for column_type in self.column_types]
+        expected = []
+        for i, row in enumerate(rows):
+            session.packet_sequence_number = i % 256
+            expected.append(BinaryResultsetRowPacket(session=session, data=row, columns=columns).accum())
+
+        encoded, _ = encode_binary_rows(columns_of(rows), self.column_types, 0)
+        self.assertEqual(encoded, b''.join(expected))
+
+    def test_not_a_date_is_null(self):
+        encoded, _ = encode_binary_rows(
+            [['2020-02-03', 'garbage'], ['garbage', None]],
+            [TYPES.MYSQL_TYPE_DATE, TYPES.MYSQL_TYPE_DATETIME],
+            0
+        )
+        # header, sequence id, packet header byte, NULL bitmap (offset 2), values
+        first_row = b'\x07\x00\x00\x00' + b'\x00' + bytes([0b00001000]) + b'\x04\xe4\x07\x02\x03'
+        second_row = b'\x02\x00\x00\x01' + b'\x00' + bytes([0b00001100])
+        self.assertEqual(encoded, first_row + second_row)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,24 @@
+import unittest
+from unittest import mock
+
+from mindsdb.interfaces.storage import s3_stream
+
+
+class CheckCodecTest(unittest.TestCase):
+    def test_gz_is_always_available(self):
+        s3_stream.check_codec('gz')
+
+    def test_unknown_codec(self):
+        with self.assertRaisesRegex(Exception, 'Unknown storage codec'):
+            s3_stream.check_codec('bz2')
+
+    def test_missing_package(self):
+        with mock.patch.object(s3_stream, 'zstandard', None), mock.patch.object(s3_stream, 'lz4', None):
+            with self.assertRaisesRegex(Exception, "'zstandard' is required"):
+                s3_stream.check_codec('zstd')
+            with self.assertRaisesRegex(Exception, "'lz4' is required"):
+                s3_stream.check_codec('lz4')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import copy
+import unittest
+
+import pandas as pd
+
+from mindsdb.api.mysql.mysql_proxy.datahub.datanodes.timeseries_horizon import (
+    _expand_horizon_by_rows,
+    expand_horizon
+)
+
+EXPLAIN_NAMES = {
+    'y_confidence': 'confidence',
+    'y_anomaly': 'anomaly',
+    'y_truth': 'truth',
+    'y_min': 'confidence_lower_bound',
+    'y_max': 'confidence_upper_bound'
+}
+
+
+def make_predictions(groups, rows_per_group, horizon):
+    ''' Predictions in 'frame' format, values of horizon 1 are not lists '''
+    rows_count = groups * rows_per_group
+
+    def steps(values):
+        return values if horizon > 1 else values[0]
+
+    return pd.DataFrame({
+        'g': [f'group {i % groups}' for i in range(rows_count)],
+        't': [steps([100 + i + step for step in range(horizon)]) for i in range(rows_count)],
+        'x': [i * 0.5 for i in range(rows_count)],
+        '__mindsdb_row_id': list(range(rows_count)),
+        'y': [steps([i * 10 + step for step in range(horizon)]) for i in range(rows_count)],
+        'y_confidence': [steps([0.9] * horizon) for _ in range(rows_count)],
+        'y_anomaly': [i % 2 == 0 for i in range(rows_count)],
+        'y_truth': [float(i) for i in range(rows_count)],
+        'y_min': [steps([0.] * horizon) for _ in range(rows_count)],
+        'y_max': [steps([1.] * horizon) for _ in range(rows_count)]
+    })
+
+
+def expand_by_rows(frame, group_by, horizon, make_predictions=True):
+    ''' Result of the previous implementation, in the same form as result of expand_horizon '''
+    pred_dicts = frame[['g', 't', 'x', '__mindsdb_row_id', 'y']].to_dict('records')
+    explanations = [
+        {'y': {'predicted_value': row['y'], **{name: row[key] for key, name in EXPLAIN_NAMES.items()}}}
+        for row in frame.to_dict('records')
+    ]
+    rows, explanations = _expand_horizon_by_rows(
+        copy.deepcopy(pred_dicts), copy.deepcopy(explanations), 'y', group_by, 't', horizon, make_predictions
+    )
+    for row, explanation in zip(rows, explanations):
+        for key, name in EXPLAIN_NAMES.items():
+            row[key] = explanation['y'][name]
+    return rows
+
+
+class ExpandHorizonTest(unittest.TestCase):
+    def assert_same_as_by_rows(self, frame, group_by, horizon, make_predictions=True):
+        expected = expand_by_rows(frame, group_by, horizon, make_predictions)
+        result = expand_horizon(frame, 'y', group_by, 't', horizon, make_predictions).to_dict('records')
+        # order of groups in the previous implementation is order of set
+        expected = sorted(expected, key=lambda row: (row['g'], row['t']))
+        result = sorted(result, key=lambda row: (row['g'], row['t']))
+        self.assertEqual(len(result), len(expected))
+        for expected_row, row in zip(expected, result):
+            self.assertEqual({key: row[key] for key in expected_row}, expected_row)
+
+    def test_groups(self):
+        frame = make_predictions(groups=3, rows_per_group=4, horizon=3)
+        self.assert_same_as_by_rows(frame, ['g'], 3)
+        self.assertEqual(len(expand_horizon(frame, 'y', ['g'], 't', 3)), 3 * (3 + 3))
+
+    def test_without_groups(self):
+        frame = make_predictions(groups=1, rows_per_group=5, horizon=2)
+        self.assert_same_as_by_rows(frame, [], 2)
+
+    def test_horizon_1(self):
+        frame = make_predictions(groups=2, rows_per_group=3, horizon=1)
+        self.assert_same_as_by_rows(frame, ['g'], 1)
+
+    def test_not_predictions(self):
+        frame = make_predictions(groups=2, rows_per_group=3, horizon=2)
+        self.assert_same_as_by_rows(frame, ['g'], 2, make_predictions=False)
+
+    def test_order(self):
+        frame = make_predictions(groups=2, rows_per_group=2, horizon=2)
+        result = expand_horizon(frame, 'y', ['g'], 't', 2)
+        self.assertEqual(result['g'].tolist(), ['group 0'] * 3 + ['group 1'] * 3)
+        self.assertEqual(result['t'].tolist(), [100, 102, 103, 101, 103, 104])
+        self.assertEqual(result['__mindsdb_row_id'].tolist(), [0, 2, None, 1, 3, None])
+        self.assertEqual(result['y_anomaly'].tolist(), [True, True, None, False, False, None])
+
+    def test_empty(self):
+        frame = make_predictions(groups=1, rows_per_group=0, horizon=2)
+        self.assertEqual(len(expand_horizon(frame, 'y', ['g'], 't', 2)), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import datetime
+import unittest
+from decimal import Decimal
+
+from mindsdb_sql.parser.ast import BinaryOperation, Constant, Identifier, Select, Star
+from mindsdb_sql.planner.steps import FetchDataframeStep
+
+from mindsdb.api.mysql.mysql_proxy.classes.sql_query import (
+    SQLQuery,
+    get_query_var_conditions,
+    normalize_var_value
+)
+
+
+class FakeDataNode():
+    ''' Returns `rows` for query of all groups. For query of one group returns `group_rows` of the value,
+        or rows with `g` equal to the value
+    '''
+
+    def __init__(self, rows, group_rows=None):
+        self.rows = rows
+        self.group_rows = group_rows or {}
+        self.queries = []
+
+    def select(self, query):
+        self.queries.append(query)
+        if query.where.op == 'in':
+            rows = self.rows
+        else:
+            value = query.where.args[1].value
+            rows = self.group_rows.get(value, [row for row in self.rows if str(row[0]) == str(value)])
+        return [{'g': g, 'x': x} for g, x in rows], ['g', 'x']
+
+
+class FakeHub():
+    def __init__(self, dn):
+        self.dn = dn
+
+    def get(self, name):
+        return self.dn
+
+
+def fetch_var_groups(rows, vars, group_rows=None):
+    dn = FakeDataNode(rows, group_rows)
+    sql_query = SQLQuery.__new__(SQLQuery)
+    sql_query.datahub = FakeHub(dn)
+    sql_query.session = type('Session', (), {'config': {'api': {'mysql': {}}}})()
+    step = FetchDataframeStep(integration='int1', query=Select(
+        targets=[Star()],
+        from_table=Identifier('t'),
+        where=BinaryOperation('=', args=[Identifier('g'), Constant('$var[g]')])
+    ))
+    conditions, var_columns = get_query_var_conditions(step.query.where)
+    result = sql_query._fetch_var_groups_merged(step, vars, conditions, var_columns)
+    return [frame[1].tolist() for frame, _ in result], dn.queries
+
+
+class NormalizeVarValueTest(unittest.TestCase):
+    def test_numbers(self):
+        values = [1, 1.0, Decimal('1.00'), '1', True]
+        self.assertEqual(len(set(normalize_var_value(x) for x in values)), 1)
+        self.assertNotEqual(normalize_var_value(1), normalize_var_value(10))
+
+    def test_dates(self):
+        values = [datetime.date(2020, 1, 1), datetime.datetime(2020, 1, 1), '2020-01-01', '2020-01-01 00:00:00']
+        self.assertEqual(len(set(normalize_var_value(x) for x in values)), 1)
+        self.assertEqual(
+            normalize_var_value(datetime.datetime(2020, 1, 1, 10, 30)),
+            normalize_var_value('2020-01-01 10:30:00')
+        )
+
+    def test_null(self):
+        self.assertIsNone(normalize_var_value(None))
+        self.assertIsNone(normalize_var_value(float('nan')))
+
+
+class FetchVarGroupsMergedTest(unittest.TestCase):
+    def test_split(self):
+        rows = [(1, 'a'), (2, 'b'), (1, 'c')]
+        result, queries = fetch_var_groups(rows, [{'g': 2}, {'g': 1}, {'g': 2}, {'g': None}])
+        self.assertEqual(result, [['b'], ['a', 'c'], ['b'], []])
+        self.assertEqual(len(queries), 1)
+
+    def test_other_types(self):
+        # database returns values in other type than type of variables
+        rows = [('1', 'a'), (Decimal('2.0'), 'b'), (datetime.date(2020, 1, 1), 'c')]
+        result, queries = fetch_var_groups(rows, [{'g': 1}, {'g': 2}, {'g': '2020-01-01'}])
+        self.assertEqual(result, [['a'], ['b'], ['c']])
+        self.assertEqual(len(queries), 1)
+
+    def test_case_insensitive(self):
+        result, queries = fetch_var_groups([('ABC', 'a')], [{'g': 'abc'}])
+        self.assertEqual(result, [['a']])
+        self.assertEqual(len(queries), 1)
+
+    def test_fallback_for_empty_groups(self):
+        # the database matched the second group by its own rules, so its rows can not be recognised
+        rows = [(1, 'a'), ('ß', 'b')]
+        result, queries = fetch_var_groups(
+            rows, [{'g': 1}, {'g': 'ss'}, {'g': 3}], group_rows={'ss': [('ß', 'b')]}
+        )
+        self.assertEqual(result, [['a'], ['b'], []])
+        self.assertEqual(len(queries), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()